@@ -1,7 +1,11 @@
 # Enhanced app.py with automated lecture generation
 import os
 import io
+import re
+import hmac
 import json
+import time
+import hashlib
 import logging
 from datetime import datetime, timedelta, date
 from typing import Optional, List, Dict
@@ -9,7 +13,7 @@ from typing import Optional, List, Dict
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import BackgroundTasks
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from pydantic import BaseModel, Field
 from supabase import create_client
 
@@ -25,12 +29,55 @@ except Exception:
     from supabase_client import SupabaseClient
 
 try:
-    from src.core.content_processor import ContentProcessor
+    from src.core.content_processor import ContentProcessor, prune_text_cache
 except Exception:
     try:
-        from content_processor import ContentProcessor
+        from content_processor import ContentProcessor, prune_text_cache
     except Exception:
         ContentProcessor = None
+        prune_text_cache = None
+
+try:
+    from src.core.cpu_pool import shutdown_cpu_pool
+except Exception:
+    try:
+        from cpu_pool import shutdown_cpu_pool
+    except Exception:
+        shutdown_cpu_pool = None
+
+try:
+    from src.core.pdf_prefetcher import PDFPrefetcher
+except Exception:
+    try:
+        from pdf_prefetcher import PDFPrefetcher
+    except Exception:
+        PDFPrefetcher = None
+
+try:
+    from src.core.tts_cache import get_tts_cache, prune_tts_cache
+except Exception:
+    try:
+        from tts_cache import get_tts_cache, prune_tts_cache
+    except Exception:
+        get_tts_cache = None
+        prune_tts_cache = None
+
+try:
+    from src.core.lesson_manifest import prune_section_audio_cache
+except Exception:
+    try:
+        from lesson_manifest import prune_section_audio_cache
+    except Exception:
+        prune_section_audio_cache = None
+
+try:
+    from src.core.batch_client import BatchClient, TERMINAL_BATCH_STATUSES
+except Exception:
+    try:
+        from batch_client import BatchClient, TERMINAL_BATCH_STATUSES
+    except Exception:
+        BatchClient = None
+        TERMINAL_BATCH_STATUSES = set()
 
 try:
     from src.core.speech_generator import EnhancedTimedSpeechGenerator
@@ -77,6 +124,20 @@ AUDIO_BUCKET = os.getenv("AUDIO_BUCKET", "lecture-audios")
 SIGN_URLS = os.getenv("SIGN_URLS", "true").lower() == "true"
 SIGN_EXPIRES_SECONDS = int(os.getenv("SIGN_EXPIRES_SECONDS", "3600"))
 GENERATE_TIMED_AUDIO = os.getenv("GENERATE_TIMED_AUDIO", "true").lower() == "true"
+STREAM_SCRIPT_TO_TTS = os.getenv("STREAM_SCRIPT_TO_TTS", "false").lower() == "true"
+# Render script PDFs on first request instead of during generation. The prepared_lessons
+# URL then points at this API, so it needs to know its own public base URL.
+PUBLIC_API_BASE_URL = os.getenv("PUBLIC_API_BASE_URL", "").rstrip("/")
+# The endpoint URL carries an HMAC token (keyed with SCRIPT_PDF_URL_SECRET) that expires after
+# SCRIPT_PDF_URL_EXPIRES_SECONDS; without a secret, PDFs are rendered during generation as before.
+SCRIPT_PDF_URL_SECRET = os.getenv("SCRIPT_PDF_URL_SECRET", "")
+SCRIPT_PDF_URL_EXPIRES_SECONDS = int(os.getenv("SCRIPT_PDF_URL_EXPIRES_SECONDS", str(7 * 24 * 3600)))
+LAZY_SCRIPT_PDF = (os.getenv("LAZY_SCRIPT_PDF", "true").lower() == "true"
+                   and bool(PUBLIC_API_BASE_URL) and bool(SCRIPT_PDF_URL_SECRET))
+BATCH_WORK_DIR = os.getenv("BATCH_WORK_DIR", "temp/batches")
+BATCH_POLL_INTERVAL_SECONDS = float(os.getenv("BATCH_POLL_INTERVAL_SECONDS", "60"))
+# A batch collection lock older than this is from a crashed worker and may be taken over
+BATCH_COLLECT_LOCK_TTL_SECONDS = float(os.getenv("BATCH_COLLECT_LOCK_TTL_SECONDS", str(6 * 3600)))
 
 # Initialize scheduler
 scheduler = AsyncIOScheduler()
@@ -95,6 +156,23 @@ def _build_bucket_path(teacher_id: str, course_id: str, lesson_id: str, date: st
     """Build structured bucket path with date"""
     return f"{teacher_id}/{course_id}/{date}/{lesson_id}_script.{ext}"
 
+def _hours_until_class(course: dict, target_date: str) -> Optional[float]:
+    """Hours from now until the course's class on target_date (UTC start_time, midnight if unset)"""
+    try:
+        class_day = datetime.strptime(target_date, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None
+    class_time = class_day
+    start_time = (course.get('start_time') or '').strip()
+    for fmt in ('%H:%M:%S', '%H:%M'):
+        try:
+            parsed = datetime.strptime(start_time[:8], fmt)
+            class_time = class_day.replace(hour=parsed.hour, minute=parsed.minute, second=parsed.second)
+            break
+        except ValueError:
+            continue
+    return (class_time - datetime.utcnow()).total_seconds() / 3600
+
 async def get_courses_for_target_date(target_date: str) -> List[dict]:
     """
     Get all courses that need lecture generation for the target date.
@@ -158,7 +236,224 @@ async def check_if_lecture_already_generated(teacher_id: str, course_id: str, ta
         logger.error(f"Error checking existing lectures: {e}")
         return False
 
-async def process_course_for_automated_generation(course: dict, target_date: str) -> dict:
+_PATH_SEGMENT_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,127}$")
+
+def _valid_script_path(teacher_id: str, course_id: str, lesson_id: str, date: str) -> bool:
+    """Only plain ids and a YYYY-MM-DD date may become bucket path segments"""
+    if not all(_PATH_SEGMENT_RE.match(segment or "") for segment in (teacher_id, course_id, lesson_id)):
+        return False
+    try:
+        return datetime.strptime(date, '%Y-%m-%d').strftime('%Y-%m-%d') == date
+    except (TypeError, ValueError):
+        return False
+
+def _script_pdf_token(teacher_id: str, course_id: str, lesson_id: str, date: str, expires: int) -> str:
+    message = f"{teacher_id}/{course_id}/{date}/{lesson_id}/{expires}".encode("utf-8")
+    return hmac.new(SCRIPT_PDF_URL_SECRET.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+def _script_pdf_endpoint_url(teacher_id: str, course_id: str, lesson_id: str, date: str) -> str:
+    expires = int(time.time()) + SCRIPT_PDF_URL_EXPIRES_SECONDS
+    token = _script_pdf_token(teacher_id, course_id, lesson_id, date, expires)
+    return (f"{PUBLIC_API_BASE_URL}/lectures/script-pdf/{teacher_id}/{course_id}/{date}/{lesson_id}"
+            f"?expires={expires}&token={token}")
+
+def _verify_script_pdf_token(teacher_id: str, course_id: str, lesson_id: str, date: str,
+                             expires: int, token: str) -> bool:
+    if not SCRIPT_PDF_URL_SECRET or expires < time.time():
+        return False
+    expected = _script_pdf_token(teacher_id, course_id, lesson_id, date, expires)
+    return hmac.compare_digest(expected, token or "")
+
+def _script_file_url(client, bucket_path: str) -> Optional[str]:
+    """Signed or public URL for an object in the scripts bucket"""
+    if SIGN_URLS:
+        return client.create_signed_url(SCRIPTS_BUCKET, bucket_path, expires_in=SIGN_EXPIRES_SECONDS)
+    return client.get_public_url(SCRIPTS_BUCKET, bucket_path)
+
+def _publish_script_pack(client, script_pack: dict, teacher_id: str, course_id: str,
+                         lesson_id: str, target_date: str) -> Optional[str]:
+    """
+    Store a generated script, record it in prepared_lessons and return its URL.
+    The script record (JSON) is the canonical artifact; the PDF is uploaded only
+    when it was rendered up front, otherwise the recorded URL is the on-demand
+    PDF endpoint, which renders and caches it on first request.
+    """
+    # Store the script record next to where the PDF lives
+    client.upload_pdf_to_bucket(
+        bucket=SCRIPTS_BUCKET,
+        pdf_bytes=json.dumps(ContentProcessor.script_record(script_pack), ensure_ascii=False).encode("utf-8"),
+        path=_build_bucket_path(teacher_id, course_id, lesson_id, target_date, ext="json"),
+        upsert=True,
+        content_type="application/json"
+    )
+    
+    if script_pack.get("pdf_bytes") is None:
+        file_url = _script_pdf_endpoint_url(teacher_id, course_id, lesson_id, target_date)
+    else:
+        # Build bucket path with target date
+        bucket_path = _build_bucket_path(
+            teacher_id, course_id, lesson_id, target_date, ext="pdf"
+        )
+        
+        # Upload to bucket
+        client.upload_pdf_to_bucket(
+            bucket=SCRIPTS_BUCKET,
+            pdf_bytes=script_pack["pdf_bytes"],
+            path=bucket_path,
+            upsert=True
+        )
+        
+        # Get URL for database record
+        file_url = _script_file_url(client, bucket_path)
+    
+    # Record in prepared_lessons table
+    if file_url:
+        client.record_prepared_lesson(lesson_id, file_url)
+    return file_url
+
+def _generate_script_with_streamed_audio(cp, speech_gen, pdf_url: str, lesson_title: str,
+                                         teacher_name: str, lesson_id: str,
+                                         source_pdf_bytes: Optional[bytes],
+                                         use_llm_cache: bool,
+                                         hours_until_class: Optional[float] = None) -> tuple:
+    """
+    Stream the script completion straight into TTS so synthesis of finished sections
+    overlaps with the rest of the completion. Returns (script_pack, audio_result).
+    """
+    source = cp.load_source_for_script(pdf_url, lesson_title, source_pdf_bytes)
+    route = cp.route_script(source, "English", hours_until_class, job_id=lesson_id)
+    deltas = cp.stream_student_friendly_script(
+        source["text"], lesson_title,
+        audience="middle school (ages 11-14)",
+        language="English",
+        use_cache=use_llm_cache,
+        model=route.chat_model if route else None,
+        max_tokens=route.chat_max_tokens if route else None
+    )
+    if route:
+        speech_gen.set_model(route.tts_model)
+
+    stream_state = {'complete': False}
+    def tracked_deltas():
+        yield from deltas
+        stream_state['complete'] = True
+
+    audio_result = speech_gen.generate_lesson_audio_from_stream(tracked_deltas(), lesson_id, voice="alloy",
+                                                                source=pdf_url)
+    if not stream_state['complete']:
+        # The completion itself failed; don't publish a partial script
+        raise Exception(audio_result.get('error') or 'Script stream ended early')
+
+    script_pack = cp.build_script_pack(audio_result['script_text'], lesson_title, teacher_name, pdf_url, source, route,
+                                       render_pdf=not LAZY_SCRIPT_PDF)
+    return script_pack, audio_result
+
+def _run_audio_stage(result: dict, teacher_id: str, course_id: str, lesson_id: str,
+                     lesson_title: str, file_url: str, target_date: str,
+                     streamed_audio: Optional[dict] = None, script_text: Optional[str] = None,
+                     tts_model: Optional[str] = None, script_doc: Optional[dict] = None,
+                     source: Optional[str] = None):
+    """
+    Generate (or upload pre-built) lesson audio and record the outcome in result.
+    source (the lesson's source PDF URL) keeps each of a lesson's scripts' stored
+    section audio apart.
+    """
+    try:
+        logger.info(f"Generating audio for lesson {lesson_id}")
+        
+        timed_speech_gen = TimedSpeechGenerator()
+        timed_speech_gen.set_model(tts_model)
+        if streamed_audio is not None:
+            # Audio was synthesized alongside the script; just upload it
+            if streamed_audio['success']:
+                audio_result = timed_speech_gen.upload_lesson_audio(
+                    teacher_id, course_id, lesson_id, target_date, streamed_audio
+                )
+            else:
+                audio_result = streamed_audio
+        else:
+            audio_result = timed_speech_gen.generate_timed_lesson_audio(
+                teacher_id=teacher_id,
+                course_id=course_id,
+                lesson_id=lesson_id,
+                lesson_title=lesson_title,
+                script_url=file_url,
+                date=target_date,
+                voice="alloy",
+                script_text=script_text,
+                script_doc=script_doc,
+                source=source
+            )
+        
+        if audio_result['success']:
+            result['successful_audio_generations'] += 1
+            result['audio_bytes'] = result.get('audio_bytes', 0) + audio_result.get('audio_bytes', 0)
+            logger.info(f"Successfully generated audio for lesson {lesson_id} ({audio_result.get('duration_minutes', 0)} min, "
+                        f"{audio_result.get('audio_bytes', 0) / 1024 / 1024:.2f} MB as '{audio_result.get('delivery_profile')}')")
+        else:
+            result['failed_audio_generations'] += 1
+            result['errors'].append({
+                'lesson_id': lesson_id,
+                'type': 'audio_generation',
+                'error': audio_result.get('error', 'Unknown audio error')
+            })
+            logger.error(f"Failed to generate audio for lesson {lesson_id}: {audio_result.get('error')}")
+                
+    except Exception as audio_error:
+        result['failed_audio_generations'] += 1
+        result['errors'].append({
+            'lesson_id': lesson_id,
+            'type': 'audio_generation',
+            'error': str(audio_error)
+        })
+        logger.error(f"Audio generation exception for lesson {lesson_id}: {audio_error}")
+
+async def resolve_lessons_for_courses(courses: List[dict]) -> Dict[str, List[dict]]:
+    """
+    Resolve the lessons with PDF resources for every course up front, so the
+    whole day's set of source PDFs is known before any LLM work starts.
+    Courses that fail to resolve are left out and fetched again later.
+    """
+    lessons_by_course = {}
+    for course in courses:
+        try:
+            client = SupabaseClient(teacher_id=course['teacher_id'])
+            lessons_by_course[course['id']] = client.get_lessons_with_pdf_resources(course['id'])
+        except Exception as e:
+            logger.warning(f"Could not resolve lessons for course {course.get('id')}: {e}")
+    return lessons_by_course
+
+async def prefetch_source_pdfs(lessons_by_course: Dict[str, List[dict]]) -> dict:
+    """Download all source PDFs for the day in parallel and report failures early"""
+    empty_report = {'pdfs': {}, 'failures': [], 'requested': 0, 'unique': 0}
+    if not PDFPrefetcher or not ContentProcessor:
+        return empty_report
+
+    try:
+        prefetcher = PDFPrefetcher(ContentProcessor())
+    except Exception as e:
+        logger.warning(f"PDF prefetch disabled: {e}")
+        return empty_report
+
+    urls = prefetcher.collect_urls(lessons_by_course)
+    report = await asyncio.to_thread(prefetcher.prefetch, urls)
+
+    if report['failures']:
+        logger.warning(f"{len(report['failures'])} source PDFs failed to download before generation:")
+        for failure in report['failures']:
+            logger.warning(f"  - {failure['pdf_url']}: {failure['error']}")
+    return report
+
+def _release_prefetched_pdfs(prefetch_report: dict):
+    """Delete the spooled source PDFs of a run (they are also deleted once the report is dropped)"""
+    pdfs = prefetch_report.get('pdfs')
+    if hasattr(pdfs, 'close'):
+        pdfs.close()
+
+async def process_course_for_automated_generation(course: dict, target_date: str,
+                                                  lessons_with_pdfs: Optional[List[dict]] = None,
+                                                  prefetch_report: Optional[dict] = None,
+                                                  use_llm_cache: bool = True) -> dict:
     """Process a single course to generate scripts and audio for the target date"""
     course_id = course['id']
     teacher_id = course['teacher_id']
@@ -174,6 +469,7 @@ async def process_course_for_automated_generation(course: dict, target_date: str
         'failed_generations': 0,
         'successful_audio_generations': 0,
         'failed_audio_generations': 0,
+        'audio_bytes': 0,
         'errors': [],
         'skipped_reason': None
     }
@@ -188,8 +484,11 @@ async def process_course_for_automated_generation(course: dict, target_date: str
         
         client = SupabaseClient(teacher_id=teacher_id)
         
-        # Get lessons with PDF resources for this course
-        lessons_with_pdfs = client.get_lessons_with_pdf_resources(course_id)
+        # Get lessons with PDF resources for this course (unless already resolved)
+        if lessons_with_pdfs is None:
+            lessons_with_pdfs = client.get_lessons_with_pdf_resources(course_id)
+        prefetched_pdfs = (prefetch_report or {}).get('pdfs', {})
+        prefetch_failures = {f['pdf_url']: f['error'] for f in (prefetch_report or {}).get('failures', [])}
         result['lessons_processed'] = len(lessons_with_pdfs)
         
         if not lessons_with_pdfs:
@@ -206,6 +505,7 @@ async def process_course_for_automated_generation(course: dict, target_date: str
         # Get teacher info for script generation
         teacher_info = client.get_teacher_info()
         teacher_name = teacher_info.get('name', 'Teacher')
+        hours_until_class = _hours_until_class(course, target_date)
         
         # Process each lesson
         for lesson in lessons_with_pdfs:
@@ -216,82 +516,51 @@ async def process_course_for_automated_generation(course: dict, target_date: str
                 # Process each PDF URL in the lesson
                 for idx, pdf_url in enumerate(lesson.get('pdf_urls', []), start=1):
                     try:
+                        if pdf_url.strip() in prefetch_failures:
+                            raise Exception(f"Failed to download PDF: {prefetch_failures[pdf_url.strip()]}")
+
                         logger.info(f"Generating script for lesson {lesson_id}, PDF {idx} for {target_date}")
                         
-                        # Generate script PDF
-                        script_pack = cp.generate_script_pdf_bytes(
-                            pdf_source_url=pdf_url,
-                            lesson_title=lesson_title,
-                            teacher_name=teacher_name,
-                            audience="middle school (ages 11-14)",
-                            language="English"
-                        )
-                        
-                        # Build bucket path with target date
-                        bucket_path = _build_bucket_path(
-                            teacher_id, course_id, lesson_id, target_date, ext="pdf"
-                        )
-                        
-                        # Upload to bucket
-                        client.upload_pdf_to_bucket(
-                            bucket=SCRIPTS_BUCKET,
-                            pdf_bytes=script_pack["pdf_bytes"],
-                            path=bucket_path,
-                            upsert=True
-                        )
-                        
-                        # Get URL for database record
-                        file_url = None
-                        if SIGN_URLS:
-                            file_url = client.create_signed_url(
-                                SCRIPTS_BUCKET, bucket_path, expires_in=SIGN_EXPIRES_SECONDS
+                        source_pdf_bytes = prefetched_pdfs.get(pdf_url.strip())
+                        streamed_audio = None
+                        if STREAM_SCRIPT_TO_TTS and GENERATE_TIMED_AUDIO and TimedSpeechGenerator:
+                            # Stream the script and synthesize each section as soon as it is written
+                            script_pack, streamed_audio = await asyncio.to_thread(
+                                _generate_script_with_streamed_audio,
+                                cp, TimedSpeechGenerator(), pdf_url, lesson_title, teacher_name,
+                                lesson_id, source_pdf_bytes, use_llm_cache, hours_until_class
                             )
                         else:
-                            file_url = client.get_public_url(SCRIPTS_BUCKET, bucket_path)
+                            # Generate script PDF (off the event loop)
+                            script_pack = await asyncio.to_thread(
+                                cp.generate_script_pdf_bytes,
+                                pdf_source_url=pdf_url,
+                                lesson_title=lesson_title,
+                                teacher_name=teacher_name,
+                                audience="middle school (ages 11-14)",
+                                language="English",
+                                source_pdf_bytes=source_pdf_bytes,
+                                use_cache=use_llm_cache,
+                                hours_until_class=hours_until_class,
+                                render_pdf=not LAZY_SCRIPT_PDF
+                            )
                         
-                        # Record in prepared_lessons table
-                        if file_url:
-                            client.record_prepared_lesson(lesson_id, file_url)
+                        file_url = _publish_script_pack(client, script_pack, teacher_id, course_id,
+                                                        lesson_id, target_date)
                         
                         result['successful_generations'] += 1
                         logger.info(f"Successfully generated script for lesson {lesson_id}")
                         
-                        # Generate audio if enabled
+                        # Generate audio if enabled (synthesis and encoding run off the event loop)
                         if file_url and GENERATE_TIMED_AUDIO and TimedSpeechGenerator:
-                            try:
-                                logger.info(f"Generating audio for lesson {lesson_id}")
-                                
-                                timed_speech_gen = TimedSpeechGenerator()
-                                audio_result = timed_speech_gen.generate_timed_lesson_audio(
-                                    teacher_id=teacher_id,
-                                    course_id=course_id,
-                                    lesson_id=lesson_id,
-                                    lesson_title=lesson_title,
-                                    script_url=file_url,
-                                    date=target_date,
-                                    voice="alloy"
-                                )
-                                
-                                if audio_result['success']:
-                                    result['successful_audio_generations'] += 1
-                                    logger.info(f"Successfully generated audio for lesson {lesson_id} ({audio_result.get('duration_minutes', 0)} min)")
-                                else:
-                                    result['failed_audio_generations'] += 1
-                                    result['errors'].append({
-                                        'lesson_id': lesson_id,
-                                        'type': 'audio_generation',
-                                        'error': audio_result.get('error', 'Unknown audio error')
-                                    })
-                                    logger.error(f"Failed to generate audio for lesson {lesson_id}: {audio_result.get('error')}")
-                                        
-                            except Exception as audio_error:
-                                result['failed_audio_generations'] += 1
-                                result['errors'].append({
-                                    'lesson_id': lesson_id,
-                                    'type': 'audio_generation',
-                                    'error': str(audio_error)
-                                })
-                                logger.error(f"Audio generation exception for lesson {lesson_id}: {audio_error}")
+                            await asyncio.to_thread(
+                                _run_audio_stage, result, teacher_id, course_id, lesson_id, lesson_title,
+                                file_url, target_date, streamed_audio=streamed_audio,
+                                script_text=script_pack['script_text'],
+                                tts_model=(script_pack['meta'].get('route') or {}).get('tts_model'),
+                                script_doc=script_pack.get('script_doc'),
+                                source=pdf_url
+                            )
                             
                     except Exception as pdf_error:
                         result['failed_generations'] += 1
@@ -323,9 +592,10 @@ async def process_course_for_automated_generation(course: dict, target_date: str
         logger.error(f"Course processing failed for course {course_id}: {course_error}")
         return result
 
-async def generate_lectures_for_date(target_date: str):
+async def generate_lectures_for_date(target_date: str, use_llm_cache: bool = True):
     """
-    Main function to generate lectures and audio for all courses on the target date
+    Main function to generate lectures and audio for all courses on the target date.
+    Pass use_llm_cache=False to force fresh scripts instead of reusing cached completions.
     """
     start_time = datetime.now()
     logger.info(f"Starting automated lecture generation for {target_date} at {start_time}")
@@ -338,17 +608,27 @@ async def generate_lectures_for_date(target_date: str):
             logger.info(f"No courses found for {target_date}")
             return
         
+        # Resolve and download every source PDF before the expensive stages start
+        lessons_by_course = await resolve_lessons_for_courses(courses)
+        prefetch_report = await prefetch_source_pdfs(lessons_by_course)
+        
         # Process each course
         total_successful = 0
         total_failed = 0
         total_lessons = 0
         total_successful_audio = 0
         total_failed_audio = 0
+        total_audio_bytes = 0
         all_errors = []
         skipped_courses = 0
         
         for course in courses:
-            result = await process_course_for_automated_generation(course, target_date)
+            result = await process_course_for_automated_generation(
+                course, target_date,
+                lessons_with_pdfs=lessons_by_course.get(course['id']),
+                prefetch_report=prefetch_report,
+                use_llm_cache=use_llm_cache
+            )
             
             if result.get('skipped_reason'):
                 skipped_courses += 1
@@ -360,6 +640,7 @@ async def generate_lectures_for_date(target_date: str):
             total_failed += result['failed_generations']
             total_successful_audio += result['successful_audio_generations']
             total_failed_audio += result['failed_audio_generations']
+            total_audio_bytes += result['audio_bytes']
             all_errors.extend(result['errors'])
         
         # Log summary
@@ -376,11 +657,19 @@ async def generate_lectures_for_date(target_date: str):
             'failed_script_generations': total_failed,
             'successful_audio_generations': total_successful_audio,
             'failed_audio_generations': total_failed_audio,
+            'audio_bytes': total_audio_bytes,
             'duration_seconds': duration,
+            'prefetch': {
+                'unique_pdfs': prefetch_report['unique'],
+                'downloaded': len(prefetch_report['pdfs']),
+                'failures': prefetch_report['failures']
+            },
+            'tts_cache': _tts_cache_stats(),
             'errors': all_errors
         }
         
         logger.info(f"Automated lecture generation for {target_date} completed: {summary}")
+        _release_prefetched_pdfs(prefetch_report)
         
         # Store the summary in database for tracking (optional)
         await store_generation_summary(summary)
@@ -388,6 +677,292 @@ async def generate_lectures_for_date(target_date: str):
     except Exception as e:
         logger.error(f"Automated lecture generation for {target_date} failed: {e}")
 
+def _date_range(start_date: str, end_date: str) -> List[str]:
+    """All dates from start_date to end_date inclusive, in YYYY-MM-DD format"""
+    start = datetime.strptime(start_date, '%Y-%m-%d').date()
+    end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    if end < start:
+        raise ValueError("end_date must not be before start_date")
+    return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days + 1)]
+
+def _valid_batch_id(batch_id: str) -> bool:
+    """Batch ids become directory names, so they must be plain path segments"""
+    return bool(_PATH_SEGMENT_RE.match(batch_id or ""))
+
+def _batch_dir(batch_id: str) -> str:
+    if not _valid_batch_id(batch_id):
+        raise ValueError(f"Invalid batch id: {batch_id!r}")
+    return os.path.join(BATCH_WORK_DIR, batch_id)
+
+def _claim_batch_collection(batch_id: str) -> bool:
+    """
+    Atomically mark a batch as being collected, by creating its lock file (so the
+    claim holds across workers); False if another collection holds it. Locks older
+    than BATCH_COLLECT_LOCK_TTL_SECONDS are left over from a crash and taken over.
+    """
+    path = os.path.join(_batch_dir(batch_id), 'collect.lock')
+    try:
+        if time.time() - os.path.getmtime(path) > BATCH_COLLECT_LOCK_TTL_SECONDS:
+            logger.warning(f"Taking over the stale collection lock of batch {batch_id}")
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(f"{os.getpid()} {datetime.utcnow().isoformat()}")
+    return True
+
+def _release_batch_collection(batch_id: str):
+    try:
+        os.remove(os.path.join(_batch_dir(batch_id), 'collect.lock'))
+    except FileNotFoundError:
+        pass
+
+def _save_batch_manifest(manifest: dict):
+    path = os.path.join(_batch_dir(manifest['batch_id']), 'manifest.json')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def _load_batch_manifest(batch_id: str) -> dict:
+    path = os.path.join(_batch_dir(batch_id), 'manifest.json')
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Unknown batch: {batch_id}")
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+async def submit_script_batch(start_date: str, end_date: str, use_llm_cache: bool = True) -> dict:
+    """
+    Collect the script prompts for every lesson in a date range into one Batch API
+    JSONL file and submit it. Scripts already in the LLM response cache are not
+    resubmitted. A manifest next to the batch file maps each request back to its
+    lesson so collect_script_batch can render and upload the results later.
+    """
+    if not ContentProcessor or not BatchClient:
+        raise Exception("Batch generation not available")
+    
+    cp = ContentProcessor()
+    jobs = {}
+    batch_requests = []
+    cached_scripts = {}
+    errors = []
+    
+    for target_date in _date_range(start_date, end_date):
+        courses = await get_courses_for_target_date(target_date)
+        if not courses:
+            continue
+        lessons_by_course = await resolve_lessons_for_courses(courses)
+        prefetch_report = await prefetch_source_pdfs(lessons_by_course)
+        prefetched_pdfs = prefetch_report.get('pdfs', {})
+        prefetch_failures = {f['pdf_url']: f['error'] for f in prefetch_report.get('failures', [])}
+        
+        for course in courses:
+            lessons = lessons_by_course.get(course['id']) or []
+            if not lessons:
+                continue
+            try:
+                client = SupabaseClient(teacher_id=course['teacher_id'])
+                teacher_name = client.get_teacher_info().get('name', 'Teacher')
+            except Exception as e:
+                errors.append({'course_id': course['id'], 'type': 'course_processing', 'error': str(e)})
+                continue
+            
+            for lesson in lessons:
+                lesson_title = lesson.get('title', f"Lesson {lesson['id']}")
+                for idx, pdf_url in enumerate(lesson.get('pdf_urls', []), start=1):
+                    custom_id = f"{target_date}:{course['id']}:{lesson['id']}:{idx}"
+                    try:
+                        if pdf_url.strip() in prefetch_failures:
+                            raise Exception(f"Failed to download PDF: {prefetch_failures[pdf_url.strip()]}")
+                        source = await asyncio.to_thread(
+                            cp.load_source_for_script, pdf_url, lesson_title,
+                            prefetched_pdfs.get(pdf_url.strip())
+                        )
+                        route = cp.route_script(source, "English", _hours_until_class(course, target_date),
+                                                job_id=custom_id)
+                        batch_request = cp.build_script_batch_request(
+                            custom_id, source["text"], lesson_title,
+                            audience="middle school (ages 11-14)",
+                            language="English",
+                            model=route.chat_model if route else None,
+                            max_tokens=route.chat_max_tokens if route else None
+                        )
+                    except Exception as e:
+                        errors.append({'lesson_id': lesson['id'], 'pdf_index': idx,
+                                       'type': 'script_generation', 'error': str(e)})
+                        logger.error(f"Could not prepare batch request for lesson {lesson['id']}, PDF {idx}: {e}")
+                        continue
+                    
+                    jobs[custom_id] = {
+                        'target_date': target_date,
+                        'teacher_id': course['teacher_id'],
+                        'course_id': course['id'],
+                        'lesson_id': lesson['id'],
+                        'lesson_title': lesson_title,
+                        'teacher_name': teacher_name,
+                        'pdf_url': pdf_url,
+                        'source': {'tokens': source['tokens'], 'boilerplate': source['boilerplate']},
+                        'route': route.as_dict() if route else None,
+                        'structured': cp.script_format == "json"
+                    }
+                    cached = cp.get_cached_batch_response(batch_request) if use_llm_cache else None
+                    if cached:
+                        cached_scripts[custom_id] = cached
+                    else:
+                        batch_requests.append(batch_request)
+        _release_prefetched_pdfs(prefetch_report)
+    
+    batch = None
+    if batch_requests:
+        batch = await asyncio.to_thread(
+            BatchClient().submit, batch_requests,
+            metadata={'start_date': start_date, 'end_date': end_date}
+        )
+    batch_id = batch['id'] if batch else f"cached_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+    
+    os.makedirs(_batch_dir(batch_id), exist_ok=True)
+    with open(os.path.join(_batch_dir(batch_id), 'input.jsonl'), 'w', encoding='utf-8') as f:
+        for batch_request in batch_requests:
+            f.write(json.dumps(batch_request, ensure_ascii=False) + '\n')
+    manifest = {
+        'batch_id': batch_id,
+        'submitted': batch is not None,
+        'start_date': start_date,
+        'end_date': end_date,
+        'submitted_at': datetime.utcnow().isoformat(),
+        'jobs': jobs,
+        'cached_scripts': cached_scripts,
+        'prepare_errors': errors,
+        'collected_at': None
+    }
+    _save_batch_manifest(manifest)
+    
+    logger.info(f"Batch {batch_id}: {len(batch_requests)} requests submitted, "
+                f"{len(cached_scripts)} served from cache, {len(errors)} failed to prepare")
+    return {
+        'batch_id': batch_id,
+        'status': batch['status'] if batch else 'completed',
+        'submitted_requests': len(batch_requests),
+        'cached_scripts': len(cached_scripts),
+        'errors': errors
+    }
+
+async def collect_script_batch(batch_id: str, wait: bool = False) -> dict:
+    """
+    Fetch the results of a submitted script batch and feed them through the same
+    render, upload and audio stages as interactive generation. With wait=True,
+    poll until the batch finishes; otherwise return the current status if it is
+    still running. Only one collection of a batch runs at a time (across workers);
+    a concurrent call returns status 'collecting'.
+    """
+    manifest = _load_batch_manifest(batch_id)
+    if manifest.get('collected_at'):
+        return {'batch_id': batch_id, 'status': 'collected', 'collected_at': manifest['collected_at']}
+    
+    batch = None
+    if manifest['submitted']:
+        batch_client = BatchClient()
+        if wait:
+            batch = await asyncio.to_thread(batch_client.wait, batch_id, BATCH_POLL_INTERVAL_SECONDS)
+        else:
+            batch = await asyncio.to_thread(batch_client.get_batch, batch_id)
+        if batch.get('status') not in TERMINAL_BATCH_STATUSES:
+            return {'batch_id': batch_id, 'status': batch.get('status'),
+                    'request_counts': batch.get('request_counts')}
+    
+    if not _claim_batch_collection(batch_id):
+        return {'batch_id': batch_id, 'status': 'collecting'}
+    try:
+        # Another collection may have finished between the first check and the claim
+        manifest = _load_batch_manifest(batch_id)
+        if manifest.get('collected_at'):
+            return {'batch_id': batch_id, 'status': 'collected', 'collected_at': manifest['collected_at']}
+        manifest['collection_started_at'] = datetime.utcnow().isoformat()
+        _save_batch_manifest(manifest)
+        return await _publish_batch_results(batch_id, manifest, batch)
+    finally:
+        _release_batch_collection(batch_id)
+
+async def _publish_batch_results(batch_id: str, manifest: dict, batch: Optional[dict]) -> dict:
+    """Render, upload and voice every lesson of a finished batch; the caller holds the collection claim"""
+    results = {custom_id: {'content': script} for custom_id, script in manifest['cached_scripts'].items()}
+    batch_requests = {}
+    if batch is not None:
+        results.update(await asyncio.to_thread(BatchClient().fetch_results, batch))
+        
+        with open(os.path.join(_batch_dir(batch_id), 'input.jsonl'), encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    batch_request = json.loads(line)
+                    batch_requests[batch_request['custom_id']] = batch_request
+    
+    cp = ContentProcessor()
+    result = {
+        'batch_id': batch_id,
+        'status': 'collected',
+        'lessons_processed': len(manifest['jobs']),
+        'successful_generations': 0,
+        'failed_generations': 0,
+        'successful_audio_generations': 0,
+        'failed_audio_generations': 0,
+        'audio_bytes': 0,
+        'errors': list(manifest['prepare_errors'])
+    }
+    
+    for custom_id, job in manifest['jobs'].items():
+        lesson_id = job['lesson_id']
+        try:
+            outcome = results.get(custom_id) or {'error': 'Missing from batch output'}
+            script_text = outcome.get('content')
+            if not script_text:
+                raise Exception(outcome.get('error') or "OpenAI returned an empty script")
+            script_doc = None
+            if job.get('structured'):
+                script_doc = cp.parse_script_document(script_text, job['lesson_title'])
+            if custom_id in batch_requests:
+                # Keep the result, so an interactive re-run of the same lesson reuses it
+                cp.cache_batch_response(batch_requests[custom_id], script_text)
+            if script_doc:
+                script_text = cp.render_script_document(script_doc)
+            
+            script_pack = await asyncio.to_thread(
+                cp.build_script_pack, script_text, job['lesson_title'], job['teacher_name'],
+                job['pdf_url'], job['source'], None, script_doc, not LAZY_SCRIPT_PDF
+            )
+            script_pack['meta']['route'] = job.get('route')
+            client = SupabaseClient(teacher_id=job['teacher_id'])
+            file_url = _publish_script_pack(client, script_pack, job['teacher_id'], job['course_id'],
+                                            lesson_id, job['target_date'])
+            result['successful_generations'] += 1
+            logger.info(f"Published batch script for lesson {lesson_id} ({job['target_date']})")
+            
+            if file_url and GENERATE_TIMED_AUDIO and TimedSpeechGenerator:
+                await asyncio.to_thread(
+                    _run_audio_stage, result, job['teacher_id'], job['course_id'], lesson_id,
+                    job['lesson_title'], file_url, job['target_date'],
+                    script_text=script_text,
+                    tts_model=(job.get('route') or {}).get('tts_model'),
+                    script_doc=script_doc, source=job['pdf_url']
+                )
+        except Exception as e:
+            result['failed_generations'] += 1
+            result['errors'].append({'lesson_id': lesson_id, 'type': 'script_generation', 'error': str(e)})
+            logger.error(f"Batch result for lesson {lesson_id} failed: {e}")
+    
+    manifest['collected_at'] = datetime.utcnow().isoformat()
+    _save_batch_manifest(manifest)
+    await store_generation_summary(result)
+    return result
+
+def _tts_cache_stats() -> Optional[dict]:
+    """Process-wide TTS chunk cache metrics (cumulative since startup)"""
+    tts_cache = get_tts_cache() if get_tts_cache else None
+    return tts_cache.stats() if tts_cache else None
+
 async def store_generation_summary(summary: dict):
     """Store the generation summary in database for tracking purposes"""
     try:
@@ -416,10 +991,11 @@ async def scheduled_daily_lecture_generation():
 # API ENDPOINTS
 
 @app.post("/lectures/generate-for-date")
-async def generate_lectures_for_specific_date(target_date: str = Query(...)):
+async def generate_lectures_for_specific_date(target_date: str = Query(...),
+                                              fresh: bool = Query(False, description="Skip the LLM response cache")):
     """Manually trigger lecture generation for a specific date"""
     try:
-        await generate_lectures_for_date(target_date)
+        await generate_lectures_for_date(target_date, use_llm_cache=not fresh)
         return {"message": f"Lecture generation completed for {target_date}"}
     except Exception as e:
         logger.error(f"Manual lecture generation failed for {target_date}: {e}")
@@ -447,6 +1023,102 @@ async def generate_lectures_tomorrow():
         logger.error(f"Manual lecture generation failed for tomorrow: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/lectures/batch/submit")
+async def submit_lecture_batch(start_date: str = Query(...), end_date: str = Query(...),
+                               fresh: bool = Query(False, description="Skip the LLM response cache")):
+    """Submit script generation for a date range as an offline batch (cheaper, not interactive)"""
+    try:
+        return await submit_script_batch(start_date, end_date, use_llm_cache=not fresh)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Batches waited for in the background (wait=True), so a repeated request doesn't start a second waiter;
+# collect_script_batch's lock keeps the actual collection to one run across workers and modes
+_collecting_batches = set()
+
+async def _collect_script_batch_job(batch_id: str):
+    """Background job: wait for the batch to finish, then collect it"""
+    try:
+        result = await collect_script_batch(batch_id, wait=True)
+        logger.info(f"Background collection of batch {batch_id} finished: {result.get('status', 'collected')}")
+    except Exception as e:
+        logger.error(f"Background collection of batch {batch_id} failed: {e}")
+    finally:
+        _collecting_batches.discard(batch_id)
+
+@app.post("/lectures/batch/{batch_id}/collect")
+async def collect_lecture_batch(batch_id: str, background_tasks: BackgroundTasks, wait: bool = Query(False)):
+    """
+    Render, upload and voice the scripts of a finished batch. With wait=true the
+    batch (which can take up to 24 h) is waited for and collected in the
+    background, and the request returns immediately.
+    """
+    if not _valid_batch_id(batch_id):
+        raise HTTPException(status_code=400, detail="Invalid batch id")
+    try:
+        if wait:
+            _load_batch_manifest(batch_id)  # 404 for unknown batches before scheduling anything
+            if batch_id not in _collecting_batches:
+                _collecting_batches.add(batch_id)
+                background_tasks.add_task(_collect_script_batch_job, batch_id)
+            return {'batch_id': batch_id, 'status': 'collecting_in_background'}
+        return await collect_script_batch(batch_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/lectures/script-pdf/{teacher_id}/{course_id}/{date}/{lesson_id}")
+async def get_script_pdf(teacher_id: str, course_id: str, date: str, lesson_id: str,
+                         expires: int = Query(...), token: str = Query(...)):
+    """
+    Serve a lesson's script PDF, rendering it from the stored script record on the
+    first request and caching it in the scripts bucket for every later one.
+    Requires the expiring token issued with the URL; storage is not touched otherwise.
+    """
+    if not _valid_script_path(teacher_id, course_id, lesson_id, date):
+        raise HTTPException(status_code=400, detail="Invalid script path")
+    if not _verify_script_pdf_token(teacher_id, course_id, lesson_id, date, expires, token):
+        raise HTTPException(status_code=403, detail="Invalid or expired link")
+    try:
+        client = SupabaseClient(teacher_id=teacher_id)
+        pdf_path = _build_bucket_path(teacher_id, course_id, lesson_id, date, ext="pdf")
+        
+        # Already rendered: send the client straight to storage, for no longer than the link is valid
+        signed_seconds = max(1, min(SIGN_EXPIRES_SECONDS, expires - int(time.time())))
+        existing_url = await asyncio.to_thread(
+            client.create_signed_url, SCRIPTS_BUCKET, pdf_path, signed_seconds
+        )
+        if existing_url:
+            if not SIGN_URLS:
+                existing_url = client.get_public_url(SCRIPTS_BUCKET, pdf_path) or existing_url
+            return RedirectResponse(existing_url, status_code=307)
+        
+        record_bytes = await asyncio.to_thread(
+            client.download_from_bucket, SCRIPTS_BUCKET,
+            _build_bucket_path(teacher_id, course_id, lesson_id, date, ext="json")
+        )
+        if not record_bytes:
+            raise HTTPException(status_code=404, detail="Script not found")
+        if not ContentProcessor:
+            raise HTTPException(status_code=500, detail="ContentProcessor not available")
+        
+        record = json.loads(record_bytes)
+        pdf_bytes = await asyncio.to_thread(ContentProcessor.render_script_pdf, record)
+        await asyncio.to_thread(
+            client.upload_pdf_to_bucket, bucket=SCRIPTS_BUCKET, pdf_bytes=pdf_bytes, path=pdf_path, upsert=True
+        )
+        logger.info(f"Rendered script PDF on demand for lesson {lesson_id} ({len(pdf_bytes)} bytes)")
+        return Response(content=pdf_bytes, media_type="application/pdf",
+                        headers={"Content-Disposition": f'inline; filename="{lesson_id}_script.pdf"'})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Script PDF request failed for lesson {lesson_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/lectures/preview-date")
 async def preview_courses_for_date(target_date: str = Query(...)):
     """Preview what courses will be processed for a specific date"""
@@ -507,6 +1179,27 @@ async def get_scheduler_status():
         }
     }
 
+@app.get("/debug/tts-cache")
+async def get_tts_cache_status():
+    """Debug endpoint for TTS chunk cache hit rate and size"""
+    return {"enabled": _tts_cache_stats() is not None, "stats": _tts_cache_stats()}
+
+@app.post("/maintenance/prune-caches")
+async def prune_cache_namespaces():
+    """Delete cache entries written under older cache versions (PDF text, TTS chunks, section audio)"""
+    pruners = {"pdf_text": prune_text_cache, "tts_chunks": prune_tts_cache,
+               "lesson_sections": prune_section_audio_cache}
+    removed = {}
+    for name, prune in pruners.items():
+        if prune is None:
+            continue
+        try:
+            removed[name] = await asyncio.to_thread(prune)
+        except Exception as e:
+            logger.error(f"Pruning the {name} cache failed: {e}")
+            removed[name] = None
+    return {"namespaces_removed": removed}
+
 # App lifecycle events
 @app.on_event("startup")
 async def start_scheduler():
@@ -522,6 +1215,8 @@ async def shutdown_scheduler():
     """Gracefully shutdown the scheduler when the app stops"""
     scheduler.shutdown()
     logger.info("APScheduler shutdown complete")
+    if shutdown_cpu_pool:
+        shutdown_cpu_pool()
 
 @app.get("/zoom/join", response_class=HTMLResponse)
 async def zoom_join_page(
@@ -0,0 +1,176 @@
+import os
+import logging
+from dataclasses import dataclass
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import soundfile as sf
+from scipy import signal
+
+try:
+    from src.core.audio_buffer import PcmSegment
+except Exception:
+    from audio_buffer import PcmSegment
+
+logger = logging.getLogger(__name__)
+
+# Block dtypes the assembler can stream in
+BLOCK_DTYPES = ("float32", "int16")
+
+
+@dataclass(frozen=True)
+class Gap:
+    """Silence on the lesson timeline; emitted as zero blocks at mix time, never stored."""
+    seconds: float
+
+
+def _to_mono(block: np.ndarray) -> np.ndarray:
+    if block.ndim == 1:
+        return block
+    if block.dtype == np.int16:
+        return block.mean(axis=1).astype(np.int16)
+    return block.mean(axis=1, dtype=block.dtype)
+
+
+class _Resampler:
+    """
+    Streaming linear-interpolation resampler for one part. Interpolation phase and
+    filter state carry across blocks, so block boundaries are seamless; when
+    downsampling, a low-pass filter runs first to keep aliasing out of the band.
+    """
+
+    def __init__(self, from_rate: int, to_rate: int):
+        self.step = from_rate / to_rate
+        self.position = 0.0
+        self.tail = np.zeros(0, dtype=np.float32)
+        self.sos = signal.butter(8, 0.45 * to_rate, fs=from_rate, output="sos") if to_rate < from_rate else None
+        self.zi = np.zeros((self.sos.shape[0], 2)) if self.sos is not None else None
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if self.sos is not None:
+            block, self.zi = signal.sosfilt(self.sos, block, zi=self.zi)
+        samples = np.concatenate([self.tail, block])
+        last = len(samples) - 1
+        if last < self.position:
+            self.tail = samples
+            return np.zeros(0, dtype=np.float32)
+        count = int((last - self.position) // self.step) + 1
+        positions = self.position + self.step * np.arange(count)
+        resampled = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+        self.position += self.step * count - last
+        self.tail = samples[-1:]
+        return resampled
+
+
+class StreamingAssembler:
+    """
+    Writes lesson audio parts one after another to a single open SoundFile,
+    a block at a time, so peak memory is one block regardless of lecture length.
+
+    Every block is downmixed to mono and checked against the output sample rate
+    (mismatched parts are resampled) before it is written. Blocks are float32 or
+    int16 (AUDIO_BLOCK_DTYPE); block size is AUDIO_BLOCK_FRAMES frames. format,
+    subtype, compression_level and bitrate_mode are passed to the SoundFile.
+
+        with StreamingAssembler(path, 24000) as assembler:
+            assembler.write_file("intro.mp3")
+            assembler.write_samples(pcm)
+            assembler.write(Gap(30))
+    """
+
+    def __init__(self, output_path: str, sample_rate: int, block_frames: Optional[int] = None,
+                 dtype: Optional[str] = None, subtype: Optional[str] = None, format: Optional[str] = None,
+                 compression_level: Optional[float] = None, bitrate_mode: Optional[str] = None):
+        self.output_path = output_path
+        self.sample_rate = sample_rate
+        self.block_frames = block_frames or int(os.getenv("AUDIO_BLOCK_FRAMES", "65536"))
+        self.dtype = dtype or os.getenv("AUDIO_BLOCK_DTYPE", "float32")
+        if self.dtype not in BLOCK_DTYPES:
+            raise ValueError(f"Unsupported block dtype '{self.dtype}', expected one of {BLOCK_DTYPES}")
+        self.frames_written = 0
+        self._zero_block = None
+        self._file = sf.SoundFile(output_path, "w", samplerate=sample_rate, channels=1,
+                                  subtype=subtype, format=format,
+                                  compression_level=compression_level, bitrate_mode=bitrate_mode)
+
+    def __enter__(self) -> "StreamingAssembler":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    @property
+    def duration(self) -> float:
+        return self.frames_written / self.sample_rate
+
+    def _resampler(self, sample_rate: int) -> Optional[_Resampler]:
+        return _Resampler(sample_rate, self.sample_rate) if sample_rate != self.sample_rate else None
+
+    def _write_block(self, block: np.ndarray, resampler: Optional[_Resampler]) -> int:
+        block = _to_mono(block)
+        if resampler is not None:
+            if block.dtype == np.int16:
+                block = block.astype(np.float32) / np.float32(32768)
+            block = resampler.process(block.astype(np.float32, copy=False))
+        if block.dtype != self.dtype:
+            if self.dtype == "int16":
+                block = (np.clip(block, -1.0, 1.0) * 32767).astype(np.int16)
+            else:
+                block = block.astype(np.float32) / (32768.0 if block.dtype == np.int16 else 1.0)
+        self._file.write(block)
+        self.frames_written += len(block)
+        return len(block)
+
+    def write_samples(self, samples: np.ndarray, sample_rate: Optional[int] = None) -> int:
+        """Append PCM (in memory or memory-mapped) block by block; returns frames written."""
+        sample_rate = sample_rate or self.sample_rate
+        if sample_rate != self.sample_rate:
+            logger.info(f"Resampling part from {sample_rate} Hz to {self.sample_rate} Hz")
+        resampler = self._resampler(sample_rate)
+        written = 0
+        for start in range(0, len(samples), self.block_frames):
+            written += self._write_block(np.asarray(samples[start:start + self.block_frames]), resampler)
+        return written
+
+    def write_file(self, path: str) -> int:
+        """Decode an audio file block by block and append it; returns frames written."""
+        sample_rate = sf.info(path).samplerate
+        if sample_rate != self.sample_rate:
+            logger.info(f"Resampling {path} from {sample_rate} Hz to {self.sample_rate} Hz")
+        resampler = self._resampler(sample_rate)
+        written = 0
+        for block in sf.blocks(path, blocksize=self.block_frames, dtype=self.dtype, always_2d=True):
+            written += self._write_block(block, resampler)
+        return written
+
+    def write_silence(self, seconds: float) -> int:
+        """Append silence by re-writing one shared zero block; returns frames written."""
+        remaining = int(round(seconds * self.sample_rate))
+        if remaining <= 0:
+            return 0
+        if self._zero_block is None:
+            self._zero_block = np.zeros(self.block_frames, dtype=self.dtype)
+        written = remaining
+        while remaining > 0:
+            frames = min(remaining, self.block_frames)
+            self._file.write(self._zero_block[:frames])
+            remaining -= frames
+        self.frames_written += written
+        return written
+
+    def write(self, entry: Union[Gap, PcmSegment, np.ndarray, str]) -> int:
+        """Append one timeline entry: a Gap, a PcmSegment, PCM samples or an audio file path."""
+        if isinstance(entry, Gap):
+            return self.write_silence(entry.seconds)
+        if isinstance(entry, PcmSegment):
+            return self.write_samples(entry.read(), entry.sample_rate)
+        if isinstance(entry, str):
+            return self.write_file(entry)
+        return self.write_samples(entry)
+
+    def write_timeline(self, entries: Iterable[Union[Gap, PcmSegment, np.ndarray, str]]) -> int:
+        return sum(self.write(entry) for entry in entries)
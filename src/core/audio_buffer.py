@@ -0,0 +1,113 @@
+import io
+import os
+import logging
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+logger = logging.getLogger(__name__)
+
+# Working format for lesson audio: mono float32 PCM
+PCM_DTYPE = np.float32
+
+
+def decode_audio(data: bytes, audio_format: Optional[str] = None,
+                 raw_sample_rate: int = 24000) -> Tuple[np.ndarray, int]:
+    """
+    Decode audio bytes straight from memory to mono float32 PCM. Container formats
+    (mp3, wav, flac, ...) are detected from the data; audio_format="pcm" means
+    headerless 16-bit little-endian mono at raw_sample_rate (OpenAI TTS: 24 kHz).
+    """
+    if audio_format == "pcm":
+        raw = np.frombuffer(data, dtype="<i2", count=len(data) // 2)
+        return raw.astype(PCM_DTYPE) / np.float32(32768), raw_sample_rate
+    samples, sample_rate = sf.read(io.BytesIO(data), dtype="float32")
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1, dtype=PCM_DTYPE)
+    return samples, sample_rate
+
+
+def encode_audio(samples: np.ndarray, sample_rate: int, output_path: str) -> None:
+    """Encode PCM once to the final file; the codec follows the file extension."""
+    sf.write(output_path, samples, sample_rate)
+
+
+class PcmSegment:
+    """Decoded audio for one section, held in memory or spilled to a raw float32 file."""
+
+    __slots__ = ("samples", "path", "frames", "sample_rate")
+
+    def __init__(self, sample_rate: int, frames: int,
+                 samples: Optional[np.ndarray] = None, path: Optional[str] = None):
+        self.sample_rate = sample_rate
+        self.frames = frames
+        self.samples = samples
+        self.path = path
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate if self.sample_rate else 0.0
+
+    @property
+    def spilled(self) -> bool:
+        return self.samples is None
+
+    def read(self) -> np.ndarray:
+        """The samples (a read-only memory map for spilled segments)."""
+        if self.samples is not None:
+            return self.samples
+        if not self.frames:
+            return np.zeros(0, dtype=PCM_DTYPE)
+        return np.memmap(self.path, dtype=PCM_DTYPE, mode="r", shape=(self.frames,))
+
+
+class PcmBuffer:
+    """
+    Decoded PCM for one lesson. Segments stay in memory until the lesson holds
+    more than limit_bytes (AUDIO_MEMORY_LIMIT_MB, default 512); later segments
+    are spilled to raw files in spill_dir and memory-mapped when read.
+    """
+
+    def __init__(self, spill_dir: Path, limit_bytes: Optional[int] = None):
+        self.spill_dir = Path(spill_dir)
+        self.limit_bytes = (limit_bytes if limit_bytes is not None
+                            else int(os.getenv("AUDIO_MEMORY_LIMIT_MB", "512")) * 1024 * 1024)
+        self.memory_bytes = 0
+        self.spilled_bytes = 0
+        self.segments: List[PcmSegment] = []
+        self._lock = threading.Lock()
+
+    def add(self, samples: np.ndarray, sample_rate: int) -> PcmSegment:
+        samples = np.ascontiguousarray(samples, dtype=PCM_DTYPE)
+        with self._lock:
+            spill = self.memory_bytes + samples.nbytes > self.limit_bytes
+            if not spill:
+                self.memory_bytes += samples.nbytes
+            index = len(self.segments)
+            segment = PcmSegment(sample_rate, len(samples))
+            self.segments.append(segment)
+        if spill:
+            segment.path = str(self.spill_dir / f"segment_{index:03d}.f32")
+            samples.tofile(segment.path)
+            with self._lock:
+                self.spilled_bytes += samples.nbytes
+            logger.info(f"Spilled {samples.nbytes / 1024 / 1024:.1f} MB of PCM to {segment.path}")
+        else:
+            segment.samples = samples
+        return segment
+
+    def release(self) -> None:
+        """Drop in-memory samples and delete spill files."""
+        with self._lock:
+            for segment in self.segments:
+                segment.samples = None
+                if segment.path:
+                    try:
+                        os.remove(segment.path)
+                    except OSError:
+                        pass
+            self.segments = []
+            self.memory_bytes = 0
@@ -0,0 +1,127 @@
+import os
+import io
+import json
+import time
+import logging
+from typing import Dict, List, Optional
+
+import requests
+
+# Batch statuses after which a batch will not change any more
+TERMINAL_BATCH_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def build_chat_batch_request(custom_id: str, model: str, system_prompt: str, user_prompt: str,
+                             max_tokens: int, temperature: float) -> dict:
+    """One line of a Batch API input file for a chat completion."""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": model,
+            "messages": [{"role": "system", "content": system_prompt},
+                         {"role": "user", "content": user_prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        },
+    }
+
+
+def to_jsonl(batch_requests: List[dict]) -> bytes:
+    return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in batch_requests).encode("utf-8")
+
+
+def parse_batch_output(output_jsonl: str) -> Dict[str, dict]:
+    """
+    Map custom_id -> {"content": str} or {"error": str} from a batch output
+    (or error) file.
+    """
+    results = {}
+    for line in output_jsonl.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        custom_id = record.get("custom_id")
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        if record.get("error"):
+            results[custom_id] = {"error": str(record["error"].get("message", record["error"]))}
+        elif response.get("status_code", 200) != 200:
+            error = body.get("error") or {}
+            results[custom_id] = {"error": error.get("message") or f"HTTP {response.get('status_code')}"}
+        else:
+            choices = body.get("choices") or []
+            content = choices[0]["message"]["content"] if choices else ""
+            results[custom_id] = {"content": content or ""}
+    return results
+
+
+class BatchClient:
+    """
+    Minimal client for the OpenAI Batch API (files + batches endpoints).
+
+    The base URL comes from OPENAI_BATCH_BASE_URL so the local stand-in
+    server (local_batch_server.py) can be used in tests.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 timeout: float = 60.0):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = (base_url or os.getenv("OPENAI_BATCH_BASE_URL", "https://api.openai.com/v1")).rstrip("/")
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {self.api_key}"
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        resp = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+        if resp.status_code >= 400:
+            raise RuntimeError(f"Batch API {method} {path} failed ({resp.status_code}): {resp.text[:500]}")
+        return resp
+
+    def upload_file(self, jsonl_bytes: bytes, filename: str = "batch.jsonl") -> str:
+        resp = self._request("POST", "/files", data={"purpose": "batch"},
+                             files={"file": (filename, io.BytesIO(jsonl_bytes), "application/jsonl")})
+        return resp.json()["id"]
+
+    def create_batch(self, input_file_id: str, endpoint: str = "/v1/chat/completions",
+                     completion_window: str = "24h", metadata: Optional[dict] = None) -> dict:
+        payload = {"input_file_id": input_file_id, "endpoint": endpoint,
+                   "completion_window": completion_window}
+        if metadata:
+            payload["metadata"] = metadata
+        return self._request("POST", "/batches", json=payload).json()
+
+    def submit(self, batch_requests: List[dict], metadata: Optional[dict] = None) -> dict:
+        """Upload the requests as a JSONL file and start a batch over it."""
+        file_id = self.upload_file(to_jsonl(batch_requests))
+        batch = self.create_batch(file_id, metadata=metadata)
+        self.logger.info(f"Submitted batch {batch['id']} with {len(batch_requests)} requests")
+        return batch
+
+    def get_batch(self, batch_id: str) -> dict:
+        return self._request("GET", f"/batches/{batch_id}").json()
+
+    def download_file(self, file_id: str) -> str:
+        return self._request("GET", f"/files/{file_id}/content").text
+
+    def wait(self, batch_id: str, poll_interval: float = 30.0, timeout: Optional[float] = None) -> dict:
+        """Poll until the batch reaches a terminal status (or timeout seconds pass)."""
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            batch = self.get_batch(batch_id)
+            if batch.get("status") in TERMINAL_BATCH_STATUSES:
+                return batch
+            if deadline and time.monotonic() + poll_interval > deadline:
+                return batch
+            time.sleep(poll_interval)
+
+    def fetch_results(self, batch: dict) -> Dict[str, dict]:
+        """Results of a finished batch, including per-request errors."""
+        results = {}
+        if batch.get("output_file_id"):
+            results.update(parse_batch_output(self.download_file(batch["output_file_id"])))
+        if batch.get("error_file_id"):
+            results.update(parse_batch_output(self.download_file(batch["error_file_id"])))
+        return results
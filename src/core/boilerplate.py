@@ -0,0 +1,100 @@
+import re
+import zlib
+import logging
+from collections import Counter
+from typing import Dict, List, Tuple
+
+try:
+    from src.core.tokens import count_tokens
+except Exception:
+    from tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+_DIGITS_RE = re.compile(r"\d+")
+_SPACE_RE = re.compile(r"\s+")
+_PAGE_MARKER_RE = re.compile(r"^-{2,}\s*page\s+\d+\s*-{2,}$", re.IGNORECASE)
+_PAGE_NUMBER_RE = re.compile(r"^(page\s*)?\d{1,4}(\s*(of|/)\s*\d{1,4})?$|^[ivxlcdm]{1,6}$", re.IGNORECASE)
+_COPYRIGHT_RE = re.compile(r"(©|\(c\)\s*\d{4}|copyright\s*(©|\(c\)|\d{4})|all rights reserved)", re.IGNORECASE)
+_URL_ONLY_RE = re.compile(r"^(https?://|www\.)\S+$", re.IGNORECASE)
+
+
+def _line_fingerprint(line: str) -> int:
+    """Hash a line with digits and spacing normalised, so 'Chapter 3 | 14' matches 'Chapter 3 | 15'."""
+    normalised = _SPACE_RE.sub(" ", _DIGITS_RE.sub("#", line.strip().lower()))
+    return zlib.crc32(normalised.encode("utf-8"))
+
+
+# Running headers/footers are short; longer lines are always treated as content
+MAX_HEADER_CHARS = 120
+# Copyright notices are only dropped from lines this short (a notice, not a sentence about copyright)
+MAX_COPYRIGHT_CHARS = 80
+
+
+def _is_noise_line(line: str) -> bool:
+    """Never content, wherever it appears: page markers and URL-only lines."""
+    stripped = line.strip()
+    return bool(_PAGE_MARKER_RE.match(stripped) or _URL_ONLY_RE.match(stripped))
+
+
+def _is_edge_noise_line(line: str) -> bool:
+    """Noise only in header/footer position: page numbers and short copyright notices."""
+    stripped = line.strip()
+    return bool(
+        _PAGE_NUMBER_RE.match(stripped)
+        or (_COPYRIGHT_RE.search(stripped) and len(stripped) <= MAX_COPYRIGHT_CHARS)
+    )
+
+
+def _edge_indexes(lines: List[str], edge_lines: int) -> List[int]:
+    """Indexes of the first and last edge_lines short non-empty lines, where headers and footers live."""
+    non_empty = [i for i, l in enumerate(lines) if l.strip() and len(l.strip()) <= MAX_HEADER_CHARS]
+    return sorted(set(non_empty[:edge_lines] + non_empty[-edge_lines:]))
+
+
+def strip_boilerplate(pages: List[Tuple[int, str]], min_page_fraction: float = 0.5,
+                      min_pages: int = 3, edge_lines: int = 2) -> Tuple[List[Tuple[int, str]], Dict]:
+    """
+    Remove running headers/footers and other non-content lines from extracted pages.
+
+    A line near the top or bottom of a page (within edge_lines) is treated as a
+    running header/footer when its normalised hash appears in that position on
+    at least min_page_fraction of the pages (and on at least min_pages pages).
+    Bare page numbers and short copyright notices are dropped in the same header
+    and footer positions; page markers and URL-only lines are dropped everywhere. Returns the cleaned pages and a stats dict with the
+    characters and tokens saved.
+    """
+    page_lines = [(page_num, page_text.splitlines()) for page_num, page_text in pages]
+
+    page_edges = [_edge_indexes(lines, edge_lines) for _, lines in page_lines]
+    page_frequency = Counter()
+    for (_, lines), edges in zip(page_lines, page_edges):
+        page_frequency.update({_line_fingerprint(lines[i]) for i in edges})
+    threshold = max(min_pages, int(len(page_lines) * min_page_fraction + 0.5))
+    repeated = {h for h, n in page_frequency.items() if n >= threshold}
+
+    cleaned_pages = []
+    removed_lines = 0
+    for (page_num, lines), edges in zip(page_lines, page_edges):
+        edge_set = set(edges)
+        kept = []
+        for i, line in enumerate(lines):
+            if line.strip() and (_is_noise_line(line) or
+                                 (i in edge_set and (_is_edge_noise_line(line)
+                                                     or _line_fingerprint(line) in repeated))):
+                removed_lines += 1
+                continue
+            kept.append(line)
+        page_text = "\n".join(kept).strip()
+        if page_text:
+            cleaned_pages.append((page_num, page_text))
+
+    original_text = "\n".join(text for _, text in pages)
+    cleaned_text = "\n".join(text for _, text in cleaned_pages)
+    stats = {
+        "lines_removed": removed_lines,
+        "repeated_line_patterns": len(repeated),
+        "chars_saved": len(original_text) - len(cleaned_text),
+        "tokens_saved": count_tokens(original_text) - count_tokens(cleaned_text),
+    }
+    return cleaned_pages, stats
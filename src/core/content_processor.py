@@ -1,9 +1,11 @@
 import PyPDF2
 import io
+import json
 import requests
-from openai import OpenAI
+import asyncio
+from openai import OpenAI, AsyncOpenAI
 import os
-from typing import Optional
+from typing import Optional, List, Tuple, Iterator
 import logging
 from pathlib import Path
 from datetime import datetime
@@ -12,17 +14,150 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
 from textwrap import wrap
 
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    from src.core.disk_cache import DiskCache
+    from src.core.cpu_pool import get_cpu_pool, get_cpu_pool_size, reset_cpu_pool
+    from src.core.tokens import count_tokens, truncate_to_tokens
+    from src.core.content_selector import select_salient_content
+    from src.core.boilerplate import strip_boilerplate
+    from src.core.llm_cache import LLMResponseCache
+    from src.core.rate_limit import get_rate_limiter, get_async_semaphore
+    from src.core.source_summarizer import SourceSummarizer
+    from src.core.batch_client import build_chat_batch_request
+    from src.core.model_router import ModelRouter, RouteDecision, get_spend_ledger
+    from src.core.script_parser import SECTION_HEADER_LABELS, ScriptDocument, parse_script, section_header
+except Exception:
+    from disk_cache import DiskCache
+    from cpu_pool import get_cpu_pool, get_cpu_pool_size, reset_cpu_pool
+    from tokens import count_tokens, truncate_to_tokens
+    from content_selector import select_salient_content
+    from boilerplate import strip_boilerplate
+    from llm_cache import LLMResponseCache
+    from rate_limit import get_rate_limiter, get_async_semaphore
+    from source_summarizer import SourceSummarizer
+    from batch_client import build_chat_batch_request
+    from model_router import ModelRouter, RouteDecision, get_spend_ledger
+    from script_parser import SECTION_HEADER_LABELS, ScriptDocument, parse_script, section_header
+
+# Bump whenever page extraction changes so cached text is not reused
+EXTRACTOR_VERSION = "1"
+TEXT_CACHE_NAMESPACE_PREFIX = "pypdf2-"
+
+# Lecture structure used by the sectioned generation mode (SECTION_HEADER_LABELS,
+# shared with the script parser, maps section type -> header label)
+DEFAULT_OUTLINE = [
+    {"type": "hook", "title": "Opening Hook", "minutes": 4, "key_points": []},
+    {"type": "objectives", "title": "Learning Objectives", "minutes": 2, "key_points": []},
+    {"type": "content", "title": "Core Concepts", "minutes": 9, "key_points": []},
+    {"type": "content", "title": "Going Deeper", "minutes": 9, "key_points": []},
+    {"type": "content", "title": "Real-World Connections", "minutes": 8, "key_points": []},
+    {"type": "practice", "title": "Practice", "minutes": 6, "key_points": []},
+    {"type": "recap", "title": "Recap & Takeaways", "minutes": 4, "key_points": []},
+]
+SPOKEN_WORDS_PER_MINUTE = 130
+
+# Structured (JSON) scripts: one object per section, with the words to speak kept
+# apart from the teacher-only notes so the speech stage needs no parsing
+STRUCTURED_SCRIPT_FORMAT = """
+                OUTPUT FORMAT (this replaces the FORMAT section above):
+                Respond with ONLY a JSON object of the form
+                {"title": "...", "sections": [{"type": "hook|objectives|content|practice|recap",
+                  "title": "...", "start_minute": <integer>, "minutes": <integer>,
+                  "speech": "...", "notes": ["...", "..."]}]}
+                - One hook, one objectives, 3-4 content, one practice and one recap section, in that order.
+                - "speech" is exactly what the teacher says aloud: full sentences, including check-in
+                  questions and pause moments. No headers, timing markers, brackets or bullet symbols.
+                - "notes" holds everything that is not spoken: teaching tips, visuals to show,
+                  discussion questions, extension activities and misconceptions to watch for.
+                """
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+# Bump when the stored script record (script_record) changes shape
+SCRIPT_RECORD_VERSION = 1
+
+# Script completion settings when no model route is given
+DEFAULT_SCRIPT_MODEL = "gpt-3.5-turbo"
+DEFAULT_SCRIPT_MAX_TOKENS = 3000
+# JSON scripts repeat the lecture's words in "speech" plus notes and JSON syntax, so
+# their completion is sized from the duration, up to the model's output limit
+STRUCTURED_SCRIPT_TOKENS_PER_WORD = 1.6
+STRUCTURED_SCRIPT_MAX_TOKENS = int(os.getenv("STRUCTURED_SCRIPT_MAX_TOKENS", "4096"))
+
+
+def _extract_reader_pages(pdf_reader, start: int, stop: int) -> List[Tuple[int, Optional[str], Optional[str]]]:
+    """
+    Extract pages [start, stop) from an open reader.
+    Returns (page_number, text, error) per page so failures stay isolated to their page.
+    """
+    results = []
+    for page_index in range(start, stop):
+        try:
+            results.append((page_index + 1, pdf_reader.pages[page_index].extract_text(), None))
+        except Exception as e:
+            results.append((page_index + 1, None, str(e)))
+    return results
+
+
+def _extract_page_range(pdf_bytes: bytes, start: int, stop: int) -> List[Tuple[int, Optional[str], Optional[str]]]:
+    """Process-pool entry point: parse the document and extract pages [start, stop)."""
+    return _extract_reader_pages(PyPDF2.PdfReader(io.BytesIO(pdf_bytes)), start, stop)
+
+def open_text_cache() -> DiskCache:
+    """Extracted PDF text cache (TEXT_CACHE_DIR), namespaced by PyPDF2 and extractor version."""
+    return DiskCache(
+        os.getenv("TEXT_CACHE_DIR", "temp/cache/pdf_text"),
+        namespace=f"{TEXT_CACHE_NAMESPACE_PREFIX}{PyPDF2.__version__}-v{EXTRACTOR_VERSION}",
+        max_bytes=int(os.getenv("TEXT_CACHE_MAX_MB", "512")) * 1024 * 1024,
+    )
+
+
+def prune_text_cache() -> int:
+    """Maintenance: delete text cached by older PyPDF2 or extractor versions."""
+    return open_text_cache().prune_namespaces(TEXT_CACHE_NAMESPACE_PREFIX)
+
+
 class ContentProcessor:
     def __init__(self):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key or api_key == "your_openai_api_key":
             raise ValueError("Please set your OPENAI_API_KEY in .env file")
         self.openai_client = OpenAI(api_key=api_key)
+        self._api_key = api_key
+        self._async_openai_client = None
+        self.llm_timeout_seconds = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "120"))
         self.logger = logging.getLogger(__name__)
         
         self.scripts_dir = Path("temp/scripts")
         self.scripts_dir.mkdir(parents=True, exist_ok=True)
 
+        # Extracted text cache, keyed by SHA-256 of the PDF bytes + extractor version
+        self.text_cache = open_text_cache()
+
+        # Documents with at least this many pages are extracted in the shared CPU pool
+        self.parallel_extraction_min_pages = int(os.getenv("PARALLEL_EXTRACTION_MIN_PAGES", "40"))
+
+        # How much source text (in prompt tokens) the script prompt uses, and how it is chosen:
+        # "salient" picks the most relevant paragraphs, "head" keeps the start of the document,
+        # "summarize" map-reduces documents larger than the budget into a dense brief
+        self.source_token_budget = int(os.getenv("SCRIPT_SOURCE_TOKEN_BUDGET", "2000"))
+        self.source_selection = os.getenv("SCRIPT_SOURCE_SELECTION", "salient").lower()
+        self._summarizer = None
+
+        # "single" = one full-script completion, "sectioned" = outline + concurrent per-section calls
+        self.script_mode = os.getenv("SCRIPT_GENERATION_MODE", "single").lower()
+        # "json" = structured sections (title, timing, speech, notes), "text" = free-form script
+        self.script_format = os.getenv("SCRIPT_OUTPUT_FORMAT", "json").lower()
+
+        # Chat completion cache so re-running a date doesn't pay for identical prompts again
+        self.llm_cache = LLMResponseCache() if os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true" else None
+
+        # Per-job chat/TTS model choice by source size, language, deadline and daily budget
+        # Off by default, so upgrading doesn't change the chat and TTS models a deployment uses
+        self.model_router = ModelRouter() if os.getenv("MODEL_ROUTING_ENABLED", "false").lower() == "true" else None
+
     def is_valid_pdf_url(self, pdf_url: str) -> bool:
         """Check if URL is a valid direct PDF URL"""
         if not pdf_url or pdf_url == 'NULL':
@@ -63,38 +198,252 @@ class ContentProcessor:
             self.logger.error(f"Error downloading PDF: {e}")
             raise Exception(f"Failed to download PDF: {str(e)}")
 
+    @property
+    def async_openai_client(self) -> AsyncOpenAI:
+        """AsyncOpenAI client, created on first use by the async code paths."""
+        if self._async_openai_client is None:
+            self._async_openai_client = AsyncOpenAI(api_key=self._api_key)
+        return self._async_openai_client
+
+    @property
+    def summarizer(self) -> SourceSummarizer:
+        if self._summarizer is None:
+            self._summarizer = SourceSummarizer(self._chat_completion)
+        return self._summarizer
+
+    def invalidate_text_cache(self) -> None:
+        """Drop all cached extracted text (e.g. after changing extraction settings)."""
+        self.text_cache.clear()
+
+    def extract_pages_from_pdf(self, pdf_bytes: bytes) -> Tuple[List[Tuple[int, str]], int]:
+        """
+        Extract (page_number, text) for every page that has text, plus the total page count.
+        Results are cached by document hash, so identical PDFs are parsed only once.
+        """
+        cache_key = DiskCache.make_key(pdf_bytes)
+        cached = self.text_cache.get(cache_key)
+        if cached is not None:
+            try:
+                payload = json.loads(cached)
+                # Entries written by iter_pdf_pages may cover only the first parsed_pages pages
+                if payload.get("parsed_pages", payload["page_count"]) >= payload["page_count"]:
+                    self.logger.info(f"Using cached PDF text for document {cache_key[:12]}")
+                    return [(num, text) for num, text in payload["pages"]], payload["page_count"]
+            except Exception as e:
+                self.logger.warning(f"Ignoring unreadable text cache entry {cache_key[:12]}: {e}")
+
+        pdf_file = io.BytesIO(pdf_bytes)
+        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        page_count = len(pdf_reader.pages)
+
+        page_results = None
+        if page_count >= self.parallel_extraction_min_pages and get_cpu_pool_size() > 1:
+            page_results = self._extract_pages_in_pool(pdf_bytes, page_count)
+        if page_results is None:
+            page_results = _extract_reader_pages(pdf_reader, 0, page_count)
+
+        pages = []
+        for page_num, page_text, error in page_results:
+            if error:
+                self.logger.warning(f"Could not extract text from page {page_num}: {error}")
+            elif page_text:
+                pages.append((page_num, page_text))
+
+        if pages:
+            payload = {"page_count": page_count, "pages": pages}
+            self.text_cache.set(cache_key, json.dumps(payload).encode("utf-8"))
+        return pages, page_count
+
+    def _extract_pages_in_pool(self, pdf_bytes: bytes, page_count: int) -> Optional[list]:
+        """Split the document into page ranges, extract them in the CPU pool and rejoin in page order."""
+        workers = get_cpu_pool_size()
+        range_size = max(10, -(-page_count // workers))
+        ranges = [(start, min(start + range_size, page_count)) for start in range(0, page_count, range_size)]
+        try:
+            pool = get_cpu_pool()
+            futures = [pool.submit(_extract_page_range, pdf_bytes, start, stop) for start, stop in ranges]
+            results = []
+            for future in futures:
+                results.extend(future.result())
+            self.logger.info(f"Extracted {page_count} pages in {len(ranges)} parallel ranges")
+            return results
+        except BrokenProcessPool as e:
+            self.logger.warning(f"CPU pool broke during extraction, falling back to serial: {e}")
+            reset_cpu_pool()
+        except Exception as e:
+            self.logger.warning(f"Parallel extraction failed, falling back to serial: {e}")
+        return None
+
+    def iter_pdf_pages(self, pdf_bytes: bytes) -> Iterator[Tuple[int, str]]:
+        """
+        Lazily yield (page_number, text) for pages with text.
+        Pages are only parsed as the caller consumes them. Cached pages are served
+        from the text cache, and when the caller stops (or the document ends) the
+        pages parsed so far are written back, so the next run only parses pages
+        beyond them.
+        """
+        cache_key = DiskCache.make_key(pdf_bytes)
+        pages: List[Tuple[int, str]] = []
+        parsed_pages = 0
+        complete = False
+        cached = self.text_cache.get(cache_key)
+        if cached is not None:
+            try:
+                payload = json.loads(cached)
+                pages = [(num, text) for num, text in payload["pages"]]
+                parsed_pages = payload.get("parsed_pages", payload["page_count"])
+                complete = parsed_pages >= payload["page_count"]
+            except Exception as e:
+                self.logger.warning(f"Ignoring unreadable text cache entry: {e}")
+                pages, parsed_pages = [], 0
+        yield from list(pages)
+        if complete:
+            return
+
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+        page_count = len(pdf_reader.pages)
+        cached_pages = parsed_pages
+        try:
+            for page_index in range(parsed_pages, page_count):
+                for page_num, page_text, error in _extract_reader_pages(pdf_reader, page_index, page_index + 1):
+                    if error:
+                        self.logger.warning(f"Could not extract text from page {page_num}: {error}")
+                    elif page_text:
+                        pages.append((page_num, page_text))
+                        parsed_pages = page_index + 1
+                        yield page_num, page_text
+                parsed_pages = page_index + 1
+        finally:
+            if parsed_pages > cached_pages and pages:
+                payload = {"page_count": page_count, "pages": pages, "parsed_pages": parsed_pages}
+                self.text_cache.set(cache_key, json.dumps(payload).encode("utf-8"))
+
+    def prepare_source(self, pdf_bytes: bytes, lesson_title: str) -> dict:
+        """
+        Extract the source PDF and reduce it to the text that goes into the script prompt:
+        strip running headers/footers and page noise, then keep the salient paragraphs
+        (or the start of the document in "head" mode) within source_token_budget.
+        """
+        try:
+            if self.source_selection == "head":
+                # Only the start of the document is used, so stop parsing once the budget
+                # (plus headroom for the boilerplate that gets stripped) is covered
+                pages, page_tokens = [], 0
+                for page in self.iter_pdf_pages(pdf_bytes):
+                    pages.append(page)
+                    page_tokens += count_tokens(page[1])
+                    if page_tokens >= self.source_token_budget * 1.25:
+                        break
+            else:
+                pages, _ = self.extract_pages_from_pdf(pdf_bytes)
+
+            pages, boilerplate_stats = strip_boilerplate(pages)
+            self.logger.info(f"Boilerplate removal saved {boilerplate_stats['chars_saved']} characters / "
+                             f"{boilerplate_stats['tokens_saved']} tokens "
+                             f"({boilerplate_stats['lines_removed']} lines)")
+
+            full_text = "\n\n".join(t for _, t in pages)
+            if self.source_selection == "head":
+                text = truncate_to_tokens(full_text, self.source_token_budget)
+                selection = {"text": text, "units_total": len(pages), "units_selected": len(pages),
+                             "tokens": count_tokens(text)}
+            elif self.source_selection == "summarize" and count_tokens(full_text) <= self.source_token_budget:
+                selection = {"text": full_text, "units_total": len(pages), "units_selected": len(pages),
+                             "tokens": count_tokens(full_text)}
+            elif self.source_selection != "summarize":
+                selection = select_salient_content(pages, lesson_title, self.source_token_budget)
+            else:
+                selection = None
+        except Exception as e:
+            self.logger.error(f"Error extracting PDF text: {e}")
+            raise Exception(f"Failed to extract PDF text: {str(e)}")
+
+        if selection is None:
+            # Source is far larger than the budget: map-reduce it into a brief
+            brief = self.summarizer.summarize(pages, lesson_title, self.source_token_budget)
+            selection = {"text": brief["text"], "units_total": brief["chunks"],
+                         "units_selected": brief["chunks"], "tokens": brief["tokens"]}
+
+        if not selection["text"].strip():
+            raise Exception("Failed to extract PDF text: No text could be extracted from PDF")
+        self.logger.info(f"Prepared {selection['tokens']} prompt tokens "
+                         f"({selection['units_selected']}/{selection['units_total']} units, {self.source_selection})")
+        return {"text": selection["text"], "tokens": selection["tokens"],
+                "selection": self.source_selection, "boilerplate": boilerplate_stats}
+
     def extract_text_from_pdf(self, pdf_bytes: bytes) -> str:
         """Extract text from PDF bytes"""
         try:
-            pdf_file = io.BytesIO(pdf_bytes)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page_num, page in enumerate(pdf_reader.pages):
-                try:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
-                except Exception as e:
-                    self.logger.warning(f"Could not extract text from page {page_num + 1}: {e}")
+            pages, page_count = self.extract_pages_from_pdf(pdf_bytes)
+            text = "".join(f"\n--- Page {page_num} ---\n{page_text}\n" for page_num, page_text in pages)
             
             if not text.strip():
                 raise ValueError("No text could be extracted from PDF")
             
-            self.logger.info(f"Extracted {len(text)} characters from {len(pdf_reader.pages)} pages")
+            self.logger.info(f"Extracted {len(text)} characters from {page_count} pages")
             return text.strip()
             
         except Exception as e:
             self.logger.error(f"Error extracting PDF text: {e}")
             raise Exception(f"Failed to extract PDF text: {str(e)}")
 
-    def create_student_friendly_script(self, source_text: str, lesson_title: str,
-                                       audience: str = "middle school (ages 11–14)",
-                                       language: str = "English",
-                                       duration_minutes: tuple[int, int] = (35, 40)) -> str:
-        if not os.getenv("OPENAI_API_KEY"):
-            raise ValueError('OpenAI API key not provided')
+    @staticmethod
+    def _completion_cache_key(model: str, system_prompt: str, user_prompt: str, temperature: float,
+                              max_tokens: int, response_format: Optional[dict] = None) -> str:
+        extra = {"response_format": response_format} if response_format else {}
+        return LLMResponseCache.make_key(model, system_prompt, user_prompt, temperature, max_tokens, **extra)
+
+    def _chat_completion(self, system_prompt: str, user_prompt: str, model: str = "gpt-3.5-turbo",
+                         max_tokens: int = 3000, temperature: float = 0.7,
+                         use_cache: bool = True, response_format: Optional[dict] = None,
+                         cache_response: bool = True) -> str:
+        """
+        Run a chat completion, consulting the response cache unless use_cache is False.
+        Fresh responses are stored even then, unless cache_response is False (for
+        callers that keep results in a cache of their own).
+        """
+        return self._chat_completion_result(system_prompt, user_prompt, model, max_tokens, temperature,
+                                            use_cache, response_format, cache_response)[0]
 
+    def _chat_completion_result(self, system_prompt: str, user_prompt: str, model: str = "gpt-3.5-turbo",
+                                max_tokens: int = 3000, temperature: float = 0.7,
+                                use_cache: bool = True, response_format: Optional[dict] = None,
+                                cache_response: bool = True) -> Tuple[str, Optional[str]]:
+        """_chat_completion that also returns the finish reason ("length" when cut off at max_tokens)."""
+        cache_key = None
+        if use_cache and self.llm_cache:
+            cache_key = self._completion_cache_key(model, system_prompt, user_prompt, temperature,
+                                                   max_tokens, response_format)
+            cached = self.llm_cache.get(cache_key)
+            if cached:
+                self.logger.info(f"Using cached {model} response ({len(cached)} characters)")
+                return cached, "stop"
+
+        with get_rate_limiter("openai").slot():
+            resp = self.openai_client.chat.completions.create(
+                model=model,
+                messages=[{"role": "system", "content": system_prompt},
+                          {"role": "user", "content": user_prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **({"response_format": response_format} if response_format else {}),
+            )
+        content = resp.choices[0].message.content if resp.choices else ""
+        finish_reason = resp.choices[0].finish_reason if resp.choices else None
+        if resp.usage:
+            get_spend_ledger().record_chat(model, resp.usage.prompt_tokens, resp.usage.completion_tokens)
+
+        # A JSON response cut off at max_tokens is never valid, so it is not worth keeping
+        truncated_json = response_format is not None and finish_reason == "length"
+        if content and self.llm_cache and cache_response and not truncated_json:
+            # Fresh responses are still stored, so later cached runs can reuse them
+            self.llm_cache.set(cache_key or self._completion_cache_key(
+                model, system_prompt, user_prompt, temperature, max_tokens, response_format), model, content)
+        return content or "", finish_reason
+
+    def _build_script_prompts(self, source_text: str, lesson_title: str, audience: str,
+                              language: str, duration_minutes: tuple[int, int]) -> Tuple[str, str]:
+        """Return the (system_prompt, user_prompt) pair for a lecture script."""
         lo, hi = duration_minutes
         system_prompt = system_prompt = f"""
                 You are an expert teacher. Create a highly detailed, engaging 40-minute lecture script for {audience} students.
@@ -134,21 +483,470 @@ class ContentProcessor:
 
                 IMPORTANT: Every script MUST include all 5 section headers with their exact timing markers as shown above.
                 """
-        user_prompt = f'Lesson Title: "{lesson_title}"\n\nBase the script on this content (reorganize/simplify as needed):\n\n{source_text[:8000]}'
-
-        resp = self.openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "system", "content": system_prompt},
-                      {"role": "user", "content": user_prompt}],
-            max_tokens=3000,
-            temperature=0.7,
-        )
-        script = resp.choices[0].message.content if resp.choices else ""
+        source_text = truncate_to_tokens(source_text, self.source_token_budget)
+        user_prompt = f'Lesson Title: "{lesson_title}"\n\nBase the script on this content (reorganize/simplify as needed):\n\n{source_text}'
+        return system_prompt, user_prompt
+
+    async def _achat_completion(self, system_prompt: str, user_prompt: str, model: str = "gpt-3.5-turbo",
+                                max_tokens: int = 3000, temperature: float = 0.7,
+                                use_cache: bool = True, timeout: Optional[float] = None,
+                                response_format: Optional[dict] = None) -> str:
+        """
+        Async counterpart of _chat_completion on AsyncOpenAI. Requests are bounded by the
+        shared async semaphore and by a timeout; cancelling the awaiting task cancels
+        the in-flight request.
+        """
+        cache_key = self._completion_cache_key(model, system_prompt, user_prompt, temperature,
+                                               max_tokens, response_format)
+        if use_cache and self.llm_cache:
+            cached = self.llm_cache.get(cache_key)
+            if cached:
+                self.logger.info(f"Using cached {model} response ({len(cached)} characters)")
+                return cached
+
+        async with get_async_semaphore("openai"):
+            resp = await asyncio.wait_for(
+                self.async_openai_client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "system", "content": system_prompt},
+                              {"role": "user", "content": user_prompt}],
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    **({"response_format": response_format} if response_format else {}),
+                ),
+                timeout=timeout or self.llm_timeout_seconds,
+            )
+        content = resp.choices[0].message.content if resp.choices else ""
+        if resp.usage:
+            get_spend_ledger().record_chat(model, resp.usage.prompt_tokens, resp.usage.completion_tokens)
+
+        if content and self.llm_cache:
+            self.llm_cache.set(cache_key, model, content)
+        return content or ""
+
+    def create_student_friendly_script(self, source_text: str, lesson_title: str,
+                                       audience: str = "middle school (ages 11–14)",
+                                       language: str = "English",
+                                       duration_minutes: tuple[int, int] = (35, 40),
+                                       use_cache: bool = True,
+                                       model: Optional[str] = None,
+                                       max_tokens: Optional[int] = None) -> str:
+        if not os.getenv("OPENAI_API_KEY"):
+            raise ValueError('OpenAI API key not provided')
+
+        system_prompt, user_prompt = self._build_script_prompts(
+            source_text, lesson_title, audience, language, duration_minutes)
+
+        script = self._chat_completion(system_prompt, user_prompt, model=model or DEFAULT_SCRIPT_MODEL,
+                                       max_tokens=max_tokens or DEFAULT_SCRIPT_MAX_TOKENS,
+                                       temperature=0.7, use_cache=use_cache)
+        if not script:
+            raise ValueError("OpenAI returned an empty script")
+        return script
+
+    def create_structured_script(self, source_text: str, lesson_title: str,
+                                 audience: str = "middle school (ages 11–14)",
+                                 language: str = "English",
+                                 duration_minutes: tuple[int, int] = (35, 40),
+                                 use_cache: bool = True,
+                                 model: Optional[str] = None,
+                                 max_tokens: Optional[int] = None) -> dict:
+        """
+        Same lecture as create_student_friendly_script, requested in JSON mode as a
+        script document: {"title", "sections": [{type, title, start_minute, minutes,
+        speech, notes}]}. See parse_script_document for the guarantees.
+
+        The completion is sized from the lecture duration. A response cut off at
+        max_tokens keeps its complete sections if only the end of the recap was lost;
+        otherwise, and when JSON mode fails twice, the free-text script is generated
+        and parsed into a document instead.
+        """
+        if not os.getenv("OPENAI_API_KEY"):
+            raise ValueError('OpenAI API key not provided')
+
+        system_prompt, user_prompt = self._build_script_prompts(
+            source_text, lesson_title, audience, language, duration_minutes)
+        system_prompt += STRUCTURED_SCRIPT_FORMAT
+        max_tokens = max(max_tokens or 0, self.structured_script_max_tokens(duration_minutes))
+
+        for attempt_use_cache in (use_cache, False):
+            raw, finish_reason = self._chat_completion_result(
+                system_prompt, user_prompt, model=model or DEFAULT_SCRIPT_MODEL, max_tokens=max_tokens,
+                temperature=0.7, use_cache=attempt_use_cache, response_format=JSON_RESPONSE_FORMAT)
+            if finish_reason == "length":
+                script_doc = self._truncated_script_document(raw, lesson_title)
+                if script_doc is not None:
+                    return script_doc
+                self.logger.warning(f"Structured script for '{lesson_title}' was cut off at {max_tokens} tokens")
+                break
+            try:
+                return self.parse_script_document(raw, lesson_title)
+            except ValueError as e:
+                # A malformed response: ask once more, bypassing the cache
+                self.logger.warning(f"Invalid structured script for '{lesson_title}': {e}")
+
+        self.logger.warning(f"Falling back to a free-text script for '{lesson_title}'")
+        script_text = self.create_student_friendly_script(
+            source_text, lesson_title, audience=audience, language=language, duration_minutes=duration_minutes,
+            use_cache=use_cache, model=model)
+        return self.parse_script_document(parse_script(script_text, lesson_title).to_document(), lesson_title)
+
+    @staticmethod
+    def structured_script_max_tokens(duration_minutes: tuple[int, int]) -> int:
+        """Completion budget for a JSON script of the given duration, capped at STRUCTURED_SCRIPT_MAX_TOKENS."""
+        words = duration_minutes[1] * SPOKEN_WORDS_PER_MINUTE
+        return min(STRUCTURED_SCRIPT_MAX_TOKENS,
+                   max(DEFAULT_SCRIPT_MAX_TOKENS, int(words * STRUCTURED_SCRIPT_TOKENS_PER_WORD) + 500))
+
+    def _truncated_script_document(self, raw: str, lesson_title: str) -> Optional[dict]:
+        """
+        Script document from the complete sections of a JSON script that was cut off,
+        or None unless they run through the recap (only the tail was lost).
+        """
+        sections = []
+        start = raw.find('"sections"')
+        start = raw.find("[", start) if start >= 0 else -1
+        if start >= 0:
+            decoder = json.JSONDecoder()
+            position = start + 1
+            while True:
+                while position < len(raw) and raw[position] in ", \t\r\n":
+                    position += 1
+                try:
+                    section, position = decoder.raw_decode(raw, position)
+                except ValueError:
+                    break
+                sections.append(section)
+        try:
+            script_doc = self.parse_script_document({"title": lesson_title, "sections": sections}, lesson_title)
+        except ValueError:
+            return None
+        if script_doc["sections"][-1]["type"] != "recap":
+            return None
+        self.logger.warning(f"Structured script for '{lesson_title}' was cut off; "
+                            f"keeping its {len(script_doc['sections'])} complete sections")
+        return script_doc
+
+    @staticmethod
+    def parse_script_document(raw: str, lesson_title: str = "") -> dict:
+        """
+        Validate and normalise a JSON script document. Every section ends up with a
+        known type, a title, integer start_minute/minutes (start minutes are filled in
+        cumulatively when missing), non-empty speech and a list of notes.
+        Raises ValueError when there is nothing speakable.
+        """
+        try:
+            payload = json.loads(raw) if isinstance(raw, str) else raw
+            raw_sections = payload["sections"]
+        except (ValueError, TypeError, KeyError) as e:
+            raise ValueError(f"not a script document: {e}")
+
+        sections = []
+        elapsed = 0
+        for raw_section in raw_sections:
+            if not isinstance(raw_section, dict):
+                continue
+            speech = str(raw_section.get("speech") or "").strip()
+            if not speech:
+                continue
+            section_type = str(raw_section.get("type", "content")).lower()
+            section_type = section_type if section_type in SECTION_HEADER_LABELS else "content"
+            try:
+                minutes = max(1, int(raw_section.get("minutes") or 0))
+            except (TypeError, ValueError):
+                minutes = max(1, round(len(speech.split()) / SPOKEN_WORDS_PER_MINUTE))
+            try:
+                start_minute = int(raw_section["start_minute"])
+            except (KeyError, TypeError, ValueError):
+                start_minute = elapsed
+            notes = raw_section.get("notes") or []
+            if isinstance(notes, str):
+                notes = [notes]
+            sections.append({
+                "type": section_type,
+                "title": str(raw_section.get("title") or SECTION_HEADER_LABELS[section_type]).strip(),
+                "start_minute": start_minute,
+                "minutes": minutes,
+                "speech": speech,
+                "notes": [str(note).strip() for note in notes if str(note).strip()],
+            })
+            elapsed = start_minute + minutes
+
+        if not sections:
+            raise ValueError("script document has no speakable sections")
+        return {"title": str(payload.get("title") or lesson_title).strip(), "sections": sections}
+
+    @staticmethod
+    def render_script_document(script_doc: dict) -> str:
+        """Readable script text (for the PDF) from a script document."""
+        return ScriptDocument.from_document(script_doc).render_text()
+
+    async def acreate_student_friendly_script(self, source_text: str, lesson_title: str,
+                                              audience: str = "middle school (ages 11–14)",
+                                              language: str = "English",
+                                              duration_minutes: tuple[int, int] = (35, 40),
+                                              use_cache: bool = True,
+                                              timeout: Optional[float] = None,
+                                              model: Optional[str] = None,
+                                              max_tokens: Optional[int] = None) -> str:
+        """Async version of create_student_friendly_script built on AsyncOpenAI."""
+        if not os.getenv("OPENAI_API_KEY"):
+            raise ValueError('OpenAI API key not provided')
+
+        system_prompt, user_prompt = self._build_script_prompts(
+            source_text, lesson_title, audience, language, duration_minutes)
+        script = await self._achat_completion(system_prompt, user_prompt, model=model or DEFAULT_SCRIPT_MODEL,
+                                              max_tokens=max_tokens or DEFAULT_SCRIPT_MAX_TOKENS,
+                                              temperature=0.7,
+                                              use_cache=use_cache, timeout=timeout)
         if not script:
             raise ValueError("OpenAI returned an empty script")
         return script
 
-    def _render_text_to_pdf(self, title: str, subtitle_lines: list[str], body: str,
+    def build_script_batch_request(self, custom_id: str, source_text: str, lesson_title: str,
+                                   audience: str = "middle school (ages 11–14)",
+                                   language: str = "English",
+                                   duration_minutes: tuple[int, int] = (35, 40),
+                                   model: Optional[str] = None,
+                                   max_tokens: Optional[int] = None) -> dict:
+        """
+        Batch API request line for the same completion create_student_friendly_script
+        makes, so batch results land in (and are served from) the same response cache.
+        """
+        system_prompt, user_prompt = self._build_script_prompts(
+            source_text, lesson_title, audience, language, duration_minutes)
+        if self.script_format == "json":
+            system_prompt += STRUCTURED_SCRIPT_FORMAT
+        batch_request = build_chat_batch_request(custom_id, model or DEFAULT_SCRIPT_MODEL, system_prompt, user_prompt,
+                                                 max_tokens=max_tokens or DEFAULT_SCRIPT_MAX_TOKENS, temperature=0.7)
+        if self.script_format == "json":
+            batch_request["body"]["response_format"] = JSON_RESPONSE_FORMAT
+        return batch_request
+
+    def _batch_request_cache_key(self, batch_request: dict) -> str:
+        body = batch_request["body"]
+        system_prompt, user_prompt = (m["content"] for m in body["messages"])
+        return self._completion_cache_key(body["model"], system_prompt, user_prompt, body["temperature"],
+                                          body["max_tokens"], body.get("response_format"))
+
+    def get_cached_batch_response(self, batch_request: dict) -> Optional[str]:
+        if not self.llm_cache:
+            return None
+        return self.llm_cache.get(self._batch_request_cache_key(batch_request))
+
+    def cache_batch_response(self, batch_request: dict, content: str) -> None:
+        if content and self.llm_cache:
+            self.llm_cache.set(self._batch_request_cache_key(batch_request),
+                               batch_request["body"]["model"], content)
+
+    def stream_student_friendly_script(self, source_text: str, lesson_title: str,
+                                       audience: str = "middle school (ages 11–14)",
+                                       language: str = "English",
+                                       duration_minutes: tuple[int, int] = (35, 40),
+                                       use_cache: bool = True,
+                                       model: Optional[str] = None,
+                                       max_tokens: Optional[int] = None) -> Iterator[str]:
+        """
+        Same script as create_student_friendly_script, yielded as text deltas while
+        the completion streams in, so downstream stages (TTS) can start early.
+        """
+        if not os.getenv("OPENAI_API_KEY"):
+            raise ValueError('OpenAI API key not provided')
+
+        system_prompt, user_prompt = self._build_script_prompts(
+            source_text, lesson_title, audience, language, duration_minutes)
+        model, max_tokens, temperature = model or DEFAULT_SCRIPT_MODEL, max_tokens or DEFAULT_SCRIPT_MAX_TOKENS, 0.7
+
+        cache_key = LLMResponseCache.make_key(model, system_prompt, user_prompt, temperature, max_tokens)
+        if use_cache and self.llm_cache:
+            cached = self.llm_cache.get(cache_key)
+            if cached:
+                self.logger.info(f"Using cached {model} response ({len(cached)} characters)")
+                yield cached
+                return
+
+        parts = []
+        # The request is in flight until the stream is fully read, so hold the slot until then
+        with get_rate_limiter("openai").slot():
+            stream = self.openai_client.chat.completions.create(
+                model=model,
+                messages=[{"role": "system", "content": system_prompt},
+                          {"role": "user", "content": user_prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+            )
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+
+        script = "".join(parts)
+        if not script:
+            raise ValueError("OpenAI returned an empty script")
+        # Streamed responses carry no usage block; count the tokens ourselves
+        get_spend_ledger().record_chat(model, count_tokens(system_prompt) + count_tokens(user_prompt),
+                                       count_tokens(script))
+        if self.llm_cache:
+            self.llm_cache.set(cache_key, model, script)
+
+    def _create_outline(self, source_text: str, lesson_title: str, audience: str, language: str,
+                        duration_minutes: tuple[int, int], use_cache: bool) -> List[dict]:
+        """Ask for a short JSON lecture outline; falls back to DEFAULT_OUTLINE if it can't be parsed."""
+        lo, hi = duration_minutes
+        system_prompt = f"""
+                You are an expert teacher planning a {lo}-{hi} minute lecture for {audience} students, in {language}.
+                Return ONLY a JSON object of the form:
+                {{"sections": [{{"type": "hook|objectives|content|practice|recap", "title": "...",
+                  "minutes": <integer>, "key_points": ["...", "..."]}}]}}
+                Use exactly one hook, one objectives, 3-4 content, one practice and one recap section, in that order.
+                Minutes must add up to between {lo} and {hi}.
+                """
+        user_prompt = f'Lesson Title: "{lesson_title}"\n\nSource content:\n\n{source_text}'
+        raw = self._chat_completion(system_prompt, user_prompt, max_tokens=700, temperature=0.3,
+                                    use_cache=use_cache)
+        try:
+            payload = json.loads(raw[raw.index("{"):raw.rindex("}") + 1])
+            outline = []
+            for section in payload["sections"]:
+                section_type = str(section.get("type", "content")).lower()
+                outline.append({
+                    "type": section_type if section_type in SECTION_HEADER_LABELS else "content",
+                    "title": str(section.get("title") or SECTION_HEADER_LABELS.get(section_type, "Section")).strip(),
+                    "minutes": max(1, int(section.get("minutes") or 5)),
+                    "key_points": [str(p) for p in section.get("key_points", [])][:8],
+                })
+            if len(outline) < 3:
+                raise ValueError("outline too short")
+        except Exception as e:
+            self.logger.warning(f"Could not parse lecture outline, using default structure: {e}")
+            outline = [dict(section) for section in DEFAULT_OUTLINE]
+
+        # Scale section lengths so the lecture lands inside the requested duration
+        total = sum(section["minutes"] for section in outline)
+        target = (lo + hi) / 2
+        if not lo <= total <= hi:
+            for section in outline:
+                section["minutes"] = max(1, round(section["minutes"] * target / total))
+        return outline
+
+    @staticmethod
+    def _section_header(section: dict, start_minute: int) -> str:
+        return section_header(section["type"], section["title"], section["minutes"], start_minute)
+
+    def create_sectioned_script(self, source_text: str, lesson_title: str,
+                                audience: str = "middle school (ages 11–14)",
+                                language: str = "English",
+                                duration_minutes: tuple[int, int] = (35, 40),
+                                use_cache: bool = True,
+                                model: Optional[str] = None,
+                                max_tokens: Optional[int] = None) -> str:
+        """
+        Generate the lecture as a short outline followed by one concurrent completion
+        per section (all sharing the outline as context), stitched together with
+        consistent cumulative timing markers.
+        """
+        sections = self._write_outlined_sections(source_text, lesson_title, audience, language,
+                                                 duration_minutes, use_cache, model, structured=False)
+        parts = [f"# {lesson_title}"]
+        for section in sections:
+            parts.append(f"{self._section_header(section, section['start_minute'])}\n\n{section['body']}")
+        script = "\n\n".join(parts)
+        self.logger.info(f"Generated sectioned script: {len(sections)} sections, {len(script)} characters")
+        return script
+
+    def create_sectioned_script_document(self, source_text: str, lesson_title: str,
+                                         audience: str = "middle school (ages 11–14)",
+                                         language: str = "English",
+                                         duration_minutes: tuple[int, int] = (35, 40),
+                                         use_cache: bool = True,
+                                         model: Optional[str] = None,
+                                         max_tokens: Optional[int] = None) -> dict:
+        """Sectioned generation returning a script document (see create_structured_script)."""
+        sections = self._write_outlined_sections(source_text, lesson_title, audience, language,
+                                                 duration_minutes, use_cache, model, structured=True)
+        return self.parse_script_document({"title": lesson_title, "sections": sections}, lesson_title)
+
+    def _write_outlined_sections(self, source_text: str, lesson_title: str, audience: str, language: str,
+                                 duration_minutes: tuple[int, int], use_cache: bool,
+                                 model: Optional[str], structured: bool) -> List[dict]:
+        """
+        Outline the lecture, then write every section concurrently. Returns the outline
+        sections with start_minute and either 'body' (free text) or, when structured,
+        'speech' and 'notes'.
+        """
+        if not os.getenv("OPENAI_API_KEY"):
+            raise ValueError('OpenAI API key not provided')
+
+        source_text = truncate_to_tokens(source_text, self.source_token_budget)
+        outline = self._create_outline(source_text, lesson_title, audience, language, duration_minutes, use_cache)
+
+        start_minutes = []
+        elapsed = 0
+        for section in outline:
+            start_minutes.append(elapsed)
+            elapsed += section["minutes"]
+        outline_text = "\n".join(
+            f"{i + 1}. [{start}:00] {SECTION_HEADER_LABELS[s['type']]} - {s['title']} ({s['minutes']} min): "
+            + "; ".join(s["key_points"])
+            for i, (s, start) in enumerate(zip(outline, start_minutes))
+        )
+
+        def write_section(index: int) -> dict:
+            section = outline[index]
+            if structured:
+                output_format = """
+                Respond with ONLY a JSON object {"speech": "...", "notes": ["...", "..."]}.
+                "speech" is exactly what the teacher says aloud (no headers, timing markers or brackets);
+                "notes" holds teaching tips, visuals, discussion questions and anything else not spoken.
+                """
+            else:
+                output_format = f""" The section starts at [{start_minutes[index]}:00];
+                add timing markers like [{start_minutes[index] + 1}:30] as time passes, relative to the start of the lecture.
+                Include speaker notes in [brackets], check-in questions and examples where they fit.
+                """
+            system_prompt = f"""
+                You are an expert teacher writing one part of a {elapsed}-minute lecture script for {audience} students.
+                Must be in {language}. Keep the tone warm, clear, and conversational. Avoid jargon unless you define it.
+                Write ONLY the section you are given - no title line, no other sections, no closing remarks for the lecture
+                unless this is the recap. It must fill about {section['minutes']} minutes of speech
+                (about {section['minutes'] * SPOKEN_WORDS_PER_MINUTE} words).""" + output_format
+            user_prompt = (f'Lesson Title: "{lesson_title}"\n\nFull lecture outline:\n{outline_text}\n\n'
+                           f'Write section {index + 1}: {section["title"]} ({SECTION_HEADER_LABELS[section["type"]]}).\n\n'
+                           f'Source content (reorganize/simplify as needed):\n\n{source_text}')
+            max_tokens = min(2000, int(section["minutes"] * SPOKEN_WORDS_PER_MINUTE * 1.6) + 200)
+            body = self._chat_completion(system_prompt, user_prompt, model=model or DEFAULT_SCRIPT_MODEL,
+                                         max_tokens=max_tokens, temperature=0.7, use_cache=use_cache,
+                                         response_format=JSON_RESPONSE_FORMAT if structured else None)
+            if not body.strip():
+                raise ValueError(f"OpenAI returned an empty section: {section['title']}")
+
+            written = dict(section, start_minute=start_minutes[index])
+            if not structured:
+                written["body"] = body.strip()
+                return written
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                payload = None
+            if isinstance(payload, dict):
+                written["speech"] = str(payload.get("speech") or "").strip()
+                written["notes"] = payload.get("notes") or []
+            else:
+                # Invalid JSON or not an object: treat the whole reply as speech rather than losing the section
+                written["speech"], written["notes"] = body.strip(), []
+            return written
+
+        # More threads than the OpenAI limiter admits would only wait for a slot
+        max_workers = max(1, min(len(outline), get_rate_limiter("openai").max_concurrent))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="script-section") as pool:
+            sections = list(pool.map(write_section, range(len(outline))))
+        self.logger.info(f"Wrote {len(sections)} outlined sections, {elapsed} minutes")
+        return sections
+
+    @staticmethod
+    def _render_text_to_pdf(title: str, subtitle_lines: list[str], body: str,
                             page_size=A4, margins_cm: float = 2.0,
                             font_name: str = "Helvetica", font_size: int = 11,
                             heading_font_size: int = 16) -> bytes:
@@ -188,32 +986,98 @@ class ContentProcessor:
 
     def generate_script_pdf_bytes(self, pdf_source_url: str, lesson_title: str,
                                   teacher_name: str, audience: str = "middle school (ages 11–14)",
-                                  language: str = "English") -> dict:
-        if not self.is_valid_pdf_url(pdf_source_url):
-            raise ValueError(f"Invalid PDF URL: {pdf_source_url}")
-
-        src_bytes = self.download_pdf_from_url(pdf_source_url)
-        extracted = self.extract_text_from_pdf(src_bytes)
-        if len(extracted) < 100:
-            raise ValueError("PDF content too short to build a meaningful script")
+                                  language: str = "English",
+                                  source_pdf_bytes: Optional[bytes] = None,
+                                  use_cache: bool = True,
+                                  hours_until_class: Optional[float] = None,
+                                  render_pdf: bool = True) -> dict:
+        source = self.load_source_for_script(pdf_source_url, lesson_title, source_pdf_bytes)
+        route = self.route_script(source, language, hours_until_class, job_id=lesson_title)
 
-        script_text = self.create_student_friendly_script(
-            source_text=extracted,
+        structured = self.script_format == "json"
+        if self.script_mode == "sectioned":
+            create_script = self.create_sectioned_script_document if structured else self.create_sectioned_script
+        else:
+            create_script = self.create_structured_script if structured else self.create_student_friendly_script
+        script = create_script(
+            source_text=source["text"],
             lesson_title=lesson_title,
             audience=audience,
             language=language,
+            use_cache=use_cache,
+            model=route.chat_model if route else None,
+            # Sectioned mode sizes each section's completion itself
+            max_tokens=route.chat_max_tokens if route and self.script_mode != "sectioned" else None,
         )
+        script_doc = script if structured else None
+        script_text = self.render_script_document(script_doc) if structured else script
+        return self.build_script_pack(script_text, lesson_title, teacher_name, pdf_source_url, source, route,
+                                      script_doc=script_doc, render_pdf=render_pdf)
+
+    def route_script(self, source: dict, language: str, hours_until_class: Optional[float],
+                     job_id: str = "") -> Optional[RouteDecision]:
+        """Model route for a prepared source, or None when routing is disabled."""
+        if not self.model_router:
+            return None
+        return self.model_router.route(source["tokens"], language, hours_until_class, job_id=job_id)
+
+    def load_source_for_script(self, pdf_source_url: str, lesson_title: str,
+                               source_pdf_bytes: Optional[bytes] = None) -> dict:
+        """Download (unless prefetched) and prepare the source PDF text for the script prompt."""
+        if not self.is_valid_pdf_url(pdf_source_url):
+            raise ValueError(f"Invalid PDF URL: {pdf_source_url}")
 
+        # Use the prefetched copy when the caller already downloaded it
+        src_bytes = source_pdf_bytes or self.download_pdf_from_url(pdf_source_url)
+        source = self.prepare_source(src_bytes, lesson_title)
+        if len(source["text"]) < 100:
+            raise ValueError("PDF content too short to build a meaningful script")
+        return source
+
+    def build_script_pack(self, script_text: str, lesson_title: str, teacher_name: str,
+                          pdf_source_url: str, source: dict,
+                          route: Optional[RouteDecision] = None,
+                          script_doc: Optional[dict] = None,
+                          render_pdf: bool = True) -> dict:
+        """
+        Bundle a finished script with its metadata, rendered to PDF unless render_pdf
+        is False (the PDF can be rendered later from script_record(pack)).
+        Structured scripts also carry their script document as 'script_doc'.
+        """
         now = datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
-        subtitle = [f"Generated for: {teacher_name or 'Teacher'}",
-                    f"Source: {pdf_source_url}",
-                    f"Generated: {now}"]
-        pdf_bytes = self._render_text_to_pdf(
-            title=f"Lecture Script: {lesson_title}",
+        script_pack = {"pdf_bytes": None, "script_text": script_text, "script_doc": script_doc,
+                       "meta": {"lesson_title": lesson_title,
+                                "teacher_name": teacher_name or "Teacher",
+                                "source_url": pdf_source_url,
+                                "generated_at": now,
+                                "source_tokens": source["tokens"],
+                                "boilerplate": source["boilerplate"],
+                                "route": route.as_dict() if route else None}}
+        if render_pdf:
+            script_pack["pdf_bytes"] = self.render_script_pdf(script_pack)
+        return script_pack
+
+    @staticmethod
+    def script_record(script_pack: dict) -> dict:
+        """The stored form of a script: everything needed to voice it or render its PDF later."""
+        return {"version": SCRIPT_RECORD_VERSION,
+                "script_text": script_pack["script_text"],
+                "script_doc": script_pack.get("script_doc"),
+                "meta": script_pack["meta"]}
+
+    @classmethod
+    def render_script_pdf(cls, script_record: dict) -> bytes:
+        """
+        Render the script PDF from a script pack or stored script record. Needs no
+        instance (no API key or caches), so it can be called on the class.
+        """
+        meta = script_record["meta"]
+        subtitle = [f"Generated for: {meta.get('teacher_name') or 'Teacher'}",
+                    f"Source: {meta.get('source_url', '')}",
+                    f"Generated: {meta.get('generated_at', '')}"]
+        return cls._render_text_to_pdf(
+            title=f"Lecture Script: {meta.get('lesson_title', '')}",
             subtitle_lines=subtitle,
-            body=script_text,
+            body=(cls.render_script_document(script_record["script_doc"]) if script_record.get("script_doc")
+                  else script_record["script_text"]),
         )
-        return {"pdf_bytes": pdf_bytes, "script_text": script_text,
-                "meta": {"lesson_title": lesson_title,
-                        "source_url": pdf_source_url,
-                        "generated_at": now}}
\ No newline at end of file
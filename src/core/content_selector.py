@@ -0,0 +1,162 @@
+import re
+import logging
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+try:
+    from src.core.tokens import count_tokens, DEFAULT_TOKEN_MODEL
+except Exception:
+    from tokens import count_tokens, DEFAULT_TOKEN_MODEL
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z][a-z0-9'\-]{2,}")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+# Table-of-contents style lines: "1.2 Cell Structure ........ 14"
+_TOC_LINE_RE = re.compile(r"(\.{3,}|\s{2,})\s*\d{1,4}\s*$")
+
+STOPWORDS = frozenset("""
+the and for are but not you all any can had her was one our out day get has him his how man new now
+old see two way who boy did its let put say she too use that with have this will your from they know
+want been good much some time very when come here just like long make many more only over such take
+than them well were what where which while would there their these those into also each other about
+after before being between both could does doing during further itself should through under until
+""".split())
+
+# Relative weight of similarity to the lesson title vs. the document centroid
+TITLE_WEIGHT = 0.6
+CENTROID_WEIGHT = 0.4
+
+
+def _tokenize(text: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS]
+
+
+def split_into_units(pages: List[Tuple[int, str]], max_unit_chars: int = 1500) -> List[Tuple[int, str]]:
+    """Split pages into paragraph-sized (page_number, text) units, breaking long paragraphs at sentences."""
+    units = []
+    for page_num, page_text in pages:
+        for paragraph in _PARAGRAPH_RE.split(page_text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if len(paragraph) <= max_unit_chars:
+                units.append((page_num, paragraph))
+                continue
+            current = ""
+            for sentence in _SENTENCE_RE.split(paragraph):
+                if current and len(current) + len(sentence) + 1 > max_unit_chars:
+                    units.append((page_num, current))
+                    current = ""
+                current = f"{current} {sentence}" if current else sentence
+            if current:
+                units.append((page_num, current))
+    return units
+
+
+def _noise_factor(text: str) -> float:
+    """Down-weight units that look like a table of contents, index or stray fragment."""
+    lines = [l for l in text.splitlines() if l.strip()]
+    if lines and sum(1 for l in lines if _TOC_LINE_RE.search(l)) / len(lines) > 0.5:
+        return 0.1
+    if len(text) < 80:
+        return 0.5
+    return 1.0
+
+
+def score_units(units: List[str], lesson_title: str, max_vocab: int = 2048) -> np.ndarray:
+    """
+    Score units by TF-IDF cosine similarity to the lesson title and to the
+    document centroid. Returns one float score per unit.
+    """
+    n_units = len(units)
+    unit_tokens = [_tokenize(u) for u in units]
+    title_tokens = _tokenize(lesson_title)
+
+    doc_freq = Counter()
+    for tokens in unit_tokens:
+        doc_freq.update(set(tokens))
+    # Terms present in most units (running headers, the subject name) carry no signal
+    max_df = max(2, int(n_units * 0.6))
+    candidates = [t for t, df in doc_freq.items() if df <= max_df]
+    candidates.sort(key=lambda t: -doc_freq[t])
+    vocab_terms = candidates[:max_vocab]
+    vocab_terms.extend(t for t in set(title_tokens) if t in doc_freq and t not in vocab_terms)
+    vocab = {term: i for i, term in enumerate(vocab_terms)}
+    if not vocab:
+        return np.zeros(n_units, dtype=np.float32)
+
+    rows, cols = [], []
+    for row, tokens in enumerate(unit_tokens):
+        for token in tokens:
+            col = vocab.get(token)
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+    tf = np.zeros((n_units, len(vocab)), dtype=np.float32)
+    np.add.at(tf, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+
+    df = np.asarray([doc_freq[t] for t in vocab_terms], dtype=np.float32)
+    idf = np.log((1.0 + n_units) / (1.0 + df)) + 1.0
+    matrix = np.log1p(tf) * idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.maximum(norms, 1e-12)
+
+    centroid = matrix.mean(axis=0)
+    centroid /= max(float(np.linalg.norm(centroid)), 1e-12)
+    scores = CENTROID_WEIGHT * (matrix @ centroid)
+
+    title_vec = np.zeros(len(vocab), dtype=np.float32)
+    for token in title_tokens:
+        col = vocab.get(token)
+        if col is not None:
+            title_vec[col] += 1.0
+    if title_vec.any():
+        title_vec = np.log1p(title_vec) * idf
+        title_vec /= max(float(np.linalg.norm(title_vec)), 1e-12)
+        scores = scores + TITLE_WEIGHT * (matrix @ title_vec)
+    else:
+        scores = scores / CENTROID_WEIGHT
+
+    noise = np.asarray([_noise_factor(u) for u in units], dtype=np.float32)
+    return scores * noise
+
+
+def select_salient_content(pages: List[Tuple[int, str]], lesson_title: str, token_budget: int,
+                           model: str = DEFAULT_TOKEN_MODEL) -> Dict:
+    """
+    Pick the highest-value paragraphs of a document that fit into token_budget,
+    returned in original document order.
+    """
+    units = split_into_units(pages)
+    if not units:
+        return {"text": "", "units_total": 0, "units_selected": 0, "tokens": 0}
+
+    texts = [text for _, text in units]
+    unit_token_counts = [count_tokens(t, model) for t in texts]
+    separator_tokens = count_tokens("\n\n", model)
+    total_tokens = sum(unit_token_counts) + separator_tokens * (len(units) - 1)
+
+    if total_tokens <= token_budget:
+        selected = list(range(len(units)))
+        used = total_tokens
+    else:
+        scores = score_units(texts, lesson_title)
+        selected = []
+        used = 0
+        for idx in np.argsort(-scores, kind="stable"):
+            cost = unit_token_counts[idx] + (separator_tokens if selected else 0)
+            if used + cost > token_budget:
+                continue
+            selected.append(int(idx))
+            used += cost
+            if token_budget - used < 20:
+                break
+        selected.sort()
+
+    text = "\n\n".join(texts[i] for i in selected)
+    logger.info(f"Selected {len(selected)}/{len(units)} source units ({used}/{total_tokens} tokens)")
+    return {"text": text, "units_total": len(units), "units_selected": len(selected), "tokens": used}
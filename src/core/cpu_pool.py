@@ -0,0 +1,64 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_cpu_pool_size() -> int:
+    """Number of worker processes for CPU-bound stages (CPU_POOL_WORKERS, default: CPU count)."""
+    try:
+        return max(1, int(os.getenv("CPU_POOL_WORKERS", "0")) or os.cpu_count() or 1)
+    except ValueError:
+        return os.cpu_count() or 1
+
+
+def get_cpu_pool_start_method() -> str:
+    """
+    How workers are started (CPU_POOL_START_METHOD, default forkserver where the
+    platform has it, else spawn). The pool is created lazily from threads of the
+    running server, and forking a multithreaded process can copy locks held by
+    other threads (logging, SQLite, HTTP connection pools) into a child that then
+    deadlocks, so plain fork is never the default.
+    """
+    available = multiprocessing.get_all_start_methods()
+    method = os.getenv("CPU_POOL_START_METHOD", "").lower()
+    if method in available:
+        return method
+    return "forkserver" if "forkserver" in available else "spawn"
+
+
+def get_cpu_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all CPU-bound stages (PDF extraction, audio encoding, ...)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = get_cpu_pool_size()
+            start_method = get_cpu_pool_start_method()
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method))
+            logger.info(f"Started shared CPU pool with {workers} {start_method} workers")
+        return _pool
+
+
+def reset_cpu_pool() -> None:
+    """Discard a broken pool so the next get_cpu_pool() call starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def shutdown_cpu_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+            logger.info("Shared CPU pool shut down")
@@ -0,0 +1,77 @@
+import os
+import time
+import logging
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+try:
+    from src.core.audio_assembler import StreamingAssembler
+except Exception:
+    from audio_assembler import StreamingAssembler
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DeliveryProfile:
+    """How a finished lecture is encoded for delivery (all profiles are mono)."""
+    name: str
+    format: str                      # soundfile major format: MP3, OGG, FLAC, WAV
+    subtype: Optional[str]           # codec within the format, e.g. OPUS or MPEG_LAYER_III
+    sample_rate: int
+    extension: str
+    content_type: str
+    compression_level: Optional[float] = None  # 0.0 = highest quality/bitrate, 1.0 = smallest file
+    bitrate_mode: Optional[str] = None         # MP3 only: CONSTANT, AVERAGE or VARIABLE
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+DELIVERY_PROFILES: Dict[str, DeliveryProfile] = {
+    # Previous output: 24 kHz MP3 at libsndfile defaults
+    "standard": DeliveryProfile("standard", "MP3", "MPEG_LAYER_III", 24000, "mp3", "audio/mpeg"),
+    # Voice played into a Zoom call: 16 kHz Opus (~24 kbit/s)
+    "zoom_voice": DeliveryProfile("zoom_voice", "OGG", "OPUS", 16000, "ogg", "audio/ogg",
+                                  compression_level=0.93),
+    # Same, for players without Opus support: 16 kHz low-bitrate MP3
+    "zoom_voice_mp3": DeliveryProfile("zoom_voice_mp3", "MP3", "MPEG_LAYER_III", 16000, "mp3", "audio/mpeg",
+                                      compression_level=0.9, bitrate_mode="AVERAGE"),
+    # Lossless copy of the TTS output
+    "archive": DeliveryProfile("archive", "FLAC", "PCM_16", 24000, "flac", "audio/flac",
+                               compression_level=1.0),
+}
+
+
+def get_delivery_profile(name: Optional[str] = None) -> DeliveryProfile:
+    """Profile by name, defaulting to AUDIO_DELIVERY_PROFILE (default "standard")."""
+    name = name or os.getenv("AUDIO_DELIVERY_PROFILE", "standard")
+    profile = DELIVERY_PROFILES.get(name)
+    if profile is None:
+        logger.warning(f"Unknown delivery profile '{name}', using 'standard'")
+        profile = DELIVERY_PROFILES["standard"]
+    return profile
+
+
+def open_profile_assembler(output_path: str, profile: DeliveryProfile) -> StreamingAssembler:
+    """StreamingAssembler that encodes straight to the profile's codec and sample rate."""
+    return StreamingAssembler(output_path, profile.sample_rate, format=profile.format,
+                              subtype=profile.subtype, compression_level=profile.compression_level,
+                              bitrate_mode=profile.bitrate_mode)
+
+
+def encode_with_profile(source_path: str, output_path: str, profile_name: str) -> dict:
+    """
+    Process-pool entry point: stream an assembled lecture (any readable audio file)
+    into the profile's codec. Returns the output size, duration and encode time.
+    """
+    profile = get_delivery_profile(profile_name)
+    started = time.process_time()
+    with open_profile_assembler(output_path, profile) as assembler:
+        assembler.write_file(source_path)
+    return {
+        "profile": profile.name,
+        "bytes": os.path.getsize(output_path),
+        "duration_seconds": round(assembler.duration, 2),
+        "encode_cpu_seconds": round(time.process_time() - started, 2),
+    }
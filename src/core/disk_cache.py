@@ -0,0 +1,168 @@
+import os
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+# Written into every namespace directory, so pruning only ever removes DiskCache data
+MARKER_FILE = ".disk_cache"
+
+
+class DiskCache:
+    """
+    Content-addressed byte cache on local disk with size-bounded LRU eviction.
+
+    Entries live under <root>/<namespace>/<key[:2]>/<key>. The namespace is
+    the invalidation unit: bump it (e.g. when an extractor or model changes)
+    and old entries stop matching; prune_namespaces(), run as explicit
+    maintenance, then reclaims the space.
+    """
+
+    def __init__(self, root: Union[str, Path], namespace: str = "default",
+                 max_bytes: int = 512 * 1024 * 1024):
+        self.root = Path(root)
+        self.namespace = namespace
+        self.dir = self.root / namespace
+        self._mark()
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._size = None  # computed lazily on first write
+
+    def _mark(self) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        marker = self.dir / MARKER_FILE
+        if not marker.exists():
+            marker.write_text(self.namespace, encoding="utf-8")
+
+    @staticmethod
+    def make_key(*parts: Union[str, bytes]) -> str:
+        """SHA-256 over the given parts, separated so ('ab', 'c') != ('a', 'bc')."""
+        digest = hashlib.sha256()
+        for part in parts:
+            data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+            digest.update(len(data).to_bytes(8, "big"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.dir / key[:2] / key
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Cache read failed for {key}: {e}")
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return data
+
+    def set(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            old_size = path.stat().st_size if path.exists() else 0
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self.logger.warning(f"Cache write failed for {key}: {e}")
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str) -> None:
+        path = self._path(key)
+        with self._lock:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                if self._size is not None:
+                    self._size -= size
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        """Drop every entry in this namespace."""
+        with self._lock:
+            shutil.rmtree(self.dir, ignore_errors=True)
+            self._mark()
+            self._size = 0
+
+    def prune_namespaces(self, prefix: str) -> int:
+        """
+        Remove sibling namespaces of this cache (e.g. entries from older extractor
+        versions): directories under root that DiskCache created (they hold its
+        marker file) and whose name starts with prefix. Anything else is left alone.
+        """
+        removed = 0
+        for entry in self.root.iterdir():
+            if (entry.is_dir() and entry.name != self.namespace and entry.name.startswith(prefix)
+                    and (entry / MARKER_FILE).is_file()):
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+        if removed:
+            self.logger.info(f"Pruned {removed} stale cache namespaces under {self.root}")
+        return removed
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            return self._size
+
+    def _files(self):
+        return [p for p in self.dir.glob("*/*") if p.is_file() and not p.name.endswith(".tmp")]
+
+    def _scan_size(self) -> int:
+        total = 0
+        for path in self._files():
+            try:
+                total += path.stat().st_size
+            except FileNotFoundError:
+                pass
+        return total
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache is back under 90% of max_bytes."""
+        target = int(self.max_bytes * 0.9)
+        entries = []
+        for path in self._files():
+            try:
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+            except FileNotFoundError:
+                pass
+        entries.sort(key=lambda e: e[0])
+
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+                evicted += 1
+            except FileNotFoundError:
+                pass
+        self._size = total
+        if evicted:
+            self.logger.info(f"Evicted {evicted} entries from cache {self.dir} ({total} bytes remain)")
@@ -1,5 +1,4 @@
 import os
-import hashlib
 import requests
 import json
 from pathlib import Path
@@ -8,6 +7,15 @@ from datetime import datetime
 from typing import Dict, List, Optional
 import time
 
+try:
+    from src.core.tts_cache import TTSCache, get_tts_cache
+    from src.core.text_chunker import pack_chunks
+    from src.core.script_parser import parse_script
+except Exception:
+    from tts_cache import TTSCache, get_tts_cache
+    from text_chunker import pack_chunks
+    from script_parser import parse_script
+
 class ElevenLabsSpeechGenerator:
     def __init__(self):
         self.api_key = os.getenv("ELEVENLABS_API_KEY")
@@ -23,6 +31,7 @@ class ElevenLabsSpeechGenerator:
         
         self.cache_dir = Path("temp/audio_cache")
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.tts_cache = get_tts_cache()
         self.logger = logging.getLogger(__name__)
         
         # ElevenLabs character limits (varies by subscription)
@@ -113,39 +122,8 @@ class ElevenLabsSpeechGenerator:
             return {}
 
     def split_text_into_chunks(self, text: str) -> List[str]:
-        """Split text into chunks that fit within ElevenLabs character limits"""
-        if len(text) <= self.max_chunk_size:
-            return [text]
-        
-        chunks = []
-        current_chunk = ""
-        
-        # Split by sentences to maintain natural breaks
-        sentences = text.replace('\n', ' ').split('. ')
-        
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-                
-            # Add period back if it was removed by split
-            if not sentence.endswith('.') and not sentence.endswith('!') and not sentence.endswith('?'):
-                sentence += '.'
-            
-            # Check if adding this sentence would exceed the limit
-            if len(current_chunk + ' ' + sentence) <= self.max_chunk_size:
-                current_chunk += (' ' + sentence) if current_chunk else sentence
-            else:
-                # If current chunk is not empty, save it and start new chunk
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence
-        
-        # Add the last chunk if it exists
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        return chunks
+        """Split text into chunks that fit within ElevenLabs character limits (whole sentences, fully packed)"""
+        return pack_chunks(text, self.max_chunk_size)
 
     def text_to_speech(self, 
                       text_content: str, 
@@ -154,8 +132,9 @@ class ElevenLabsSpeechGenerator:
                       model_id: str = "eleven_multilingual_v2") -> Dict:
         """Convert text to speech using ElevenLabs API"""
         try:
-            # Create cache key
-            cache_key = hashlib.md5(f"{text_content}{voice_id}{model_id}".encode()).hexdigest()
+            # Create cache key (shared content-addressed TTS cache)
+            cache_key = TTSCache.make_key("elevenlabs", model_id, voice_id, text_content, "mp3",
+                                          **self.voice_settings)
             
             if lesson_title:
                 filename = f"{lesson_title.replace(' ', '_').replace('/', '_')}_{cache_key[:8]}.mp3"
@@ -164,8 +143,13 @@ class ElevenLabsSpeechGenerator:
             
             cache_file = self.cache_dir / filename
             
-            # Check if already cached
-            if cache_file.exists():
+            # Check if already cached: the shared TTS cache, or with TTS_CACHE_ENABLED=false
+            # the audio file of an earlier identical request, as before the shared cache
+            cached_audio = self.tts_cache.get(cache_key) if self.tts_cache else None
+            if cached_audio is not None or (self.tts_cache is None and cache_file.exists()):
+                if cached_audio is not None:
+                    with open(cache_file, 'wb') as f:
+                        f.write(cached_audio)
                 self.logger.info(f"Using cached audio: {cache_file}")
                 file_size = cache_file.stat().st_size / 1024 / 1024  # MB
                 return {
@@ -178,6 +162,7 @@ class ElevenLabsSpeechGenerator:
             
             # Check character count and user limits
             char_count = len(text_content)
+            truncated = False
             user_info = self.get_user_info()
             
             if user_info and char_count > user_info.get('characters_remaining', 0):
@@ -186,6 +171,9 @@ class ElevenLabsSpeechGenerator:
                 chunks = self.split_text_into_chunks(text_content)
                 text_content = chunks[0] if chunks else text_content[:self.max_chunk_size]
                 char_count = len(text_content)
+                truncated = True
+                # Partial audio must never be found under the full text's file name
+                cache_file = cache_file.with_name(f"{cache_file.stem}_partial.mp3")
                 self.logger.info(f"Using first chunk only: {char_count} characters")
             
             # Generate speech
@@ -208,9 +196,11 @@ class ElevenLabsSpeechGenerator:
             
             response.raise_for_status()
             
-            # Save audio to cache
+            # Save audio to cache (partial audio is never stored under the full text's key)
             with open(cache_file, 'wb') as f:
                 f.write(response.content)
+            if self.tts_cache and not truncated:
+                self.tts_cache.set(cache_key, response.content)
             
             file_size = cache_file.stat().st_size / 1024 / 1024  # MB
             self.logger.info(f"Audio generated and saved: {cache_file} ({file_size:.2f} MB)")
@@ -304,6 +294,16 @@ class ElevenLabsSpeechGenerator:
             self.logger.error(f"Error generating chunked lecture: {e}")
             return {'error': str(e)}
 
+    def generate_lecture_from_script(self,
+                                     script_text: str,
+                                     lesson_title: str,
+                                     voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+                                     max_chunks: int = 5) -> Dict:
+        """Generate a chunked lecture from a lecture script, voicing only its spoken text"""
+        script = parse_script(script_text, lesson_title)
+        self.logger.info(f"Parsed script '{script.title}': {len(script.sections)} sections")
+        return self.generate_chunked_lecture(script.speech_text(), lesson_title, voice_id, max_chunks)
+
     def get_voice_preview(self, voice_id: str) -> Optional[str]:
         """Get preview URL for a voice"""
         voices = self.get_available_voices()
@@ -0,0 +1,140 @@
+import io
+import os
+import json
+import logging
+import threading
+from typing import Dict, Iterable, Optional
+
+import soundfile as sf
+
+try:
+    from src.core.audio_buffer import PcmBuffer, PcmSegment
+    from src.core.disk_cache import DiskCache
+except Exception:
+    from audio_buffer import PcmBuffer, PcmSegment
+    from disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+# Bump when stored section audio should no longer be reused
+LESSON_MANIFEST_VERSION = 1
+SECTION_CACHE_NAMESPACE_PREFIX = "sections-v"
+
+
+class LessonManifest:
+    """
+    Synthesized audio of one lesson's sections, keyed by section hash (the
+    spoken text plus everything that changes how it sounds). Regenerating a
+    lesson reuses the stored audio of unchanged sections and only synthesizes
+    new or edited ones.
+
+    Section audio (lossless FLAC) and the manifest itself live in the shared
+    section audio cache (see get_section_audio_cache), so the store is bounded by
+    LRU eviction. Audio is content-addressed and reused by any lesson with the
+    same section; the manifest, per lesson and source (e.g. one per source PDF),
+    records which sections the lesson's last generation used.
+    """
+
+    def __init__(self, lesson_id: str, source: Optional[str] = None, cache: Optional[DiskCache] = None):
+        self.cache = cache or get_section_audio_cache()
+        self.lesson_id = lesson_id
+        self.manifest_key = DiskCache.make_key("lesson-manifest", str(lesson_id), (source or "").strip())
+        self.entries: Dict[str, dict] = {}
+        self.reused = 0
+        self.stored = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        data = self.cache.get(self.manifest_key)
+        if data is None:
+            return
+        try:
+            manifest = json.loads(data)
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable manifest of lesson {self.lesson_id}: {e}")
+            return
+        if manifest.get("version") != LESSON_MANIFEST_VERSION:
+            logger.info(f"Manifest of lesson {self.lesson_id} is from an older version, resynthesizing all sections")
+            return
+        self.entries = manifest.get("sections", {})
+
+    def _save(self) -> None:
+        """Store the manifest; callers hold the lock."""
+        self.cache.set(self.manifest_key, json.dumps({"version": LESSON_MANIFEST_VERSION,
+                                                      "sections": self.entries}).encode("utf-8"))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.cache
+
+    def load(self, key: str, pcm_buffer: PcmBuffer) -> Optional[PcmSegment]:
+        """Stored audio for a section hash, added to pcm_buffer; None if there is none."""
+        data = self.cache.get(key)
+        if data is None:
+            return None
+        try:
+            samples, sample_rate = sf.read(io.BytesIO(data), dtype="float32")
+        except Exception as e:
+            logger.warning(f"Stored section '{self.entries.get(key, {}).get('title')}' is unreadable, "
+                           f"resynthesizing: {e}")
+            return None
+        with self._lock:
+            self.reused += 1
+        return pcm_buffer.add(samples, sample_rate)
+
+    def store(self, key: str, segment: PcmSegment, title: str = "") -> None:
+        """Keep a freshly synthesized section's audio for the next regeneration."""
+        try:
+            buffer = io.BytesIO()
+            sf.write(buffer, segment.read(), segment.sample_rate, format="FLAC")
+        except Exception as e:
+            logger.warning(f"Could not store audio for section '{title}': {e}")
+            return
+        self.cache.set(key, buffer.getvalue())
+        with self._lock:
+            self.entries[key] = {"title": title, "frames": segment.frames, "sample_rate": segment.sample_rate}
+            self.stored += 1
+            self._save()
+
+    def retain(self, keys: Iterable[str]) -> int:
+        """
+        Forget sections no longer in the lesson; returns how many were dropped. Their
+        audio is left to the cache's eviction, as other lessons may share it.
+        """
+        keys = set(keys)
+        with self._lock:
+            dropped = [key for key in self.entries if key not in keys]
+            for key in dropped:
+                self.entries.pop(key)
+            if dropped:
+                self._save()
+        return len(dropped)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"sections_reused": self.reused, "sections_stored": self.stored}
+
+
+_section_audio_cache = None
+_section_audio_cache_lock = threading.Lock()
+
+
+def get_section_audio_cache() -> DiskCache:
+    """
+    Process-wide store of lesson section audio: LESSON_SECTIONS_DIR (default
+    temp/cache/lesson_sections), LRU-evicted beyond LESSON_SECTIONS_MAX_MB (default 1024).
+    """
+    global _section_audio_cache
+    with _section_audio_cache_lock:
+        if _section_audio_cache is None:
+            _section_audio_cache = DiskCache(
+                os.getenv("LESSON_SECTIONS_DIR", "temp/cache/lesson_sections"),
+                namespace=f"{SECTION_CACHE_NAMESPACE_PREFIX}{LESSON_MANIFEST_VERSION}",
+                max_bytes=int(os.getenv("LESSON_SECTIONS_MAX_MB", "1024")) * 1024 * 1024,
+            )
+        return _section_audio_cache
+
+
+def prune_section_audio_cache() -> int:
+    """Maintenance: delete section audio stored under older LESSON_MANIFEST_VERSIONs."""
+    return get_section_audio_cache().prune_namespaces(SECTION_CACHE_NAMESPACE_PREFIX)
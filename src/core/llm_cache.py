@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed cache of chat completion responses.
+
+    Keys hash everything that determines the completion (model, prompts,
+    temperature, max_tokens), so re-running a date after e.g. an upload
+    failure reuses the previous script instead of paying for it again.
+    Entries expire after ttl_seconds and the table is capped at max_entries
+    (least recently used rows are dropped first).
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        self.path = Path(path or os.getenv("LLM_CACHE_PATH", "temp/cache/llm_responses.sqlite3"))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_prompt: str,
+                 temperature: float, max_tokens: int, **extra) -> str:
+        payload = {
+            "model": model,
+            "system_prompt": system_prompt,
+            "user_prompt": user_prompt,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            **extra,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                response, created_at = row
+                if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    return None
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                return response
+        except sqlite3.Error as e:
+            # A locked or corrupt cache is a miss, not a failed generation
+            self.logger.warning(f"LLM cache read failed: {e}")
+            return None
+
+    def set(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, model, response, now, now),
+                )
+                if self.max_entries:
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE key IN ("
+                        "  SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?"
+                        ")",
+                        (self.max_entries,),
+                    )
+        except sqlite3.Error as e:
+            self.logger.warning(f"LLM cache write failed: {e}")
+
+    def purge_expired(self) -> int:
+        if not self.ttl_seconds:
+            return 0
+        try:
+            with self._lock, self._conn:
+                cursor = self._conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+                )
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            self.logger.warning(f"LLM cache purge failed: {e}")
+            return 0
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
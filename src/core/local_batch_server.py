@@ -0,0 +1,194 @@
+"""
+Local stand-in for the OpenAI Batch API, for tests and dry runs.
+
+Implements the subset used by BatchClient: POST /v1/files, GET /v1/files/{id}/content,
+POST /v1/batches and GET /v1/batches/{id}. Batches report "in_progress" for the first
+polls_until_complete polls, then complete with responses produced by the responder.
+
+    with LocalBatchServer() as server:
+        client = BatchClient(api_key="sk-test", base_url=server.base_url)
+
+or run it standalone and point OPENAI_BATCH_BASE_URL at it:
+
+    python src/core/local_batch_server.py --port 8765
+"""
+import json
+import time
+import uuid
+import threading
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+
+def _multipart_file(content_type: str, body: bytes) -> bytes:
+    """Bytes of the "file" field of a multipart/form-data request body."""
+    message = BytesParser(policy=policy.default).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body)
+    for part in message.iter_parts():
+        if part.get_param("name", header="content-disposition") == "file":
+            return part.get_payload(decode=True)
+    raise ValueError("multipart body has no file field")
+
+
+def echo_responder(body: dict) -> str:
+    """Default responder: a short deterministic script naming the lesson prompt."""
+    user_prompt = body["messages"][-1]["content"]
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return json.dumps({"title": user_prompt.splitlines()[0], "sections": [
+            {"type": "hook", "title": "Opening Hook", "start_minute": 0, "minutes": 5,
+             "speech": f"Script for: {user_prompt.splitlines()[0]}", "notes": []}]})
+    return f"Opening Hook [0:00]\nScript for: {user_prompt.splitlines()[0]}"
+
+
+class LocalBatchServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 responder: Optional[Callable[[dict], str]] = None,
+                 polls_until_complete: int = 1):
+        self.responder = responder or echo_responder
+        self.polls_until_complete = polls_until_complete
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, dict] = {}
+        self._polls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "LocalBatchServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _new_file(self, content: bytes) -> str:
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        self.files[file_id] = content
+        return file_id
+
+    def _run_batch(self, batch: dict) -> None:
+        """Produce the output/error files for a batch from its input file."""
+        outputs, errors = [], []
+        for line in self.files[batch["input_file_id"]].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            try:
+                content = self.responder(request["body"])
+                outputs.append({
+                    "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200, "body": {
+                        "object": "chat.completion",
+                        "model": request["body"].get("model"),
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": content}}],
+                    }},
+                    "error": None,
+                })
+            except Exception as e:
+                errors.append({"id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                               "custom_id": request["custom_id"], "response": None,
+                               "error": {"code": "server_error", "message": str(e)}})
+        to_bytes = lambda rows: "".join(json.dumps(r) + "\n" for r in rows).encode("utf-8")
+        batch["output_file_id"] = self._new_file(to_bytes(outputs)) if outputs else None
+        batch["error_file_id"] = self._new_file(to_bytes(errors)) if errors else None
+        batch["request_counts"] = {"total": len(outputs) + len(errors),
+                                   "completed": len(outputs), "failed": len(errors)}
+        batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, payload: dict, status: int = 200):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                with server._lock:
+                    if self.path == "/v1/files":
+                        body = self.rfile.read(int(self.headers["Content-Length"]))
+                        file_id = server._new_file(_multipart_file(self.headers["Content-Type"], body))
+                        return self._send_json({"id": file_id, "object": "file", "purpose": "batch"})
+                    if self.path == "/v1/batches":
+                        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                        if payload.get("input_file_id") not in server.files:
+                            return self._send_json({"error": {"message": "input file not found"}}, 404)
+                        batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+                        server.batches[batch_id] = {
+                            "id": batch_id, "object": "batch", "status": "validating",
+                            "endpoint": payload.get("endpoint"),
+                            "input_file_id": payload["input_file_id"],
+                            "completion_window": payload.get("completion_window", "24h"),
+                            "metadata": payload.get("metadata"),
+                            "output_file_id": None, "error_file_id": None,
+                            "created_at": int(time.time()),
+                        }
+                        server._polls[batch_id] = 0
+                        return self._send_json(server.batches[batch_id])
+                self._send_json({"error": {"message": "not found"}}, 404)
+
+            def do_GET(self):
+                with server._lock:
+                    parts = self.path.strip("/").split("/")
+                    if len(parts) == 3 and parts[:2] == ["v1", "batches"] and parts[2] in server.batches:
+                        batch = server.batches[parts[2]]
+                        if batch["status"] != "completed":
+                            server._polls[batch["id"]] += 1
+                            if server._polls[batch["id"]] > server.polls_until_complete:
+                                server._run_batch(batch)
+                            else:
+                                batch["status"] = "in_progress"
+                        return self._send_json(batch)
+                    if len(parts) == 4 and parts[:2] == ["v1", "files"] and parts[3] == "content" \
+                            and parts[2] in server.files:
+                        body = server.files[parts[2]]
+                        self.send_response(200)
+                        self.send_header("Content-Type", "application/jsonl")
+                        self.send_header("Content-Length", str(len(body)))
+                        self.end_headers()
+                        self.wfile.write(body)
+                        return
+                self._send_json({"error": {"message": "not found"}}, 404)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI Batch API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--polls-until-complete", type=int, default=1)
+    args = parser.parse_args()
+
+    local_server = LocalBatchServer(args.host, args.port, polls_until_complete=args.polls_until_complete)
+    print(f"Local batch server listening on {local_server.base_url}")
+    try:
+        local_server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        local_server.stop()
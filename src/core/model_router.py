@@ -0,0 +1,211 @@
+import os
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M tokens (input, output), used for budget estimates only
+CHAT_PRICES_PER_M: Dict[str, Tuple[float, float]] = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4-turbo": (10.00, 30.00),
+}
+# USD per 1M characters
+TTS_PRICES_PER_M: Dict[str, float] = {
+    "tts-1": 15.00,
+    "tts-1-hd": 30.00,
+}
+
+# Prompt tokens on top of the source text (instructions + title)
+PROMPT_OVERHEAD_TOKENS = 700
+# Spoken script characters per completion token, for TTS cost estimates
+CHARS_PER_TOKEN = 4
+
+
+def estimate_chat_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    input_price, output_price = CHAT_PRICES_PER_M.get(model, CHAT_PRICES_PER_M["gpt-3.5-turbo"])
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+def estimate_tts_cost(model: str, characters: int) -> float:
+    return characters * TTS_PRICES_PER_M.get(model, TTS_PRICES_PER_M["tts-1"]) / 1_000_000
+
+
+class SpendLedger:
+    """
+    Estimated OpenAI spend per UTC day, recorded as requests complete.
+
+    Totals live in SQLite (MODEL_SPEND_DB_PATH, default
+    temp/cache/model_spend.sqlite3), so they survive restarts and are shared by
+    every worker process using the same file. If the database can't be used,
+    spend is tracked in process memory instead.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or os.getenv("MODEL_SPEND_DB_PATH", "temp/cache/model_spend.sqlite3"))
+        self._lock = threading.Lock()
+        self._spend: Dict[str, float] = {}
+        self._conn = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            with self._lock, self._conn:
+                self._conn.execute("CREATE TABLE IF NOT EXISTS daily_spend (day TEXT PRIMARY KEY, usd REAL NOT NULL)")
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Spend ledger database unavailable, tracking spend in memory only: {e}")
+            self._conn = None
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.utcnow().strftime("%Y-%m-%d")
+
+    def add(self, amount_usd: float) -> None:
+        today = self._today()
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    with self._conn:
+                        # One atomic upsert, so concurrent workers never lose each other's spend
+                        self._conn.execute(
+                            "INSERT INTO daily_spend (day, usd) VALUES (?, ?) "
+                            "ON CONFLICT(day) DO UPDATE SET usd = usd + excluded.usd",
+                            (today, amount_usd),
+                        )
+                    return
+                except sqlite3.Error as e:
+                    logger.warning(f"Spend ledger write failed, keeping it in memory: {e}")
+            # Only today's total matters for routing
+            self._spend = {today: self._spend.get(today, 0.0) + amount_usd}
+
+    def record_chat(self, model: str, prompt_tokens: int, completion_tokens: int) -> None:
+        self.add(estimate_chat_cost(model, prompt_tokens, completion_tokens))
+
+    def record_tts(self, model: str, characters: int) -> None:
+        self.add(estimate_tts_cost(model, characters))
+
+    def spent_today(self) -> float:
+        today = self._today()
+        with self._lock:
+            spent = self._spend.get(today, 0.0)
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute("SELECT usd FROM daily_spend WHERE day = ?", (today,)).fetchone()
+                    spent += row[0] if row else 0.0
+                except sqlite3.Error as e:
+                    logger.warning(f"Spend ledger read failed: {e}")
+            return spent
+
+
+_ledger: Optional[SpendLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_spend_ledger() -> SpendLedger:
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = SpendLedger()
+        return _ledger
+
+
+@dataclass
+class ModelRoute:
+    name: str
+    chat_model: str
+    tts_model: str
+    chat_max_tokens: int = 3000
+
+
+@dataclass
+class RouteDecision:
+    route: str
+    chat_model: str
+    tts_model: str
+    chat_max_tokens: int
+    estimated_cost_usd: float
+    reason: str
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _route_from_env(name: str, chat_model: str, tts_model: str, chat_max_tokens: int) -> ModelRoute:
+    prefix = f"ROUTE_{name.upper()}"
+    return ModelRoute(
+        name=name,
+        chat_model=os.getenv(f"{prefix}_CHAT_MODEL", chat_model),
+        tts_model=os.getenv(f"{prefix}_TTS_MODEL", tts_model),
+        chat_max_tokens=int(os.getenv(f"{prefix}_MAX_TOKENS", str(chat_max_tokens))),
+    )
+
+
+class ModelRouter:
+    """
+    Pick the chat and TTS models for a script job.
+
+    - fast:    class starts within URGENT_HOURS (or no deadline is known)
+    - economy: class is ECONOMY_HOURS or more away
+    - quality: in between, for long or non-English sources
+    - economy: in between, otherwise
+
+    A route whose estimated cost does not fit the remaining daily budget
+    (DAILY_MODEL_BUDGET_USD, 0 = unlimited) is downgraded to the cheapest one.
+    """
+
+    def __init__(self, daily_budget_usd: Optional[float] = None, ledger: Optional[SpendLedger] = None):
+        self.routes = {
+            "fast": _route_from_env("fast", "gpt-3.5-turbo", "tts-1", 3000),
+            "quality": _route_from_env("quality", "gpt-4o", "tts-1-hd", 4000),
+            "economy": _route_from_env("economy", "gpt-4o-mini", "tts-1", 3000),
+        }
+        self.daily_budget_usd = (daily_budget_usd if daily_budget_usd is not None
+                                 else float(os.getenv("DAILY_MODEL_BUDGET_USD", "0")))
+        self.urgent_hours = float(os.getenv("ROUTER_URGENT_HOURS", "12"))
+        self.economy_hours = float(os.getenv("ROUTER_ECONOMY_HOURS", "72"))
+        self.long_source_tokens = int(os.getenv("ROUTER_LONG_SOURCE_TOKENS", "6000"))
+        self.ledger = ledger or get_spend_ledger()
+
+    def estimate_cost(self, route: ModelRoute, source_tokens: int) -> float:
+        """Upper-bound cost of one script + its audio on this route."""
+        return (estimate_chat_cost(route.chat_model, source_tokens + PROMPT_OVERHEAD_TOKENS, route.chat_max_tokens)
+                + estimate_tts_cost(route.tts_model, route.chat_max_tokens * CHARS_PER_TOKEN))
+
+    def route(self, source_tokens: int, language: str = "English",
+              hours_until_class: Optional[float] = None, job_id: str = "") -> RouteDecision:
+        if hours_until_class is None:
+            name, reason = "fast", "no class time known"
+        elif hours_until_class < self.urgent_hours:
+            name, reason = "fast", f"class starts in {hours_until_class:.1f}h"
+        elif hours_until_class >= self.economy_hours:
+            name, reason = "economy", f"class is {hours_until_class:.0f}h away"
+        elif source_tokens > self.long_source_tokens or language.strip().lower() != "english":
+            name, reason = "quality", f"{source_tokens} source tokens, {language}"
+        else:
+            name, reason = "economy", f"short {language} source, class in {hours_until_class:.0f}h"
+
+        route = self.routes[name]
+        cost = self.estimate_cost(route, source_tokens)
+        spent = self.ledger.spent_today()
+        if self.daily_budget_usd > 0 and spent + cost > self.daily_budget_usd:
+            cheapest = min(self.routes.values(), key=lambda r: self.estimate_cost(r, source_tokens))
+            if cheapest.name != name:
+                reason += f"; downgraded from {name}, ${spent:.2f} of ${self.daily_budget_usd:.2f} spent today"
+                route = cheapest
+                cost = self.estimate_cost(route, source_tokens)
+            else:
+                reason += f"; over daily budget (${spent:.2f} of ${self.daily_budget_usd:.2f})"
+
+        decision = RouteDecision(route=route.name, chat_model=route.chat_model, tts_model=route.tts_model,
+                                 chat_max_tokens=route.chat_max_tokens, estimated_cost_usd=round(cost, 4),
+                                 reason=reason)
+        budget = f"${self.daily_budget_usd:.2f}" if self.daily_budget_usd > 0 else "unlimited"
+        logger.info(f"Model route for {job_id or 'job'}: {decision.route} "
+                    f"(chat={decision.chat_model}, tts={decision.tts_model}, "
+                    f"est ${decision.estimated_cost_usd:.4f}, spent today ${spent:.2f} of {budget}) - {reason}")
+        return decision
@@ -0,0 +1,125 @@
+import os
+import time
+import shutil
+import logging
+import tempfile
+import threading
+import weakref
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+
+class SpooledPDFs:
+    """
+    Prefetched PDFs spooled to temp files under PDF_PREFETCH_DIR (default
+    temp/prefetch), so a day's worth of sources is not held in memory: get()
+    reads one back when its lesson is processed. The files are deleted by
+    close(), or when the object is garbage collected.
+    """
+
+    def __init__(self, spool_dir: Optional[str] = None):
+        root = Path(spool_dir or os.getenv("PDF_PREFETCH_DIR", "temp/prefetch"))
+        root.mkdir(parents=True, exist_ok=True)
+        self.dir = Path(tempfile.mkdtemp(prefix="pdfs-", dir=root))
+        self._paths: Dict[str, Path] = {}
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, shutil.rmtree, str(self.dir), True)
+
+    def add(self, pdf_url: str, pdf_bytes: bytes) -> None:
+        with self._lock:
+            path = self.dir / f"{len(self._paths)}.pdf"
+            self._paths[pdf_url] = path
+        path.write_bytes(pdf_bytes)
+
+    def get(self, pdf_url: str, default: Optional[bytes] = None) -> Optional[bytes]:
+        path = self._paths.get(pdf_url)
+        if path is None:
+            return default
+        try:
+            return path.read_bytes()
+        except OSError:
+            return default
+
+    def __contains__(self, pdf_url: str) -> bool:
+        return pdf_url in self._paths
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def close(self) -> None:
+        self._paths.clear()
+        self._finalizer()
+
+
+class PDFPrefetcher:
+    """Download the whole day's set of source PDFs up front, in parallel."""
+
+    def __init__(self, content_processor, max_workers: Optional[int] = None):
+        self.cp = content_processor
+        self.max_workers = max_workers or int(os.getenv("PDF_PREFETCH_CONCURRENCY", "8"))
+        self.logger = logging.getLogger(__name__)
+
+    def collect_urls(self, lessons_by_course: Dict[str, List[dict]]) -> List[str]:
+        """Flatten lessons into a de-duplicated list of PDF URLs, keeping first-seen order."""
+        urls = []
+        for lessons in lessons_by_course.values():
+            for lesson in lessons:
+                for pdf_url in lesson.get("pdf_urls", []):
+                    if pdf_url and pdf_url.strip():
+                        urls.append(pdf_url.strip())
+        return list(dict.fromkeys(urls))
+
+    def _download(self, pdf_url: str) -> bytes:
+        return self.cp.download_pdf_from_url(pdf_url)
+
+    def _fetch(self, pdf_url: str, pdfs: SpooledPDFs) -> int:
+        """Download one PDF and spool it in the worker, so no future holds its bytes; returns its size."""
+        pdf_bytes = self._download(pdf_url)
+        try:
+            pdfs.add(pdf_url, pdf_bytes)
+        except OSError as e:
+            self.logger.warning(f"Could not spool {pdf_url}, it will be downloaded again when used: {e}")
+            return 0
+        return len(pdf_bytes)
+
+    def prefetch(self, pdf_urls: List[str]) -> Dict:
+        """
+        Download every URL with at most max_workers requests in flight.
+        Returns the downloaded PDFs keyed by URL (SpooledPDFs: on disk, read back
+        on demand) plus a list of failures (404s, non-PDF content, invalid URLs)
+        so callers can report them before any LLM work starts. A PDF that cannot be
+        spooled is left out, and its lesson downloads it again when processed.
+        """
+        unique_urls = list(dict.fromkeys(u.strip() for u in pdf_urls if u and u.strip()))
+        report = {
+            "requested": len(pdf_urls),
+            "unique": len(unique_urls),
+            "pdfs": SpooledPDFs(),
+            "failures": [],
+            "total_bytes": 0,
+            "duration_seconds": 0.0,
+        }
+        if not unique_urls:
+            return report
+
+        start = time.time()
+        workers = max(1, min(self.max_workers, len(unique_urls)))
+        self.logger.info(f"Prefetching {len(unique_urls)} source PDFs "
+                         f"({len(pdf_urls) - len(unique_urls)} duplicates skipped, {workers} workers)")
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-prefetch") as pool:
+            futures = {pool.submit(self._fetch, url, report["pdfs"]): url for url in unique_urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    report["total_bytes"] += future.result()
+                except Exception as e:
+                    report["failures"].append({"pdf_url": url, "error": str(e)})
+
+        report["duration_seconds"] = round(time.time() - start, 2)
+        self.logger.info(f"Prefetched {len(report['pdfs'])}/{len(unique_urls)} PDFs "
+                         f"({report['total_bytes']} bytes) in {report['duration_seconds']}s")
+        for failure in report["failures"]:
+            self.logger.warning(f"Prefetch failed for {failure['pdf_url']}: {failure['error']}")
+        return report
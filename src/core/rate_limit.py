@@ -0,0 +1,75 @@
+import os
+import time
+import asyncio
+import weakref
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+
+class RateLimiter:
+    """
+    Process-wide limit for provider requests: at most max_concurrent in flight,
+    and (optionally) request starts spaced to stay under requests_per_minute.
+    """
+
+    def __init__(self, max_concurrent: int, requests_per_minute: int = 0):
+        self.max_concurrent = max(1, max_concurrent)
+        self.requests_per_minute = requests_per_minute
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrent)
+        self._interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    @contextmanager
+    def slot(self):
+        self._semaphore.acquire()
+        try:
+            if self._interval:
+                with self._lock:
+                    now = time.monotonic()
+                    start = max(now, self._next_start)
+                    self._next_start = start + self._interval
+                if start > now:
+                    time.sleep(start - now)
+            yield
+        finally:
+            self._semaphore.release()
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str = "openai") -> RateLimiter:
+    """
+    Shared limiter per provider, configured from <NAME>_MAX_CONCURRENT_REQUESTS
+    and <NAME>_REQUESTS_PER_MINUTE (0 = no per-minute limit).
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            prefix = name.upper()
+            _limiters[name] = RateLimiter(
+                max_concurrent=int(os.getenv(f"{prefix}_MAX_CONCURRENT_REQUESTS", "8")),
+                requests_per_minute=int(os.getenv(f"{prefix}_REQUESTS_PER_MINUTE", "0")),
+            )
+        return _limiters[name]
+
+
+# event loop -> {name: semaphore}; an entry goes away with its loop
+_async_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_async_semaphore(name: str = "openai") -> asyncio.Semaphore:
+    """
+    Shared semaphore for async provider calls on the running event loop, sized by
+    <NAME>_ASYNC_MAX_CONCURRENT_REQUESTS. Async requests are cheap to keep in
+    flight, so this is usually set much higher than the thread-based limit.
+    """
+    loop = asyncio.get_running_loop()
+    with _limiters_lock:
+        semaphores = _async_semaphores.setdefault(loop, {})
+        if name not in semaphores:
+            limit = int(os.getenv(f"{name.upper()}_ASYNC_MAX_CONCURRENT_REQUESTS", "64"))
+            semaphores[name] = asyncio.BoundedSemaphore(max(1, limit))
+        return semaphores[name]
@@ -0,0 +1,261 @@
+"""
+Lecture script parsing into a section IR shared by the speech generators and the
+PDF renderer.
+
+Text scripts are tokenized line by line in a single pass with precompiled patterns;
+ScriptParser is incremental, so it also works on a script that is still being
+streamed from the LLM. Structured (JSON) script documents map onto the same IR
+without parsing.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional
+
+# Lecture structure; the header labels contain the keywords sections are detected by
+SECTION_HEADER_LABELS = {
+    "hook": "Opening Hook",
+    "objectives": "Learning Objectives",
+    "content": "Main Content",
+    "practice": "Practice & Application",
+    "recap": "Recap & Takeaways",
+}
+SECTION_TYPES = tuple(SECTION_HEADER_LABELS)
+
+# Metadata lines (PDF title block) are only skipped within the first lines of a script
+METADATA_LINES = 8
+# Longest line that can still be a keyword section header
+MAX_HEADER_CHARS = 80
+
+_METADATA_RE = re.compile(r"^(?:|---|Lecture Script:.*|Generated for:.*|.*Generated:.*|.*Source:.*)$")
+_HEADING_RE = re.compile(r"^(#{1,6})\s*")
+_LIST_MARKER_RE = re.compile(r"^(?:[-*•]|\d{1,2}[.)])\s+")
+_EMPHASIS_RE = re.compile(r"\*\*(.+?)\*\*|\*(.+?)\*|__(.+?)__")
+# [Title: 5-10 minutes] | [12:30] | any other [bracketed] text (a note for the teacher)
+_BRACKET_RE = re.compile(
+    r"\[(?:(?P<range_title>[^\[\]:]*?):\s*(?P<range_lo>\d+)\s*[-–]\s*(?P<range_hi>\d+)\s*minutes?"
+    r"|(?P<minute>\d{1,3}):(?P<second>\d{2})"
+    r"|(?P<note>[^\[\]]*))\]",
+    re.IGNORECASE)
+_DURATION_RE = re.compile(r"\((\d+)(?:\s*[-–]\s*(\d+))?\s*min(?:ute)?s?\)", re.IGNORECASE)
+_KEYWORD_RE = re.compile(
+    r"\b(?:(?P<hook>opening|hook|introduction)"
+    r"|(?P<objectives>learning objectives|objectives|goals)"
+    r"|(?P<content>main content|content|lesson|topic)"
+    r"|(?P<practice>practice|application|activity|exercise)"
+    r"|(?P<recap>recap|summary|conclusion|takeaway))",
+    re.IGNORECASE)
+_NOTE_PREFIX_RE = re.compile(r"^(?:note|speaker note|teaching tip)s?\s*:\s*", re.IGNORECASE)
+_SPACES_RE = re.compile(r"[ \t]{2,}")
+
+
+def section_type_for(title: str) -> str:
+    """Section type from the first section keyword in a title, 'content' if there is none."""
+    match = _KEYWORD_RE.search(title)
+    return match.lastgroup if match else "content"
+
+
+def section_header(section_type: str, title: str, minutes: Optional[int], start_minute: Optional[int]) -> str:
+    """Script header line, e.g. "## Main Content: Photosynthesis (9 minutes) [6:00]"."""
+    label = SECTION_HEADER_LABELS.get(section_type, SECTION_HEADER_LABELS["content"])
+    heading = label if title.lower() in label.lower() else f"{label}: {title}"
+    if minutes:
+        heading += f" ({minutes} minutes)"
+    if start_minute is not None:
+        heading += f" [{start_minute}:00]"
+    return f"## {heading}"
+
+
+@dataclass
+class ScriptSection:
+    title: str
+    type: str = "content"
+    order: int = 0
+    speech: str = ""                        # exactly what is read aloud
+    notes: List[str] = field(default_factory=list)  # teacher-only text, never spoken
+    start_minute: Optional[int] = None
+    duration_min: Optional[int] = None
+    duration_max: Optional[int] = None
+    timing_markers: List[int] = field(default_factory=list)  # [m:ss] markers in the body, in seconds
+
+    @property
+    def minutes(self) -> Optional[int]:
+        return self.duration_max or self.duration_min
+
+    def header(self) -> str:
+        return section_header(self.type, self.title, self.minutes, self.start_minute)
+
+    def render_text(self) -> str:
+        block = f"{self.header()}\n\n{self.speech}"
+        if self.notes:
+            block += "\n\n" + "\n".join(f"[Note: {note}]" for note in self.notes)
+        return block
+
+    @classmethod
+    def from_document_section(cls, section: dict, order: int = 0) -> "ScriptSection":
+        return cls(title=section["title"], type=section.get("type", "content"), order=order,
+                   speech=section.get("speech", "").strip(), notes=list(section.get("notes") or []),
+                   start_minute=section.get("start_minute"),
+                   duration_min=section.get("minutes"), duration_max=section.get("minutes"))
+
+    def to_document_section(self) -> dict:
+        return {"type": self.type, "title": self.title, "start_minute": self.start_minute,
+                "minutes": self.minutes, "speech": self.speech, "notes": list(self.notes)}
+
+
+@dataclass
+class ScriptDocument:
+    title: str
+    sections: List[ScriptSection] = field(default_factory=list)
+
+    @classmethod
+    def from_document(cls, script_doc: dict) -> "ScriptDocument":
+        """IR for a structured (JSON) script document."""
+        return cls(title=script_doc.get("title", ""),
+                   sections=[ScriptSection.from_document_section(section, i)
+                             for i, section in enumerate(script_doc.get("sections", []))])
+
+    def to_document(self) -> dict:
+        """Structured (JSON) script document for the IR, the inverse of from_document."""
+        return {"title": self.title, "sections": [section.to_document_section() for section in self.sections]}
+
+    def speakable(self) -> List[ScriptSection]:
+        return [section for section in self.sections if section.speech]
+
+    def speech_text(self) -> str:
+        return "\n\n".join(section.speech for section in self.speakable())
+
+    def render_text(self) -> str:
+        """Readable script text (for the PDF)."""
+        return "\n\n".join([f"# {self.title}"] + [section.render_text() for section in self.sections])
+
+
+class ScriptParser:
+    """
+    Incremental single-pass parser: feed() lines in order and it returns each
+    section once the next section header arrives; close() returns the last one.
+
+    A line is a section header if it is a markdown heading, carries a
+    [Title: a-b minutes] marker, or is a short line (not a sentence) containing a
+    section keyword. [m:ss] markers become timing markers, other [bracketed] text
+    and "Note:" lines become notes, and list markers and emphasis are stripped, so
+    speech holds only what is read aloud.
+    """
+
+    def __init__(self):
+        self.title = ""
+        self._line_number = 0
+        self._in_preamble = True
+        self._order = 0
+        self._current = ScriptSection(title="Introduction", type="hook")
+        self._speech: List[str] = []
+
+    def _has_body(self) -> bool:
+        return bool(self._current.notes or any(self._speech))
+
+    def _finish(self) -> Optional[ScriptSection]:
+        if not self._has_body():
+            return None
+        section = self._current
+        section.speech = "\n".join(self._speech).strip()
+        section.order = self._order
+        self._order += 1
+        self._speech = []
+        return section
+
+    def _start_section(self, title: str, section_type: str, start_minute: Optional[int],
+                       duration_min: Optional[int], duration_max: Optional[int]) -> Optional[ScriptSection]:
+        finished = self._finish()
+        self._current = ScriptSection(title=title or SECTION_HEADER_LABELS[section_type], type=section_type,
+                                      start_minute=start_minute, duration_min=duration_min,
+                                      duration_max=duration_max)
+        return finished
+
+    def feed(self, line: str) -> Optional[ScriptSection]:
+        self._line_number += 1
+        text = line.strip()
+        if self._in_preamble:
+            if self._line_number <= METADATA_LINES and _METADATA_RE.match(text):
+                return None
+            self._in_preamble = False
+        if not text:
+            if self._speech and self._speech[-1]:
+                self._speech.append("")
+            return None
+
+        heading = _HEADING_RE.match(text)
+        if heading:
+            text = text[heading.end():]
+        text = _EMPHASIS_RE.sub(r"\1\2\3", _LIST_MARKER_RE.sub("", text, count=1))
+
+        # Pull every [bracketed] span out of the line in one scan
+        range_match = None
+        start_minute = None
+        markers: List[int] = []
+        notes: List[str] = []
+        if "[" in text:
+            def take_bracket(match):
+                nonlocal range_match, start_minute
+                if match.group("range_lo") is not None:
+                    range_match = match
+                elif match.group("minute") is not None:
+                    markers.append(int(match.group("minute")) * 60 + int(match.group("second")))
+                    if start_minute is None:
+                        start_minute = int(match.group("minute"))
+                elif match.group("note").strip():
+                    notes.append(_NOTE_PREFIX_RE.sub("", match.group("note").strip()))
+                return " "
+            text = _SPACES_RE.sub(" ", _BRACKET_RE.sub(take_bracket, text)).strip()
+
+        if heading and len(heading.group(1)) == 1 and not self.title and not self._has_body():
+            self.title = text
+            return None
+
+        is_header = bool(heading) or range_match is not None or (
+            text and len(text) <= MAX_HEADER_CHARS and text[-1] not in ".?!" and _KEYWORD_RE.search(text))
+        if is_header:
+            duration = _DURATION_RE.search(text)
+            title = _SPACES_RE.sub(" ", _DURATION_RE.sub("", text)).replace(" :", ":").strip().rstrip(":-–").strip()
+            if range_match is not None:
+                title = range_match.group("range_title").strip() or title
+                duration_min, duration_max = int(range_match.group("range_lo")), int(range_match.group("range_hi"))
+            elif duration:
+                duration_min = int(duration.group(1))
+                duration_max = int(duration.group(2) or duration.group(1))
+            else:
+                duration_min = duration_max = None
+            section_type = section_type_for(title)
+            label = SECTION_HEADER_LABELS[section_type]
+            if title[:len(label) + 1].lower() == f"{label.lower()}:":
+                title = title[len(label) + 1:].strip()  # rendered header "<label>: <title>"
+            finished = self._start_section(title, section_type, start_minute, duration_min, duration_max)
+            self._current.notes.extend(notes)
+            self._current.timing_markers.extend(markers)
+            return finished
+
+        if _NOTE_PREFIX_RE.match(text):
+            notes.append(_NOTE_PREFIX_RE.sub("", text))
+            text = ""
+        self._current.notes.extend(notes)
+        self._current.timing_markers.extend(markers)
+        if text:
+            self._speech.append(text)
+        return None
+
+    def close(self) -> Optional[ScriptSection]:
+        return self._finish()
+
+    def iter_sections(self, lines: Iterable[str]) -> Iterator[ScriptSection]:
+        for line in lines:
+            section = self.feed(line)
+            if section is not None:
+                yield section
+        section = self.close()
+        if section is not None:
+            yield section
+
+
+def parse_script(script_text: str, title: str = "") -> ScriptDocument:
+    """Parse a whole text script into the section IR."""
+    parser = ScriptParser()
+    sections = list(parser.iter_sections(script_text.split("\n")))
+    return ScriptDocument(title=parser.title or title, sections=sections)
@@ -0,0 +1,131 @@
+import os
+import zlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+try:
+    from src.core.disk_cache import DiskCache
+    from src.core.tokens import count_tokens
+    from src.core.content_selector import split_into_units
+    from src.core.rate_limit import get_rate_limiter
+except Exception:
+    from disk_cache import DiskCache
+    from tokens import count_tokens
+    from content_selector import split_into_units
+    from rate_limit import get_rate_limiter
+
+# Bump when the summary prompts change so cached chunk summaries are not reused
+SUMMARY_PROMPT_VERSION = "1"
+
+# Largest input handed to a single summarize/reduce call
+MAX_CALL_INPUT_TOKENS = 12000
+
+
+def chunk_units(units: List[str], min_tokens: int = 800, max_tokens: int = 1600,
+                boundary_modulus: int = 4) -> List[str]:
+    """
+    Group paragraph units into chunks using content-defined boundaries: once a
+    chunk has min_tokens, it ends after any unit whose hash is divisible by
+    boundary_modulus (or at max_tokens). An edit to one paragraph therefore only
+    changes the chunks around it, and every other chunk keeps its hash.
+    """
+    chunks = []
+    current, current_tokens = [], 0
+    for unit in units:
+        unit_tokens = count_tokens(unit)
+        if current and current_tokens + unit_tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += unit_tokens
+        if current_tokens >= min_tokens and zlib.crc32(unit.encode("utf-8")) % boundary_modulus == 0:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+class SourceSummarizer:
+    """
+    Map-reduce summarization for source documents far larger than the prompt budget:
+    chunks are summarized concurrently with a cheap model (under the shared OpenAI
+    rate limit), then the summaries are reduced into one dense brief.
+    """
+
+    def __init__(self, chat_completion: Callable[..., str], model: str = None):
+        self.chat_completion = chat_completion
+        # SUMMARY_MODEL, else the model router's economy chat model: summaries are where a cheap model pays off
+        self.model = model or os.getenv("SUMMARY_MODEL") or os.getenv("ROUTE_ECONOMY_CHAT_MODEL", "gpt-4o-mini")
+        self.logger = logging.getLogger(__name__)
+        # Chunk summaries keyed by chunk hash, so a revised PDF only re-summarizes changed chunks
+        self.cache = DiskCache(
+            os.getenv("SUMMARY_CACHE_DIR", "temp/cache/chunk_summaries"),
+            namespace=f"{self.model}-v{SUMMARY_PROMPT_VERSION}",
+            max_bytes=int(os.getenv("SUMMARY_CACHE_MAX_MB", "128")) * 1024 * 1024,
+        )
+
+    def summarize_chunk(self, chunk: str) -> Tuple[str, bool]:
+        """Summarize one chunk; returns (summary, was_cached)."""
+        cache_key = DiskCache.make_key(chunk)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached.decode("utf-8"), True
+
+        system_prompt = """
+                You condense textbook material for a teacher preparing a lecture.
+                Summarize the passage into dense bullet points that keep every key concept, definition,
+                worked example, number and named fact. Drop filler, navigation text and exercises' answers.
+                """
+        summary = self.chat_completion(system_prompt, chunk, model=self.model,
+                                       max_tokens=400, temperature=0.0, use_cache=False,
+                                       cache_response=False).strip()
+        if summary:
+            self.cache.set(cache_key, summary.encode("utf-8"))
+        return summary, False
+
+    def _reduce(self, summaries: List[str], lesson_title: str, token_budget: int) -> str:
+        system_prompt = f"""
+                You merge section summaries of a textbook into a single dense lecture brief.
+                Keep the material most relevant to the lesson, in a logical teaching order,
+                with key definitions, examples and facts. Stay under {int(token_budget * 0.9)} tokens.
+                """
+        user_prompt = f'Lesson Title: "{lesson_title}"\n\nSection summaries:\n\n' + "\n\n".join(summaries)
+        return self.chat_completion(system_prompt, user_prompt, model=self.model,
+                                    max_tokens=token_budget, temperature=0.2, use_cache=True).strip()
+
+    def summarize(self, pages: List[Tuple[int, str]], lesson_title: str, token_budget: int) -> dict:
+        """Build a brief of at most ~token_budget tokens from the given pages."""
+        chunks = chunk_units([text for _, text in split_into_units(pages)])
+        workers = max(1, min(len(chunks), get_rate_limiter("openai").max_concurrent))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chunk-summary") as pool:
+            results = list(pool.map(self.summarize_chunk, chunks))
+        summaries = [summary for summary, _ in results if summary]
+        cached_count = sum(1 for _, was_cached in results if was_cached)
+        self.logger.info(f"Summarized {len(chunks)} chunks ({cached_count} from cache) with {self.model}")
+
+        # Reduce in groups until everything fits a single call, then into the budget
+        rounds = 0
+        while (sum(count_tokens(s) for s in summaries) > MAX_CALL_INPUT_TOKENS
+               and len(summaries) > 1 and rounds < 5):
+            groups, current, current_tokens = [], [], 0
+            for summary in summaries:
+                summary_tokens = count_tokens(summary)
+                if current and current_tokens + summary_tokens > MAX_CALL_INPUT_TOKENS:
+                    groups.append(current)
+                    current, current_tokens = [], 0
+                current.append(summary)
+                current_tokens += summary_tokens
+            groups.append(current)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="summary-reduce") as pool:
+                summaries = list(pool.map(lambda g: self._reduce(g, lesson_title, token_budget), groups))
+            rounds += 1
+
+        combined = "\n\n".join(summaries)
+        if count_tokens(combined) > token_budget:
+            combined = self._reduce(summaries, lesson_title, token_budget)
+            rounds += 1
+
+        return {"text": combined, "chunks": len(chunks), "cached_chunks": cached_count,
+                "reduce_rounds": rounds, "tokens": count_tokens(combined)}
@@ -1,16 +1,19 @@
 import os
 import io
-import re
 import queue
 import threading
 import time
 import json
+import shutil
+import asyncio
 import logging
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, List, Dict, Tuple, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import replace
 import openai
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import requests
 from datetime import datetime
 import PyPDF2
@@ -24,16 +27,30 @@ try:
 except Exception:
     from supabase_client import SupabaseClient
 
-logger = logging.getLogger(__name__)
+try:
+    from src.core.rate_limit import get_async_semaphore
+    from src.core.model_router import get_spend_ledger
+    from src.core.tts_cache import TTSCache, get_tts_cache
+    from src.core.audio_buffer import PcmBuffer, PcmSegment, decode_audio, encode_audio
+    from src.core.audio_assembler import Gap, StreamingAssembler
+    from src.core.delivery_profiles import encode_with_profile, get_delivery_profile, open_profile_assembler
+    from src.core.cpu_pool import get_cpu_pool, reset_cpu_pool
+    from src.core.text_chunker import pack_chunks
+    from src.core.script_parser import SECTION_TYPES, ScriptDocument, ScriptParser, ScriptSection, parse_script
+    from src.core.lesson_manifest import LessonManifest
+except Exception:
+    from rate_limit import get_async_semaphore
+    from model_router import get_spend_ledger
+    from tts_cache import TTSCache, get_tts_cache
+    from audio_buffer import PcmBuffer, PcmSegment, decode_audio, encode_audio
+    from audio_assembler import Gap, StreamingAssembler
+    from delivery_profiles import encode_with_profile, get_delivery_profile, open_profile_assembler
+    from cpu_pool import get_cpu_pool, reset_cpu_pool
+    from text_chunker import pack_chunks
+    from script_parser import SECTION_TYPES, ScriptDocument, ScriptParser, ScriptSection, parse_script
+    from lesson_manifest import LessonManifest
 
-@dataclass
-class LectureSegment:
-    title: str
-    content: str
-    duration_min: int
-    duration_max: int
-    order: int
-    segment_type: str  # 'hook', 'objectives', 'content', 'practice', 'recap'
+logger = logging.getLogger(__name__)
 
 class EnhancedTimedSpeechGenerator:
     def __init__(self, openai_api_key: Optional[str] = None):
@@ -43,20 +60,52 @@ class EnhancedTimedSpeechGenerator:
             raise ValueError("Valid OpenAI API key is required")
         
         self.openai_client = OpenAI(api_key=self.openai_api_key)
+        self._async_openai_client = None
         self.logger = logging.getLogger(__name__)
         
         # Audio generation settings
         self.voice = "alloy"  # Default voice
         self.model = "tts-1"
-        self.max_chars_per_chunk = 4000
-        self.max_concurrent_workers = 5
+        self.max_chars_per_chunk = int(os.getenv("TTS_MAX_CHARS_PER_REQUEST", "4096"))  # OpenAI TTS input limit
+        self.max_concurrent_workers = int(os.getenv("TTS_MAX_CONCURRENT_REQUESTS", "5"))
         self.audio_bucket = "lecture-audios"
         self.sample_rate = 24000  # OpenAI TTS output sample rate
+        self.tts_timeout_seconds = float(os.getenv("TTS_TIMEOUT_SECONDS", "120"))
+        self.chunk_retries = int(os.getenv("TTS_CHUNK_RETRIES", "2"))
+        # Format requested from the TTS API for chunks that are mixed before encoding:
+        # "pcm" (raw 24 kHz 16-bit mono) or "wav" skip a lossy decode; "mp3" is the API default
+        self.audio_format = os.getenv("TTS_INTERMEDIATE_FORMAT", "pcm")
+        self.tts_cache = get_tts_cache()
+        
+        # Silence after each section (GAP_SECONDS), overridable per section type (GAP_SECONDS_<TYPE>)
+        self.gap_seconds = float(os.getenv("GAP_SECONDS", "30"))
+        self.gap_seconds_by_type = {
+            section_type: float(os.getenv(f"GAP_SECONDS_{section_type.upper()}", str(self.gap_seconds)))
+            for section_type in SECTION_TYPES
+        }
+        
+        # Final lecture encoding (AUDIO_DELIVERY_PROFILE), done in the shared CPU pool unless disabled
+        self.delivery_profile = get_delivery_profile()
+        self.encode_in_process_pool = os.getenv("AUDIO_ENCODE_IN_PROCESS_POOL", "true").lower() == "true"
+        # Sections with no gap between them are synthesized as one text, so their sentences share requests
+        self.merge_gapless_sections = os.getenv("TTS_MERGE_GAPLESS_SECTIONS", "true").lower() == "true"
+        # Keep each lesson's section audio so regeneration only synthesizes new or edited sections
+        self.reuse_sections = os.getenv("TTS_REUSE_SECTIONS", "true").lower() == "true"
         
         # Create temp directory for audio processing
         self.temp_dir = Path("temp/audio_chunks")
         self.temp_dir.mkdir(parents=True, exist_ok=True)
 
+    def set_model(self, model: Optional[str]):
+        """Use a routed TTS model (e.g. "tts-1" or "tts-1-hd") for the next requests."""
+        if model:
+            self.model = model
+
+    def set_delivery_profile(self, name: Optional[str]):
+        """Encode lectures with a named delivery profile (e.g. "zoom_voice", "archive")."""
+        if name:
+            self.delivery_profile = get_delivery_profile(name)
+
     def set_voice(self, voice: str):
         """Set the voice for text-to-speech generation."""
         valid_voices = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
@@ -66,177 +115,222 @@ class EnhancedTimedSpeechGenerator:
             logger.warning(f"Invalid voice '{voice}'. Using default 'alloy'")
 
     def clean_script_for_speech(self, script_text: str) -> str:
-        """Clean the entire script for speech - remove only metadata, keep all lecture content."""
-        lines = script_text.split('\n')
-        cleaned_lines = []
-        skip_metadata = True
-        
-        for i, line in enumerate(lines):
-            line_stripped = line.strip()
-            
-            # Skip only the first few metadata lines
-            if skip_metadata and i < 8:
-                if (line_stripped.startswith('Lecture Script:') or 
-                    line_stripped.startswith('Generated for:') or 
-                    line_stripped.startswith('Source:') or 
-                    line_stripped.startswith('Generated:') or
-                    line_stripped == '' or
-                    line_stripped == '---' or
-                    'Generated:' in line_stripped or
-                    'Source:' in line_stripped):
-                    continue
-                else:
-                    skip_metadata = False
-            
-            if not skip_metadata:
-                # Only remove obvious non-speech elements but keep the lecture content
-                if (not line_stripped.startswith('[Speaker note') and 
-                    not line_stripped.startswith('[Teaching tip') and
-                    not line_stripped.startswith('[Show slide')):
-                    # Clean up formatting but keep content
-                    cleaned_line = re.sub(r'\*\*(.*?)\*\*', r'\1', line)  # Remove bold
-                    cleaned_line = re.sub(r'\*(.*?)\*', r'\1', cleaned_line)  # Remove italic
-                    cleaned_line = re.sub(r'#{1,6}\s*', '', cleaned_line)  # Remove headers
-                    cleaned_lines.append(cleaned_line)
-        
-        return '\n'.join(cleaned_lines).strip()
+        """Only the spoken text of a script: no metadata, headers, notes or timing markers."""
+        return parse_script(script_text).speech_text()
 
-    def split_script_into_natural_sections(self, script_text: str) -> List[Dict]:
+    def split_script_into_natural_sections(self, script_text: str) -> List[ScriptSection]:
         """Split script into natural sections based on headers and content structure."""
-        
-        # Clean the script first
-        clean_script = self.clean_script_for_speech(script_text)
-        
-        # Look for section headers or timing patterns
-        sections = []
-        current_section = {"title": "Introduction", "content": "", "order": 0}
-        lines = clean_script.split('\n')
-        
-        section_patterns = [
-            r'(opening|hook|introduction)',
-            r'(learning objectives|objectives|goals)',
-            r'(main content|content|lesson|topic)',
-            r'(practice|application|activity|exercise)',
-            r'(recap|summary|conclusion|takeaway)'
-        ]
-        
-        current_content = []
-        section_order = 0
-        
-        for line in lines:
-            line_stripped = line.strip().lower()
-            
-            # Check if this line indicates a new section
-            is_new_section = False
-            section_title = ""
-            
-            # Look for timing markers that indicate sections
-            timing_match = re.search(r'\[([^:]*?):\s*(\d+)[-–](\d+)\s*minutes?\]', line, re.IGNORECASE)
-            if timing_match:
-                section_title = timing_match.group(1).strip()
-                is_new_section = True
-            else:
-                # Look for section headers
-                for pattern in section_patterns:
-                    if re.search(pattern, line_stripped):
-                        section_title = line.strip()
-                        is_new_section = True
-                        break
-            
-            if is_new_section and current_content:
-                # Save the previous section
-                current_section["content"] = '\n'.join(current_content).strip()
-                if current_section["content"]:
-                    sections.append(current_section.copy())
-                
-                # Start new section
-                current_section = {
-                    "title": section_title or f"Section {section_order + 1}",
-                    "content": "",
-                    "order": section_order
-                }
-                section_order += 1
-                current_content = []
-            else:
-                # Add content to current section (skip the timing marker lines)
-                if not re.search(r'\[.*?minutes?\]', line):
-                    current_content.append(line)
-        
-        # Add the last section
-        if current_content:
-            current_section["content"] = '\n'.join(current_content).strip()
-            if current_section["content"]:
-                sections.append(current_section)
-        
-        # If no sections found, treat entire script as one section
-        if not sections:
-            sections = [{
-                "title": "Complete Lecture",
-                "content": clean_script,
-                "order": 0
-            }]
+        sections = list(self._iter_natural_sections(script_text.split('\n')))
         
         self.logger.info(f"Split script into {len(sections)} sections")
-        for i, section in enumerate(sections):
-            self.logger.info(f"Section {i}: '{section['title']}' - {len(section['content'])} characters")
+        for section in sections:
+            self.logger.info(f"Section {section.order}: '{section.title}' ({section.type}) - "
+                             f"{len(section.speech)} characters, {len(section.notes)} notes")
         
         return sections
 
-    def text_to_speech_chunk(self, text: str, output_path: str) -> bool:
-        """Convert a single text chunk to speech using OpenAI's TTS API."""
+    def _iter_natural_sections(self, lines: Iterable[str]) -> Iterator[ScriptSection]:
+        """
+        Parse script lines into sections with speech, yielding each section as soon
+        as the next section header arrives. Works on any line iterable, including a
+        script that is still being streamed from the LLM.
+        """
+        for section in ScriptParser().iter_sections(lines):
+            if section.speech:
+                yield section
+
+    def _iter_stream_lines(self, text_deltas: Iterable[str], script_parts: List[str]) -> Iterator[str]:
+        """Turn streamed text deltas into complete lines, recording the raw text in script_parts."""
+        buffer = ""
+        for delta in text_deltas:
+            if not delta:
+                continue
+            script_parts.append(delta)
+            buffer += delta
+            *complete_lines, buffer = buffer.split('\n')
+            yield from complete_lines
+        if buffer:
+            yield buffer
+
+    def _tts_cache_key(self, text: str) -> str:
+        return self.tts_cache.make_key("openai", self.model, self.voice, text, self.audio_format)
+
+    def _tts_audio_bytes(self, text: str) -> Optional[bytes]:
+        """Encoded audio for a single text chunk from the TTS cache or OpenAI's TTS API."""
         try:
             if not text.strip():
                 self.logger.warning("Empty text provided to TTS")
-                return False
+                return None
+            
+            cache_key = self._tts_cache_key(text) if self.tts_cache else None
+            cached = self.tts_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                return cached
                 
             response = self.openai_client.audio.speech.create(
                 model=self.model,
                 voice=self.voice,
-                input=text.strip()
+                input=text.strip(),
+                response_format=self.audio_format
             )
+            get_spend_ledger().record_tts(self.model, len(text.strip()))
             
-            with open(output_path, "wb") as audio_file:
-                audio_file.write(response.content)
-                
+            if cache_key:
+                self.tts_cache.set(cache_key, response.content)
+            return response.content
+        except Exception as e:
+            logger.error(f"OpenAI TTS Error for chunk: {str(e)}")
+            return None
+
+    def _write_chunk_file(self, audio_bytes: bytes, output_path: str) -> None:
+        """Write chunk audio as-is if the file extension matches its format, else re-encode it."""
+        if Path(output_path).suffix.lower().lstrip(".") == self.audio_format:
+            Path(output_path).write_bytes(audio_bytes)
+        else:
+            encode_audio(*self._decode_chunk(audio_bytes), output_path)
+
+    def _decode_chunk(self, audio_bytes: bytes) -> Tuple[np.ndarray, int]:
+        return decode_audio(audio_bytes, self.audio_format, self.sample_rate)
+
+    def text_to_speech_chunk(self, text: str, output_path: str) -> bool:
+        """Convert a single text chunk to speech using OpenAI's TTS API (or the TTS cache)."""
+        audio_bytes = self._tts_audio_bytes(text)
+        if audio_bytes is None:
+            return False
+        try:
+            self._write_chunk_file(audio_bytes, output_path)
             return True
+        except Exception as e:
+            logger.error(f"Error writing TTS chunk: {str(e)}")
+            return False
+
+    @property
+    def async_openai_client(self) -> AsyncOpenAI:
+        """AsyncOpenAI client, created on first use by the async code paths."""
+        if self._async_openai_client is None:
+            self._async_openai_client = AsyncOpenAI(api_key=self.openai_api_key)
+        return self._async_openai_client
+
+    async def _atts_audio_bytes(self, text: str, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Async version of _tts_audio_bytes on AsyncOpenAI. Bounded by the shared
+        async semaphore and a per-request timeout; cancellation is propagated.
+        """
+        if not text.strip():
+            self.logger.warning("Empty text provided to TTS")
+            return None
+        try:
+            cache_key = self._tts_cache_key(text) if self.tts_cache else None
+            cached = await asyncio.to_thread(self.tts_cache.get, cache_key) if cache_key else None
+            if cached is not None:
+                return cached
+            
+            async with get_async_semaphore("openai"):
+                response = await asyncio.wait_for(
+                    self.async_openai_client.audio.speech.create(
+                        model=self.model,
+                        voice=self.voice,
+                        input=text.strip(),
+                        response_format=self.audio_format
+                    ),
+                    timeout=timeout or self.tts_timeout_seconds,
+                )
+            get_spend_ledger().record_tts(self.model, len(text.strip()))
+            if cache_key:
+                await asyncio.to_thread(self.tts_cache.set, cache_key, response.content)
+            return response.content
+        except asyncio.TimeoutError:
+            logger.error(f"OpenAI TTS timed out after {timeout or self.tts_timeout_seconds}s")
+            return None
         except Exception as e:
             logger.error(f"OpenAI TTS Error for chunk: {str(e)}")
+            return None
+
+    async def atext_to_speech_chunk(self, text: str, output_path: str,
+                                    timeout: Optional[float] = None) -> bool:
+        """Async version of text_to_speech_chunk."""
+        audio_bytes = await self._atts_audio_bytes(text, timeout)
+        if audio_bytes is None:
             return False
+        try:
+            await asyncio.to_thread(self._write_chunk_file, audio_bytes, output_path)
+            return True
+        except Exception as e:
+            logger.error(f"Error writing TTS chunk: {str(e)}")
+            return False
+
+    async def agenerate_audio_from_text(self, text: str, output_path: str) -> bool:
+        """
+        Async version of generate_audio_from_text: all chunks are requested concurrently,
+        decoded in memory and encoded once, in order. If any chunk fails, the remaining
+        requests are cancelled.
+        """
+        if not text.strip():
+            logger.error("Empty text provided for audio generation")
+            return False
+
+        if len(text) <= self.max_chars_per_chunk:
+            return await self.atext_to_speech_chunk(text, output_path)
+
+        chunks = self.split_text_into_chunks(text)
+        if not chunks:
+            logger.error("No valid text chunks found")
+            return False
+
+        tasks = [asyncio.create_task(self._atts_audio_bytes(chunk_text)) for chunk_text in chunks]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                if await finished is None:
+                    return False
+            decoded = await asyncio.to_thread(self._decode_chunks, [task.result() for task in tasks])
+            if decoded is None:
+                return False
+            await asyncio.to_thread(encode_audio, decoded[0], decoded[1], output_path)
+            return True
+        except Exception as e:
+            logger.error(f"Error in agenerate_audio_from_text: {str(e)}")
+            return False
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _decode_chunks(self, chunk_audio: List[bytes]) -> Optional[Tuple[np.ndarray, int]]:
+        """Decode encoded chunk audio in memory and join it, in order, into one PCM buffer."""
+        parts = []
+        sample_rate = None
+        for audio_bytes in chunk_audio:
+            samples, sr = self._decode_chunk(audio_bytes)
+            if sample_rate is None:
+                sample_rate = sr
+            elif sr != sample_rate:
+                self.logger.warning(f"Sample rate mismatch: {sr} vs {sample_rate}")
+            parts.append(samples)
+        if not parts:
+            return None
+        return (parts[0] if len(parts) == 1 else np.concatenate(parts)), sample_rate
 
     def combine_audio_files(self, audio_files: List[str], output_path: str) -> bool:
-        """Combine multiple audio files using soundfile and numpy."""
+        """
+        Combine multiple audio files into one, streaming them block by block
+        through a StreamingAssembler (peak memory does not grow with length).
+        """
         try:
-            combined_audio = []
-            sample_rate = None
-            
+            existing_files = []
             for audio_file in audio_files:
-                if not os.path.exists(audio_file):
+                if os.path.exists(audio_file):
+                    existing_files.append(audio_file)
+                else:
                     self.logger.warning(f"Audio file not found: {audio_file}")
-                    continue
-                    
-                # Read audio file
-                audio_data, sr = sf.read(audio_file)
-                
-                if sample_rate is None:
-                    sample_rate = sr
-                elif sr != sample_rate:
-                    self.logger.warning(f"Sample rate mismatch: {sr} vs {sample_rate}")
-                
-                # Ensure audio is 1D (mono)
-                if len(audio_data.shape) > 1:
-                    audio_data = np.mean(audio_data, axis=1)
-                
-                combined_audio.append(audio_data)
             
-            if not combined_audio:
+            if not existing_files:
                 self.logger.error("No valid audio files to combine")
                 return False
-                
-            # Concatenate all audio
-            final_audio = np.concatenate(combined_audio)
             
-            # Write combined audio to output file
-            sf.write(output_path, final_audio, sample_rate)
+            sample_rate = sf.info(existing_files[0]).samplerate
+            with StreamingAssembler(output_path, sample_rate) as assembler:
+                for audio_file in existing_files:
+                    assembler.write_file(audio_file)
             return True
             
         except Exception as e:
@@ -244,14 +338,10 @@ class EnhancedTimedSpeechGenerator:
             return False
 
     def create_silence_audio(self, duration_seconds: int, output_path: str) -> bool:
-        """Create a silence audio file for the specified duration."""
+        """Create a silence audio file for the specified duration (lesson assembly uses Gap entries instead)."""
         try:
-            # Create silence array
-            silence_samples = int(self.sample_rate * duration_seconds)
-            silence = np.zeros(silence_samples, dtype=np.float32)
-            
-            # Write silence to file
-            sf.write(output_path, silence, self.sample_rate)
+            with StreamingAssembler(output_path, self.sample_rate) as assembler:
+                assembler.write(Gap(duration_seconds))
             return True
         except Exception as e:
             logger.error(f"Error creating silence audio: {str(e)}")
@@ -262,213 +352,451 @@ class EnhancedTimedSpeechGenerator:
         try:
             if not os.path.exists(audio_path):
                 return 0.0
-            audio_data, sample_rate = sf.read(audio_path)
-            return len(audio_data) / sample_rate
+            # Frame count from the header, without decoding the audio
+            return sf.info(audio_path).duration
         except Exception as e:
             logger.error(f"Error getting audio duration: {str(e)}")
             return 0.0
 
-    def generate_audio_from_text(self, text: str, output_path: str) -> bool:
-        """Generate audio from text with proper chunking."""
+    def _tts_chunk_with_retry(self, text: str) -> Optional[bytes]:
+        """Synthesize one chunk, retrying just this chunk (with backoff) if it fails."""
+        for attempt in range(self.chunk_retries + 1):
+            audio_bytes = self._tts_audio_bytes(text)
+            if audio_bytes is not None:
+                return audio_bytes
+            if attempt < self.chunk_retries:
+                delay = 0.5 * (2 ** attempt)
+                logger.warning(f"TTS chunk failed (attempt {attempt + 1}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+        return None
+
+    def _new_chunk_pool(self) -> ThreadPoolExecutor:
+        """Pool that bounds the number of TTS requests in flight to max_concurrent_workers."""
+        return ThreadPoolExecutor(max_workers=self.max_concurrent_workers, thread_name_prefix="tts-chunk")
+
+    def synthesize_text_pcm(self, text: str,
+                            chunk_pool: Optional[ThreadPoolExecutor] = None) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Synthesize text to mono float32 PCM in memory. Chunks are requested
+        concurrently (on chunk_pool, or a pool of max_concurrent_workers), decoded
+        from the response bytes and joined in their original order.
+        Returns (samples, sample_rate) or None on failure.
+        """
         try:
             if not text.strip():
                 logger.error("Empty text provided for audio generation")
-                return False
+                return None
 
-            # For shorter texts, generate directly
-            if len(text) <= self.max_chars_per_chunk:
-                return self.text_to_speech_chunk(text, output_path)
-            
-            # For longer texts, split into chunks
+            # Shorter texts are a single request (still through the pool, so it counts toward the limit)
             chunks = self.split_text_into_chunks(text)
             if not chunks:
                 logger.error("No valid text chunks found")
-                return False
-            
-            # Generate audio for each chunk
-            chunk_files = []
-            for i, chunk_text in enumerate(chunks):
-                chunk_file = f"{output_path}_chunk_{i:03d}.mp3"
-                if self.text_to_speech_chunk(chunk_text, chunk_file):
-                    chunk_files.append(chunk_file)
-                else:
-                    # Clean up on failure
-                    for cf in chunk_files:
-                        try:
-                            os.remove(cf)
-                        except:
-                            pass
-                    return False
-            
-            # Combine chunks
-            success = self.combine_audio_files(chunk_files, output_path)
+                return None
             
-            # Clean up chunk files
-            for chunk_file in chunk_files:
-                try:
-                    os.remove(chunk_file)
-                except:
-                    pass
+            own_pool = chunk_pool is None
+            pool = self._new_chunk_pool() if own_pool else chunk_pool
+            try:
+                futures = [pool.submit(self._tts_chunk_with_retry, chunk_text) for chunk_text in chunks]
+                chunk_audio = [future.result() for future in futures]
+            finally:
+                if own_pool:
+                    pool.shutdown(wait=True)
+            
+            failed = sum(1 for audio_bytes in chunk_audio if audio_bytes is None)
+            if failed:
+                logger.error(f"{failed} of {len(chunks)} chunks failed after retries")
+                return None
             
-            return success
+            # Futures are read in submission order, so order is preserved
+            return self._decode_chunks(chunk_audio)
             
         except Exception as e:
-            logger.error(f"Error in generate_audio_from_text: {str(e)}")
+            logger.error(f"Error in synthesize_text_pcm: {str(e)}")
+            return None
+
+    def generate_audio_from_text(self, text: str, output_path: str,
+                                 chunk_pool: Optional[ThreadPoolExecutor] = None) -> bool:
+        """
+        Generate audio from text with proper chunking. Chunks are synthesized
+        concurrently and assembled in memory; the file is written (encoded) once.
+        """
+        decoded = self.synthesize_text_pcm(text, chunk_pool)
+        if decoded is None:
+            return False
+        try:
+            encode_audio(decoded[0], decoded[1], output_path)
+            return True
+        except Exception as e:
+            logger.error(f"Error writing audio file: {str(e)}")
             return False
 
     def split_text_into_chunks(self, text: str) -> List[str]:
-        """Split text into chunks that respect sentence boundaries."""
-        # Clean up the text first
-        text = re.sub(r'\s+', ' ', text.strip())
-        
-        # Split by paragraphs first
-        paragraphs = text.split('\n\n')
-        chunks = []
-        current_chunk = ""
-        
-        for paragraph in paragraphs:
-            # If adding this paragraph would exceed the limit, save current chunk
-            if len(current_chunk) + len(paragraph) + 2 > self.max_chars_per_chunk and current_chunk:
-                chunks.append(current_chunk.strip())
-                current_chunk = ""
-            
-            # Add paragraph to current chunk
-            if current_chunk:
-                current_chunk += "\n\n" + paragraph
+        """Pack text into as few TTS requests as possible without splitting sentences."""
+        return pack_chunks(text, self.max_chars_per_chunk)
+
+    def _section_runs(self, sections: List[ScriptSection]) -> List[List[int]]:
+        """
+        Group consecutive section indexes that are synthesized together: a section
+        joins the previous one's run when no gap separates them.
+        """
+        runs = []
+        for i, section in enumerate(sections):
+            if runs and self.merge_gapless_sections and self.gap_after(sections[i - 1]) <= 0:
+                runs[-1].append(i)
             else:
-                current_chunk = paragraph
-                
-            # If a single paragraph is too long, split by sentences
-            if len(current_chunk) > self.max_chars_per_chunk:
-                sentences = re.split(r'(?<=[.!?])\s+', current_chunk)
-                current_chunk = ""
-                for sentence in sentences:
-                    if len(current_chunk) + len(sentence) + 1 > self.max_chars_per_chunk and current_chunk:
-                        chunks.append(current_chunk.strip())
-                        current_chunk = ""
-                    
-                    if current_chunk:
-                        current_chunk += " " + sentence
-                    else:
-                        current_chunk = sentence
-        
-        # Add the last chunk
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
-            
-        return [chunk for chunk in chunks if len(chunk.strip()) > 10]
+                runs.append([i])
+        return runs
 
-    def generate_lesson_audio_with_30s_gaps(self, script_text: str, lesson_id: str, voice: str = "alloy") -> Dict:
+    def _run_section(self, sections: List[ScriptSection], run: List[int]) -> ScriptSection:
+        """One section standing in for a run: the speech joined, title and type of the last section."""
+        if len(run) == 1:
+            return sections[run[0]]
+        return replace(sections[run[-1]],
+                       title=" + ".join(sections[i].title for i in run),
+                       speech="\n\n".join(sections[i].speech for i in run))
+
+    def expected_request_count(self, sections: List[ScriptSection],
+                               manifest: Optional[LessonManifest] = None) -> int:
+        """Number of TTS requests the lesson will make (before cache hits), skipping sections in manifest."""
+        run_sections = [self._run_section(sections, run) for run in self._section_runs(sections)]
+        return sum(len(self.split_text_into_chunks(section.speech)) for section in run_sections
+                   if manifest is None or self.section_key(section) not in manifest)
+
+    def section_key(self, section: ScriptSection) -> str:
+        """Hash of a section's speech and every setting that changes how it is synthesized."""
+        return TTSCache.make_key("openai", self.model, self.voice, section.speech, self.audio_format,
+                                 max_chars_per_chunk=self.max_chars_per_chunk)
+
+    def _lesson_manifest(self, lesson_id: str, source: Optional[str] = None) -> Optional[LessonManifest]:
         """
-        Generate lesson audio with exactly 30-second gaps between sections.
-        Reads everything in the lecture script but adds gaps between natural sections.
+        Stored section audio for one script of a lesson (source tells a lesson's
+        scripts apart, e.g. its source PDF URL), or None when section reuse is off
+        or unavailable.
+        """
+        if not self.reuse_sections:
+            return None
+        try:
+            return LessonManifest(lesson_id, source=source)
+        except Exception as e:
+            self.logger.warning(f"Section reuse disabled for lesson {lesson_id}: {e}")
+            return None
+
+    def _new_lesson_temp_dir(self, lesson_id: str) -> Path:
+        """Create the temporary working directory for one lesson's audio."""
+        temp_lesson_dir = self.temp_dir / f"lesson_{lesson_id}_{int(time.time())}"
+        temp_lesson_dir.mkdir(exist_ok=True)
+        return temp_lesson_dir
+
+    def _synthesize_section(self, section: ScriptSection, index: int, pcm_buffer: PcmBuffer,
+                            chunk_pool: Optional[ThreadPoolExecutor] = None,
+                            manifest: Optional[LessonManifest] = None) -> Optional[PcmSegment]:
+        """
+        Generate the decoded audio for one section; returns its segment or None on
+        failure. With a manifest, an unchanged section's stored audio is reused and
+        newly synthesized audio is stored.
         """
-        
         try:
-            self.logger.info(f"Generating lesson audio with 30s gaps for lesson {lesson_id}")
+            section_content = section.speech
+            section_title = section.title
             
-            # Set voice
-            self.set_voice(voice)
+            if not section_content:
+                self.logger.warning(f"Empty content for section: {section_title}")
+                return None
             
-            # Split script into natural sections
-            sections = self.split_script_into_natural_sections(script_text)
+            section_key = self.section_key(section) if manifest is not None else None
+            if section_key is not None:
+                segment = manifest.load(section_key, pcm_buffer)
+                if segment is not None:
+                    self.logger.info(f"Reusing stored audio for unchanged section {index+1}: '{section_title}'")
+                    return segment
             
-            if not sections:
-                return {"success": False, "error": "No sections found in script"}
+            self.logger.info(f"Generating audio for section {index+1}: '{section_title}' ({len(section_content)} chars)")
+            self.logger.info(f"Section content preview: {section_content[:200]}...")
             
-            self.logger.info(f"Processing {len(sections)} sections")
+            # Generate audio for this section
+            decoded = self.synthesize_text_pcm(section_content, chunk_pool=chunk_pool)
             
-            # Create temporary directory for this lesson
-            temp_lesson_dir = self.temp_dir / f"lesson_{lesson_id}_{int(time.time())}"
-            temp_lesson_dir.mkdir(exist_ok=True)
-            
-            audio_parts = []
-            total_speech_duration = 0
+            if decoded is None:
+                self.logger.error(f"Failed to generate audio for section: {section_title}")
+                return None
             
-            for i, section in enumerate(sections):
-                try:
-                    section_content = section['content'].strip()
-                    section_title = section['title']
-                    
-                    if not section_content:
-                        self.logger.warning(f"Empty content for section: {section_title}")
-                        continue
-                    
-                    self.logger.info(f"Generating audio for section {i+1}: '{section_title}' ({len(section_content)} chars)")
-                    self.logger.info(f"Section content preview: {section_content[:200]}...")
-                    
-                    # Generate audio for this section
-                    section_audio_path = temp_lesson_dir / f"section_{i:02d}.mp3"
-                    
-                    success = self.generate_audio_from_text(
-                        text=section_content,
-                        output_path=str(section_audio_path)
-                    )
-                    
-                    if not success or not section_audio_path.exists():
-                        self.logger.error(f"Failed to generate audio for section: {section_title}")
-                        continue
-                    
-                    # Add section audio to the list
-                    audio_parts.append(str(section_audio_path))
-                    
-                    # Track speech duration
-                    section_duration = self.get_audio_duration(str(section_audio_path))
-                    total_speech_duration += section_duration
-                    
-                    self.logger.info(f"Generated audio for '{section_title}': {section_duration:.1f}s")
-                    
-                    # Add 30-second gap after each section except the last one
-                    if i < len(sections) - 1:
-                        gap_audio_path = temp_lesson_dir / f"gap_{i:02d}.mp3"
-                        if self.create_silence_audio(30, str(gap_audio_path)):
-                            audio_parts.append(str(gap_audio_path))
-                            self.logger.info(f"Added 30-second gap after section {i+1}")
-                        else:
-                            self.logger.warning(f"Failed to create gap audio after section {i+1}")
-                    
-                except Exception as section_error:
-                    self.logger.error(f"Error processing section {section['title']}: {section_error}")
-                    continue
+            segment = pcm_buffer.add(*decoded)
+            if section_key is not None:
+                manifest.store(section_key, segment, section_title)
+            return segment
             
-            if not audio_parts:
+        except Exception as section_error:
+            self.logger.error(f"Error processing section {section.title}: {section_error}")
+            return None
+
+    def _synthesize_sections(self, sections: List[ScriptSection], pcm_buffer: PcmBuffer,
+                             manifest: Optional[LessonManifest] = None) -> List[Optional[PcmSegment]]:
+        """
+        Synthesize all sections concurrently. Every TTS request of the lesson goes
+        through one chunk pool, so at most max_concurrent_workers are in flight;
+        section threads only split, wait and decode. Sections without a gap between
+        them are synthesized as one run, whose segment is returned at the run's last
+        index (the others are None). Segments keep section order.
+        With a manifest, only runs that are new or changed since the last generation
+        are synthesized; the manifest then forgets runs the lesson no longer has.
+        """
+        if not sections:
+            return []
+        runs = self._section_runs(sections)
+        run_sections = [self._run_section(sections, run) for run in runs]
+        if manifest is not None:
+            unchanged = sum(self.section_key(section) in manifest for section in run_sections)
+            self.logger.info(f"{unchanged} of {len(runs)} runs unchanged since the last generation")
+        self.logger.info(f"{len(sections)} sections in {len(runs)} runs need "
+                         f"{self.expected_request_count(sections, manifest)} TTS requests")
+        segments: List[Optional[PcmSegment]] = [None] * len(sections)
+        with self._new_chunk_pool() as chunk_pool, \
+                ThreadPoolExecutor(max_workers=min(len(runs), self.max_concurrent_workers),
+                                   thread_name_prefix="tts-section") as section_pool:
+            futures = [section_pool.submit(self._synthesize_section, section, run[0], pcm_buffer,
+                                           chunk_pool, manifest)
+                       for run, section in zip(runs, run_sections)]
+            for run, future in zip(runs, futures):
+                segments[run[-1]] = future.result()
+        if manifest is not None:
+            manifest.retain(self.section_key(section) for section in run_sections)
+        return segments
+
+    def gap_after(self, section: ScriptSection) -> float:
+        """Seconds of silence after a section, by section type."""
+        return self.gap_seconds_by_type.get(section.type, self.gap_seconds)
+
+    def _lesson_timeline(self, sections: List[ScriptSection],
+                         segments: List[Optional[PcmSegment]]) -> List:
+        """Section audio interleaved with Gap entries; no gap after the last section."""
+        timeline = []
+        for i, (section, segment) in enumerate(zip(sections, segments)):
+            if not segment:
+                continue
+            timeline.append(segment)
+            self.logger.info(f"Generated audio for '{section.title}': {segment.duration:.1f}s")
+            gap_seconds = self.gap_after(section) if i < len(sections) - 1 else 0
+            if gap_seconds > 0:
+                timeline.append(Gap(gap_seconds))
+        return timeline
+
+    def _encode_lesson_timeline(self, timeline: List, sample_rate: int, temp_lesson_dir: Path,
+                                lesson_id: str, output_path: Path) -> Dict:
+        """
+        Encode the timeline with the delivery profile. In the CPU pool, the timeline
+        is first streamed to an uncompressed mix file (cheap, sequential I/O) that a
+        worker process encodes; otherwise it is encoded inline on this thread.
+        """
+        profile = self.delivery_profile
+        if self.encode_in_process_pool:
+            mix_path = temp_lesson_dir / f"{lesson_id}_mix.wav"
+            try:
+                with StreamingAssembler(str(mix_path), sample_rate, subtype="PCM_16") as assembler:
+                    assembler.write_timeline(timeline)
+                return get_cpu_pool().submit(encode_with_profile, str(mix_path), str(output_path),
+                                             profile.name).result()
+            except BrokenProcessPool as e:
+                self.logger.warning(f"CPU pool broke during encoding, encoding inline: {e}")
+                reset_cpu_pool()
+                return encode_with_profile(str(mix_path), str(output_path), profile.name)
+            finally:
+                mix_path.unlink(missing_ok=True)
+        
+        started = time.process_time()
+        with open_profile_assembler(str(output_path), profile) as assembler:
+            assembler.write_timeline(timeline)
+        return {
+            "profile": profile.name,
+            "bytes": output_path.stat().st_size,
+            "duration_seconds": round(assembler.duration, 2),
+            "encode_cpu_seconds": round(time.process_time() - started, 2),
+        }
+
+    def _assemble_lesson_audio(self, sections: List[ScriptSection], segments: List[Optional[PcmSegment]],
+                               temp_lesson_dir: Path, lesson_id: str, pcm_buffer: PcmBuffer) -> Dict:
+        """
+        Stream the lesson timeline (decoded section audio and gaps) into the lesson
+        file, encoded with the delivery profile. Gaps are written as zero blocks;
+        durations come from sample counts.
+        """
+        profile = self.delivery_profile
+        combined_audio_path = temp_lesson_dir / f"{lesson_id}_combined.{profile.extension}"
+        try:
+            if not any(segments):
                 return {"success": False, "error": "No audio segments generated"}
             
-            # Combine all audio parts into one file
-            combined_audio_path = temp_lesson_dir / f"{lesson_id}_combined.mp3"
-            
-            self.logger.info(f"Combining {len(audio_parts)} audio parts into final file")
-            combine_success = self.combine_audio_files(audio_parts, str(combined_audio_path))
-            
-            if not combine_success or not combined_audio_path.exists():
-                return {"success": False, "error": "Failed to combine audio segments"}
+            timeline = self._lesson_timeline(sections, segments)
+            sample_rate = timeline[0].sample_rate
+            total_speech_duration = sum(entry.duration for entry in timeline if isinstance(entry, PcmSegment))
+            gaps = [entry.seconds for entry in timeline if isinstance(entry, Gap)]
             
-            # Get final audio duration
-            final_duration_seconds = self.get_audio_duration(str(combined_audio_path))
-            final_duration_minutes = final_duration_seconds / 60.0
+            self.logger.info(f"Encoding {len(timeline)} timeline entries with profile '{profile.name}'"
+                             f" ({pcm_buffer.spilled_bytes / 1024 / 1024:.1f} MB spilled to disk)")
+            encoded = self._encode_lesson_timeline(timeline, sample_rate, temp_lesson_dir, lesson_id,
+                                                   combined_audio_path)
             
-            # Calculate total gap time
-            total_gaps = len(sections) - 1
-            total_gap_seconds = total_gaps * 30
-            
-            result = {
-                "success": True,
-                "audio_file": str(combined_audio_path),
-                "sections_count": len(sections),
-                "total_duration_minutes": round(final_duration_minutes, 2),
-                "speech_duration_seconds": round(total_speech_duration, 2),
-                "gap_duration_seconds": total_gap_seconds,
-                "gaps_added": total_gaps
-            }
-            
-            self.logger.info(f"Final audio: {final_duration_minutes:.1f} min total "
-                            f"({total_speech_duration/60:.1f} min speech + {total_gap_seconds/60:.1f} min gaps)")
+            final_duration_minutes = encoded["duration_seconds"] / 60.0
+        except Exception as e:
+            self.logger.error(f"Error combining audio segments: {str(e)}")
+            return {"success": False, "error": "Failed to combine audio segments"}
+        finally:
+            pcm_buffer.release()
+        
+        total_gap_seconds = sum(gaps)
+        
+        result = {
+            "success": True,
+            "audio_file": str(combined_audio_path),
+            "sections_count": len(sections),
+            "total_duration_minutes": round(final_duration_minutes, 2),
+            "speech_duration_seconds": round(total_speech_duration, 2),
+            "gap_duration_seconds": total_gap_seconds,
+            "gaps_added": len(gaps),
+            "delivery_profile": profile.name,
+            "content_type": profile.content_type,
+            "audio_bytes": encoded["bytes"]
+        }
+        
+        self.logger.info(f"Final audio: {final_duration_minutes:.1f} min total "
+                        f"({total_speech_duration/60:.1f} min speech + {total_gap_seconds/60:.1f} min gaps), "
+                        f"{encoded['bytes'] / 1024 / 1024:.2f} MB as '{profile.name}' "
+                        f"(encoded in {encoded['encode_cpu_seconds']:.1f}s CPU)")
+        
+        return result
+
+    def _remove_lesson_temp_dir(self, temp_lesson_dir: Path) -> None:
+        """Delete a lesson's temporary working directory and everything in it."""
+        try:
+            shutil.rmtree(temp_lesson_dir)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning(f"Failed to clean up temporary files: {e}")
+
+    def _generate_lesson_audio(self, lesson_id: str, source: Optional[str], synthesize) -> Dict:
+        """
+        Shared body of the generate_lesson_audio_* methods. synthesize(pcm_buffer, manifest)
+        returns the lesson's (sections, segments); they are then assembled into the lesson
+        file. The temporary lesson directory is kept only for a successful result, whose
+        audio file lives there until upload_lesson_audio removes it.
+        """
+        temp_lesson_dir = self._new_lesson_temp_dir(lesson_id)
+        pcm_buffer = PcmBuffer(temp_lesson_dir)
+        result = {"success": False}
+        try:
+            manifest = self._lesson_manifest(lesson_id, source)
+            sections, segments = synthesize(pcm_buffer, manifest)
+            if not sections:
+                result = {"success": False, "error": "No sections found in script"}
+                return result
             
+            self.logger.info(f"Processing {len(sections)} sections")
+            result = self._assemble_lesson_audio(sections, segments, temp_lesson_dir, lesson_id, pcm_buffer)
+            if manifest is not None and result["success"]:
+                result.update(manifest.stats())
             return result
             
         except Exception as e:
-            self.logger.error(f"Error in generate_lesson_audio_with_30s_gaps: {str(e)}")
-            return {"success": False, "error": str(e)}
+            self.logger.error(f"Error generating audio for lesson {lesson_id}: {str(e)}")
+            result = {"success": False, "error": str(e)}
+            return result
+        finally:
+            if not result["success"]:
+                pcm_buffer.release()
+                self._remove_lesson_temp_dir(temp_lesson_dir)
+
+    def generate_lesson_audio_with_30s_gaps(self, script_text: str, lesson_id: str, voice: str = "alloy",
+                                            source: Optional[str] = None) -> Dict:
+        """
+        Generate lesson audio with gaps between sections (30 seconds unless
+        configured per section type, see gap_after). Reads everything in the lecture script but adds gaps between natural sections.
+        """
+        self.logger.info(f"Generating lesson audio with 30s gaps for lesson {lesson_id}")
+        self.set_voice(voice)
+        
+        def synthesize(pcm_buffer, manifest):
+            sections = self.split_script_into_natural_sections(script_text)
+            return sections, self._synthesize_sections(sections, pcm_buffer, manifest)
+        
+        return self._generate_lesson_audio(lesson_id, source, synthesize)
+
+    def sections_from_script_document(self, script_doc: Dict) -> List[ScriptSection]:
+        """
+        Speech sections straight from a structured script document: only the
+        'speech' text is voiced; notes are for the teacher and never sent to TTS.
+        """
+        return ScriptDocument.from_document(script_doc).speakable()
+
+    def generate_lesson_audio_from_document(self, script_doc: Dict, lesson_id: str, voice: str = "alloy",
+                                            source: Optional[str] = None) -> Dict:
+        """Generate lesson audio with section gaps from a structured script document (no parsing pass)."""
+        self.logger.info(f"Generating lesson audio from script document for lesson {lesson_id}")
+        self.set_voice(voice)
+        
+        def synthesize(pcm_buffer, manifest):
+            sections = self.sections_from_script_document(script_doc)
+            return sections, self._synthesize_sections(sections, pcm_buffer, manifest)
+        
+        return self._generate_lesson_audio(lesson_id, source, synthesize)
+
+    def _synthesize_stream(self, text_deltas: Iterable[str], script_parts: List[str], pcm_buffer: PcmBuffer,
+                           manifest: Optional[LessonManifest]) -> Tuple[List[ScriptSection], List[Optional[PcmSegment]]]:
+        """
+        Consume streamed script text (collected into script_parts), sending each
+        completed section (or run of gapless sections) to TTS as soon as it is detected.
+        """
+        sections = []
+        run_sections = []
+        futures = []
+        with self._new_chunk_pool() as chunk_pool, \
+                ThreadPoolExecutor(max_workers=self.max_concurrent_workers,
+                                   thread_name_prefix="tts-section") as pool:
+            def submit_run(run):
+                # Same runs as _section_runs, so both paths store the same manifest keys
+                run_section = self._run_section(sections, run)
+                run_sections.append(run_section)
+                futures.append((run, pool.submit(self._synthesize_section, run_section, run[0],
+                                                 pcm_buffer, chunk_pool, manifest)))
+            
+            run = []
+            lines = self._iter_stream_lines(text_deltas, script_parts)
+            for section in self._iter_natural_sections(lines):
+                index = len(sections)
+                sections.append(section)
+                run.append(index)
+                if self.merge_gapless_sections and self.gap_after(section) <= 0:
+                    self.logger.info(f"Section {index} complete in stream: '{section.title}', "
+                                     f"waiting for the next section (no gap between them)")
+                    continue
+                self.logger.info(f"Section {index} complete in stream: '{section.title}', starting TTS")
+                submit_run(run)
+                run = []
+            if run:
+                submit_run(run)
+            segments: List[Optional[PcmSegment]] = [None] * len(sections)
+            for run, future in futures:
+                segments[run[-1]] = future.result()
+        if manifest is not None and run_sections:
+            manifest.retain(self.section_key(section) for section in run_sections)
+        return sections, segments
+
+    def generate_lesson_audio_from_stream(self, text_deltas: Iterable[str], lesson_id: str,
+                                          voice: str = "alloy", source: Optional[str] = None) -> Dict:
+        """
+        Generate lesson audio while the script is still being written.
+        Consumes streamed script text, detects each completed section and sends it
+        to TTS immediately, so synthesis overlaps with the LLM completion.
+        The full script text is returned in the result as 'script_text'.
+        """
+        self.logger.info(f"Generating streamed lesson audio with 30s gaps for lesson {lesson_id}")
+        self.set_voice(voice)
+        
+        script_parts = []
+        result = self._generate_lesson_audio(
+            lesson_id, source,
+            lambda pcm_buffer, manifest: self._synthesize_stream(text_deltas, script_parts, pcm_buffer, manifest))
+        result["script_text"] = "".join(script_parts)
+        return result
 
     def extract_script_text_from_pdf_url(self, pdf_url: str) -> Optional[str]:
         """Extract text from a PDF URL (for prepared lesson scripts)."""
@@ -506,10 +834,18 @@ class EnhancedTimedSpeechGenerator:
             return None
 
     def generate_timed_lesson_audio(self, teacher_id: str, course_id: str, lesson_id: str, 
-                                  lesson_title: str, script_url: str, date: str,
-                                  voice: str = "alloy") -> Dict:
+                                  lesson_title: str, script_url: Optional[str], date: str,
+                                  voice: str = "alloy", script_text: Optional[str] = None,
+                                  script_doc: Optional[Dict] = None,
+                                  delivery_profile: Optional[str] = None,
+                                  source: Optional[str] = None) -> Dict:
         """
-        Generate lesson audio with 30-second gaps and upload to Supabase.
+        Generate lesson audio with section gaps and upload to Supabase.
+        Pass script_doc (structured script) or script_text when the caller already
+        has the script, to skip downloading and re-parsing the script PDF.
+        delivery_profile overrides AUDIO_DELIVERY_PROFILE for this lesson.
+        source identifies the script among the lesson's scripts (e.g. its source
+        PDF URL), so each keeps its own stored section audio.
         """
         result = {
             'success': False,
@@ -519,101 +855,122 @@ class EnhancedTimedSpeechGenerator:
         }
         
         try:
-            # Extract script text from PDF
-            self.logger.info(f"Extracting script text for lesson {lesson_id}")
-            script_text = self.extract_script_text_from_pdf_url(script_url)
+            self.set_delivery_profile(delivery_profile)
+            if script_doc:
+                audio_result = self.generate_lesson_audio_from_document(script_doc, lesson_id, voice=voice,
+                                                                        source=source)
+                if not audio_result['success']:
+                    result['error'] = audio_result.get('error', 'Failed to generate audio')
+                    return result
+                return self.upload_lesson_audio(teacher_id, course_id, lesson_id, date, audio_result)
             
             if not script_text:
-                result['error'] = "Failed to extract script text from PDF"
-                return result
-            
-            self.logger.info(f"Extracted {len(script_text)} characters from script")
+                # Extract script text from PDF
+                self.logger.info(f"Extracting script text for lesson {lesson_id}")
+                script_text = self.extract_script_text_from_pdf_url(script_url)
+                
+                if not script_text:
+                    result['error'] = "Failed to extract script text from PDF"
+                    return result
+                
+                self.logger.info(f"Extracted {len(script_text)} characters from script")
             
             # Generate audio with 30-second gaps
             audio_result = self.generate_lesson_audio_with_30s_gaps(
                 script_text=script_text,
                 lesson_id=lesson_id,
-                voice=voice
+                voice=voice,
+                source=source
             )
             
             if not audio_result['success']:
                 result['error'] = audio_result.get('error', 'Failed to generate audio')
                 return result
             
-            combined_audio_path = audio_result['audio_file']
+            return self.upload_lesson_audio(teacher_id, course_id, lesson_id, date, audio_result)
             
-            # Upload to Supabase
-            try:
-                client = SupabaseClient(teacher_id=teacher_id)
-                
-                audio_filename = f"{lesson_id}_complete_audio.mp3"
-                bucket_path = f"{teacher_id}/{course_id}/{date}/{audio_filename}"
-                
-                with open(combined_audio_path, 'rb') as f:
-                    audio_bytes = f.read()
-                
-                # Upload to bucket
-                client.upload_pdf_to_bucket(
-                    bucket=self.audio_bucket,
-                    pdf_bytes=audio_bytes,
-                    path=bucket_path,
-                    upsert=True
+        except Exception as e:
+            self.logger.error(f"Error in generate_timed_lesson_audio: {str(e)}")
+            result['error'] = str(e)
+            return result
+
+    def upload_lesson_audio(self, teacher_id: str, course_id: str, lesson_id: str,
+                            date: str, audio_result: Dict) -> Dict:
+        """Upload a combined lesson audio file, record its URL and clean up temporary files."""
+        result = {
+            'success': False,
+            'lesson_id': lesson_id,
+            'audio_url': None,
+            'error': None
+        }
+        combined_audio_path = audio_result['audio_file']
+        
+        # Upload to Supabase
+        try:
+            client = SupabaseClient(teacher_id=teacher_id)
+            
+            extension = Path(combined_audio_path).suffix or ".mp3"
+            audio_filename = f"{lesson_id}_complete_audio{extension}"
+            bucket_path = f"{teacher_id}/{course_id}/{date}/{audio_filename}"
+            
+            with open(combined_audio_path, 'rb') as f:
+                audio_bytes = f.read()
+            
+            # Upload to bucket
+            client.upload_pdf_to_bucket(
+                bucket=self.audio_bucket,
+                pdf_bytes=audio_bytes,
+                path=bucket_path,
+                upsert=True,
+                content_type=audio_result.get('content_type', 'audio/mpeg')
+            )
+            
+            # Get URL
+            sign_urls = os.getenv("SIGN_URLS", "true").lower() == "true"
+            if sign_urls:
+                audio_url = client.create_signed_url(
+                    self.audio_bucket, bucket_path, expires_in=86400
                 )
+            else:
+                audio_url = client.get_public_url(self.audio_bucket, bucket_path)
+            
+            # Update database
+            try:
+                from supabase import create_client
+                url = os.getenv("SUPABASE_URL")
+                key = os.getenv("SUPABASE_KEY")
+                supabase = create_client(url, key)
                 
-                # Get URL
-                sign_urls = os.getenv("SIGN_URLS", "true").lower() == "true"
-                if sign_urls:
-                    audio_url = client.create_signed_url(
-                        self.audio_bucket, bucket_path, expires_in=86400
-                    )
-                else:
-                    audio_url = client.get_public_url(self.audio_bucket, bucket_path)
-                
-                # Update database
-                try:
-                    from supabase import create_client
-                    url = os.getenv("SUPABASE_URL")
-                    key = os.getenv("SUPABASE_KEY")
-                    supabase = create_client(url, key)
-                    
-                    update_result = supabase.table('prepared_lessons').update({
-                        'audio_url': audio_url
-                    }).eq('lesson_id', lesson_id).eq('teacher_id', teacher_id).execute()
-                    
-                    self.logger.info(f"Updated prepared_lessons with audio URL for lesson {lesson_id}")
-                    
-                except Exception as db_error:
-                    self.logger.warning(f"Failed to update prepared_lessons table: {db_error}")
-                
-                result['success'] = True
-                result['audio_url'] = audio_url
-                result['duration_minutes'] = audio_result['total_duration_minutes']
-                result['sections_count'] = audio_result['sections_count']
-                result['speech_duration_seconds'] = audio_result['speech_duration_seconds']
-                result['gap_duration_seconds'] = audio_result['gap_duration_seconds']
-                result['gaps_added'] = audio_result['gaps_added']
-                result['bucket_path'] = bucket_path
+                update_result = supabase.table('prepared_lessons').update({
+                    'audio_url': audio_url
+                }).eq('lesson_id', lesson_id).eq('teacher_id', teacher_id).execute()
                 
-                self.logger.info(f"Successfully uploaded audio for lesson {lesson_id} "
-                               f"({audio_result['total_duration_minutes']:.1f} min total, "
-                               f"{audio_result['gaps_added']} x 30s gaps)")
+                self.logger.info(f"Updated prepared_lessons with audio URL for lesson {lesson_id}")
                 
-            except Exception as upload_error:
-                self.logger.error(f"Failed to upload audio to Supabase: {upload_error}")
-                result['error'] = f"Upload failed: {str(upload_error)}"
-            
-            # Clean up temporary files
-            try:
-                temp_dir = Path(combined_audio_path).parent
-                for file_path in temp_dir.glob("*"):
-                    file_path.unlink(missing_ok=True)
-                temp_dir.rmdir()
-            except Exception as cleanup_error:
-                self.logger.warning(f"Failed to clean up temporary files: {cleanup_error}")
-            
-            return result
-            
-        except Exception as e:
-            self.logger.error(f"Error in generate_timed_lesson_audio: {str(e)}")
-            result['error'] = str(e)
-            return result
\ No newline at end of file
+            except Exception as db_error:
+                self.logger.warning(f"Failed to update prepared_lessons table: {db_error}")
+            
+            result['success'] = True
+            result['audio_url'] = audio_url
+            result['duration_minutes'] = audio_result['total_duration_minutes']
+            result['sections_count'] = audio_result['sections_count']
+            result['speech_duration_seconds'] = audio_result['speech_duration_seconds']
+            result['gap_duration_seconds'] = audio_result['gap_duration_seconds']
+            result['gaps_added'] = audio_result['gaps_added']
+            result['bucket_path'] = bucket_path
+            result['audio_bytes'] = len(audio_bytes)
+            result['delivery_profile'] = audio_result.get('delivery_profile')
+            
+            self.logger.info(f"Successfully uploaded audio for lesson {lesson_id} "
+                           f"({audio_result['total_duration_minutes']:.1f} min total, "
+                           f"{audio_result['gaps_added']} gaps, {audio_result['gap_duration_seconds']:.0f}s, "
+                           f"{len(audio_bytes) / 1024 / 1024:.2f} MB)")
+            
+        except Exception as upload_error:
+            self.logger.error(f"Failed to upload audio to Supabase: {upload_error}")
+            result['error'] = f"Upload failed: {str(upload_error)}"
+        
+        # Clean up temporary files
+        self._remove_lesson_temp_dir(Path(combined_audio_path).parent)
+        
+        return result
@@ -0,0 +1,62 @@
+import re
+from typing import Iterator, List, Tuple
+
+_PARAGRAPH_RE = re.compile(r"\n[ \t]*\n\s*")
+_SPACE_RE = re.compile(r"\s+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+PARAGRAPH_SEPARATOR = "\n\n"
+SENTENCE_SEPARATOR = " "
+
+
+def iter_sentences(text: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (separator, sentence) in order. Paragraph breaks (blank lines) are kept
+    as the separator before a paragraph's first sentence; other whitespace runs
+    are collapsed to single spaces.
+    """
+    for paragraph in _PARAGRAPH_RE.split(text.strip()):
+        paragraph = _SPACE_RE.sub(" ", paragraph).strip()
+        separator = PARAGRAPH_SEPARATOR
+        for sentence in _SENTENCE_RE.split(paragraph):
+            if sentence:
+                yield separator, sentence
+                separator = SENTENCE_SEPARATOR
+
+
+def _fit(sentence: str, limit: int) -> Iterator[str]:
+    """The sentence itself, or, only if it alone exceeds limit, word-boundary pieces of it."""
+    while len(sentence) > limit:
+        cut = sentence.rfind(" ", 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+        yield sentence[:cut].rstrip()
+        sentence = sentence[cut:].lstrip()
+    if sentence:
+        yield sentence
+
+
+def pack_chunks(text: str, limit: int) -> List[str]:
+    """
+    Pack text into as few chunks of at most limit characters as possible, in one
+    linear pass. Chunks end on sentence boundaries and may span paragraphs; a
+    sentence is only broken (at a word boundary) if it is longer than limit itself.
+    Filling each chunk greedily is optimal for an ordered split like this one.
+    """
+    chunks = []
+    parts: List[str] = []
+    size = 0
+    for separator, sentence in iter_sentences(text):
+        for piece in _fit(sentence, limit):
+            if parts and size + len(separator) + len(piece) > limit:
+                chunks.append("".join(parts))
+                parts, size = [], 0
+            if parts:
+                parts.append(separator)
+                size += len(separator)
+            parts.append(piece)
+            size += len(piece)
+            separator = SENTENCE_SEPARATOR
+    if parts:
+        chunks.append("".join(parts))
+    return chunks
@@ -0,0 +1,74 @@
+"""
+Token counting for prompt budgets.
+
+tiktoken downloads each encoding (cl100k_base, ~1.7 MB) from
+openaipublic.blob.core.windows.net on first use and caches it in
+TIKTOKEN_CACHE_DIR, which defaults here to temp/cache/tiktoken. For offline or
+locked-down deployments, fetch it once at build time:
+
+    python -m src.core.tokens
+
+Without the encoding, counts fall back to a ~4 characters/token estimate.
+"""
+import os
+import math
+import logging
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_MODEL = "gpt-3.5-turbo"
+DEFAULT_TIKTOKEN_CACHE_DIR = "temp/cache/tiktoken"
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    """Tokenizer for the model, or None if tiktoken is missing or its encoding can't be loaded."""
+    if tiktoken is None:
+        return None
+    # A persistent cache instead of tiktoken's default under the system temp dir
+    os.environ.setdefault("TIKTOKEN_CACHE_DIR", DEFAULT_TIKTOKEN_CACHE_DIR)
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use; fall back to the estimate when offline
+        logger.warning(f"Could not load tokenizer for {model}, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str = DEFAULT_TOKEN_MODEL) -> int:
+    """Count prompt tokens with the model's tokenizer (~4 chars/token estimate if tiktoken is missing)."""
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = DEFAULT_TOKEN_MODEL) -> str:
+    """Cut text down to at most max_tokens tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+if __name__ == "__main__":
+    # Download the encoding into TIKTOKEN_CACHE_DIR (e.g. during an image build)
+    encoding = _get_encoding(DEFAULT_TOKEN_MODEL)
+    print(f"Tokenizer {encoding.name} cached in {os.environ['TIKTOKEN_CACHE_DIR']}" if encoding
+          else "Tokenizer could not be downloaded; token counts will be estimated")
@@ -0,0 +1,104 @@
+import os
+import re
+import json
+import logging
+import threading
+import unicodedata
+from typing import Optional
+
+try:
+    from src.core.disk_cache import DiskCache
+except Exception:
+    from disk_cache import DiskCache
+
+# Bump when cached audio should no longer be reused (e.g. a text normalisation change)
+TTS_CACHE_VERSION = "1"
+TTS_CACHE_NAMESPACE_PREFIX = "v"
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+class TTSCache:
+    """
+    Chunk-level synthesized audio cache shared by all speech generators.
+
+    Entries are keyed on provider, model, voice, normalised text, audio format
+    and any provider settings that change the audio, so recurring lessons,
+    regenerated dates and retries reuse audio instead of paying for it again.
+    Backed by DiskCache (byte-size LRU eviction); hit/miss counters are kept
+    per process and reported by stats().
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache = DiskCache(
+            root or os.getenv("TTS_CACHE_DIR", "temp/cache/tts_chunks"),
+            namespace=f"{TTS_CACHE_NAMESPACE_PREFIX}{TTS_CACHE_VERSION}",
+            max_bytes=max_bytes or int(os.getenv("TTS_CACHE_MAX_MB", "2048")) * 1024 * 1024,
+        )
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self.bytes_stored = 0
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Text as the provider will effectively read it: NFC, single spaces, trimmed."""
+        return _SPACE_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+    @classmethod
+    def make_key(cls, provider: str, model: str, voice: str, text: str,
+                 audio_format: str = "mp3", **settings) -> str:
+        return DiskCache.make_key(provider, model, voice, audio_format,
+                                  json.dumps(settings, sort_keys=True), cls.normalize_text(text))
+
+    def get(self, key: str) -> Optional[bytes]:
+        data = self.cache.get(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.bytes_served += len(data)
+        return data
+
+    def set(self, key: str, data: bytes) -> None:
+        if not data:
+            return
+        self.cache.set(key, data)
+        with self._lock:
+            self.bytes_stored += len(data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "bytes_served": self.bytes_served,
+                "bytes_stored": self.bytes_stored,
+                "size_bytes": self.cache.size_bytes(),
+                "max_bytes": self.cache.max_bytes,
+            }
+
+
+_tts_cache = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> Optional[TTSCache]:
+    """Process-wide TTS cache (so metrics cover every generator), or None if TTS_CACHE_ENABLED=false."""
+    global _tts_cache
+    if os.getenv("TTS_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    with _tts_cache_lock:
+        if _tts_cache is None:
+            _tts_cache = TTSCache()
+        return _tts_cache
+
+
+def prune_tts_cache() -> int:
+    """Maintenance: delete audio cached under older TTS_CACHE_VERSIONs."""
+    return (get_tts_cache() or TTSCache()).cache.prune_namespaces(TTS_CACHE_NAMESPACE_PREFIX)
@@ -0,0 +1,101 @@
+"""
+CPU-time benchmark of lesson audio assembly by TTS response format.
+
+Replays pre-encoded TTS responses (no API calls, TTS cache and section reuse off) through
+EnhancedTimedSpeechGenerator for a lecture of the given length and reports the
+CPU and wall time spent turning responses into the final lesson file:
+
+    python -m src.core.tts_format_benchmark --minutes 40 --formats mp3 wav pcm
+"""
+import io
+import os
+import time
+import shutil
+import argparse
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy as np
+import soundfile as sf
+
+try:
+    from src.core.speech_generator import EnhancedTimedSpeechGenerator
+except Exception:
+    from speech_generator import EnhancedTimedSpeechGenerator
+
+SAMPLE_RATE = 24000
+# Roughly what tts-1 produces for a full 3900-character request
+CHUNK_CHARS = 3900
+CHUNK_SECONDS = 260
+SENTENCE = "The quick brown fox studies how plants turn sunlight into sugar. "
+
+
+def _speech_like(seconds: float) -> np.ndarray:
+    """Noise shaped by a syllable-rate envelope, so codecs see something speech-like."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t)
+    return (rng.standard_normal(len(t)) * 0.1 * envelope).astype(np.float32)
+
+
+def encode_response(samples: np.ndarray, audio_format: str) -> bytes:
+    """Bytes as the TTS API returns them for response_format=audio_format."""
+    if audio_format == "pcm":
+        return (np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes()
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, SAMPLE_RATE, format=audio_format.upper(),
+             subtype="PCM_16" if audio_format == "wav" else None)
+    return buffer.getvalue()
+
+
+def _replay_client(audio_format: str):
+    content = encode_response(_speech_like(CHUNK_SECONDS), audio_format)
+    create = lambda **kwargs: SimpleNamespace(content=content)
+    return SimpleNamespace(audio=SimpleNamespace(speech=SimpleNamespace(create=create))), len(content)
+
+
+def _lecture_script(minutes: float) -> str:
+    body = (SENTENCE * (CHUNK_CHARS // len(SENTENCE))).strip()
+    parts = max(1, round(minutes * 60 / CHUNK_SECONDS))
+    return "\n".join(f"[Part {i + 1}: {i * 5}-{i * 5 + 5} minutes]\n{body}" for i in range(parts))
+
+
+def run(minutes: float, formats: List[str]) -> List[Dict]:
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    script = _lecture_script(minutes)
+    rows = []
+    for audio_format in formats:
+        generator = EnhancedTimedSpeechGenerator()
+        generator.tts_cache = None
+        generator.reuse_sections = False
+        generator.audio_format = audio_format
+        generator.openai_client, response_bytes = _replay_client(audio_format)
+
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        result = generator.generate_lesson_audio_with_30s_gaps(script, f"bench_{audio_format}")
+        cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+        if not result["success"]:
+            raise RuntimeError(f"{audio_format}: {result.get('error')}")
+
+        rows.append({
+            "format": audio_format,
+            "cpu_seconds": round(cpu, 2),
+            "wall_seconds": round(wall, 2),
+            "response_mb_per_request": round(response_bytes / 1024 / 1024, 2),
+            "lecture_minutes": result["total_duration_minutes"],
+        })
+        shutil.rmtree(Path(result["audio_file"]).parent, ignore_errors=True)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CPU time per lecture by TTS response format")
+    parser.add_argument("--minutes", type=float, default=40, help="spoken minutes per lecture")
+    parser.add_argument("--formats", nargs="+", default=["mp3", "wav", "pcm"])
+    args = parser.parse_args()
+
+    print(f"{'format':<8}{'cpu s':>10}{'wall s':>10}{'MB/request':>12}{'lecture min':>13}")
+    for row in run(args.minutes, args.formats):
+        print(f"{row['format']:<8}{row['cpu_seconds']:>10}{row['wall_seconds']:>10}"
+              f"{row['response_mb_per_request']:>12}{row['lecture_minutes']:>13}")
@@ -247,6 +247,16 @@ class SupabaseClient:
             self.logger.error(f"Signed URL error for {path}: {e}")
             return None
 
+    def download_from_bucket(self, bucket: str, path: str) -> Optional[bytes]:
+        """
+        Downloads an object from Supabase Storage. Returns None if it doesn't exist.
+        """
+        try:
+            return self.supabase.storage.from_(bucket).download(path)
+        except Exception as e:
+            self.logger.info(f"Download miss for {path}: {e}")
+            return None
+
     def get_public_url(self, bucket: str, path: str) -> str | None:
         try:
             data = self.supabase.storage.from_(bucket).get_public_url(path)
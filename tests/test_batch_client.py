@@ -0,0 +1,59 @@
+import json
+
+from src.core.batch_client import BatchClient, build_chat_batch_request
+from src.core.local_batch_server import LocalBatchServer
+
+
+def _requests(*titles):
+    return [build_chat_batch_request(f"2026-01-0{i}:course:lesson-{i}:1", "gpt-4o-mini",
+                                     "You are a teacher.", f'Lesson Title: "{title}"', 500, 0.7)
+            for i, title in enumerate(titles, start=1)]
+
+
+def test_submit_then_collect_round_trip():
+    with LocalBatchServer(polls_until_complete=2) as server:
+        client = BatchClient(api_key="sk-test", base_url=server.base_url)
+        batch = client.submit(_requests("Fractions", "Photosynthesis"), metadata={"start_date": "2026-01-01"})
+        assert batch["status"] == "validating"
+        assert batch["metadata"] == {"start_date": "2026-01-01"}
+
+        assert client.get_batch(batch["id"])["status"] == "in_progress"
+        finished = client.wait(batch["id"], poll_interval=0)
+        assert finished["status"] == "completed"
+        assert finished["request_counts"] == {"total": 2, "completed": 2, "failed": 0}
+
+        results = client.fetch_results(finished)
+    assert set(results) == {"2026-01-01:course:lesson-1:1", "2026-01-02:course:lesson-2:1"}
+    assert "Fractions" in results["2026-01-01:course:lesson-1:1"]["content"]
+    assert "Photosynthesis" in results["2026-01-02:course:lesson-2:1"]["content"]
+
+
+def test_per_request_errors_are_reported_by_custom_id():
+    def responder(body):
+        if "Broken" in body["messages"][-1]["content"]:
+            raise RuntimeError("model overloaded")
+        return "Opening Hook [0:00]\nHello."
+
+    with LocalBatchServer(responder=responder, polls_until_complete=0) as server:
+        client = BatchClient(api_key="sk-test", base_url=server.base_url)
+        batch = client.wait(client.submit(_requests("Fine", "Broken"))["id"], poll_interval=0)
+        results = client.fetch_results(batch)
+
+    assert batch["request_counts"]["failed"] == 1
+    assert results["2026-01-01:course:lesson-1:1"] == {"content": "Opening Hook [0:00]\nHello."}
+    assert results["2026-01-02:course:lesson-2:1"] == {"error": "model overloaded"}
+
+
+def test_uploaded_input_is_the_jsonl_of_the_requests():
+    with LocalBatchServer() as server:
+        client = BatchClient(api_key="sk-test", base_url=server.base_url)
+        batch = client.submit(_requests("Fractions"))
+        lines = server.files[batch["input_file_id"]].decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == _requests("Fractions")
+
+
+def test_wait_returns_the_running_batch_at_timeout():
+    with LocalBatchServer(polls_until_complete=100) as server:
+        client = BatchClient(api_key="sk-test", base_url=server.base_url)
+        batch = client.submit(_requests("Fractions"))
+        assert client.wait(batch["id"], poll_interval=0.01, timeout=0.05)["status"] == "in_progress"
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def batch_dir(tmp_path, monkeypatch):
+    """A collected-from-cache batch (nothing submitted) with one lesson, whose publishing is recorded."""
+    monkeypatch.setattr(app, "BATCH_WORK_DIR", str(tmp_path))
+    os.makedirs(tmp_path / "cached_20260101000000")
+    app._save_batch_manifest({
+        "batch_id": "cached_20260101000000", "submitted": False, "prepare_errors": [],
+        "cached_scripts": {"lesson-1": "## Opening Hook\nHello."},
+        "jobs": {"lesson-1": {"lesson_id": "lesson-1", "lesson_title": "Leaves", "teacher_id": "t1",
+                              "teacher_name": "Ada", "course_id": "c1", "pdf_url": "https://x/a.pdf",
+                              "source": {}, "target_date": "2026-01-01"}},
+    })
+    published = []
+
+    async def publish(batch_id, manifest, batch):
+        published.append(batch_id)
+        await asyncio.sleep(0.05)
+        return {"batch_id": batch_id, "status": "collected"}
+
+    monkeypatch.setattr(app, "_publish_batch_results", publish)
+    return tmp_path, published
+
+
+def test_concurrent_collections_publish_once(batch_dir):
+    _, published = batch_dir
+
+    async def collect_twice():
+        return await asyncio.gather(app.collect_script_batch("cached_20260101000000"),
+                                    app.collect_script_batch("cached_20260101000000", wait=True))
+
+    statuses = sorted(result["status"] for result in asyncio.run(collect_twice()))
+    assert statuses == ["collected", "collecting"]
+    assert published == ["cached_20260101000000"]
+    # The claim is released afterwards
+    assert not (batch_dir[0] / "cached_20260101000000" / "collect.lock").exists()
+
+
+def test_stale_lock_is_taken_over(batch_dir, monkeypatch):
+    tmp_path, published = batch_dir
+    lock = tmp_path / "cached_20260101000000" / "collect.lock"
+    lock.write_text("12345")
+    assert asyncio.run(app.collect_script_batch("cached_20260101000000"))["status"] == "collecting"
+
+    monkeypatch.setattr(app, "BATCH_COLLECT_LOCK_TTL_SECONDS", -1)
+    assert asyncio.run(app.collect_script_batch("cached_20260101000000"))["status"] == "collected"
+    assert published == ["cached_20260101000000"]
+
+
+def test_collection_state_is_recorded(batch_dir):
+    tmp_path, _ = batch_dir
+    asyncio.run(app.collect_script_batch("cached_20260101000000"))
+    manifest = json.loads((tmp_path / "cached_20260101000000" / "manifest.json").read_text())
+    assert "collection_started_at" in manifest
+
+
+@pytest.mark.parametrize("batch_id", ["..", "../secrets", "a/b", ".hidden", ""])
+def test_batch_ids_must_be_plain_path_segments(batch_id):
+    assert not app._valid_batch_id(batch_id)
+    with pytest.raises(ValueError):
+        app._batch_dir(batch_id)
+
+
+def test_collect_endpoint_rejects_invalid_batch_id():
+    from fastapi.testclient import TestClient
+
+    response = TestClient(app.app).post("/lectures/batch/..%2Fsecrets/collect")
+    assert response.status_code in (400, 404)
+    response = TestClient(app.app).post("/lectures/batch/bad.id/collect")
+    assert response.status_code == 400
@@ -0,0 +1,95 @@
+import os
+
+from src.core.disk_cache import DiskCache
+
+
+def _age(cache, key, mtime):
+    """Set an entry's last-used time explicitly, so LRU order doesn't depend on clock resolution."""
+    os.utime(cache._path(key), (mtime, mtime))
+
+
+def test_set_get_delete(tmp_path):
+    cache = DiskCache(tmp_path, namespace="v1")
+    key = DiskCache.make_key("doc", b"\x00pdf bytes")
+    assert cache.get(key) is None
+    cache.set(key, b"extracted text")
+    assert cache.get(key) == b"extracted text"
+    assert cache.size_bytes() == len(b"extracted text")
+    cache.delete(key)
+    assert cache.get(key) is None
+    assert cache.size_bytes() == 0
+
+
+def test_make_key_separates_parts():
+    assert DiskCache.make_key("ab", "c") != DiskCache.make_key("a", "bc")
+    assert DiskCache.make_key("a", "b") == DiskCache.make_key(b"a", b"b")
+
+
+def test_overwrite_tracks_size(tmp_path):
+    cache = DiskCache(tmp_path)
+    cache.set("k1", b"x" * 10)
+    cache.set("k1", b"x" * 4)
+    assert cache.get("k1") == b"x" * 4
+    assert cache.size_bytes() == 4
+
+
+def test_evicts_least_recently_used_below_limit(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=300)
+    for i, key in enumerate(["a1", "b2", "c3"]):
+        cache.set(key, b"x" * 100)
+        _age(cache, key, 1000 + i)
+    # Reading an entry makes it the most recently used
+    assert cache.get("a1") is not None
+    _age(cache, "a1", 2000)
+
+    cache.set("d4", b"x" * 100)
+    assert cache.get("b2") is None
+    assert cache.get("c3") is None
+    assert cache.get("a1") == b"x" * 100
+    assert cache.get("d4") == b"x" * 100
+    assert cache.size_bytes() <= 300 * 0.9
+
+
+def test_size_survives_restart(tmp_path):
+    DiskCache(tmp_path, max_bytes=1000).set("k1", b"x" * 100)
+    cache = DiskCache(tmp_path, max_bytes=1000)
+    assert cache.size_bytes() == 100
+    assert cache.get("k1") == b"x" * 100
+
+
+def test_namespaces_are_isolated_and_prunable(tmp_path):
+    old = DiskCache(tmp_path, namespace="extractor-v1")
+    old.set("k1", b"old")
+    new = DiskCache(tmp_path, namespace="extractor-v2")
+    assert new.get("k1") is None
+    new.set("k1", b"new")
+
+    assert new.prune_namespaces("extractor-v") == 1
+    assert not (tmp_path / "extractor-v1").exists()
+    assert new.get("k1") == b"new"
+
+
+def test_prune_leaves_other_data_in_a_shared_root(tmp_path):
+    other_cache = DiskCache(tmp_path, namespace="v1")
+    other_cache.set("k1", b"other cache")
+    (tmp_path / "extractor-v0").mkdir()
+    (tmp_path / "extractor-v0" / "notes.txt").write_text("not cache data")
+    cache = DiskCache(tmp_path, namespace="extractor-v2")
+
+    assert cache.prune_namespaces("extractor-v") == 0
+    assert (tmp_path / "extractor-v0" / "notes.txt").exists()
+    assert other_cache.get("k1") == b"other cache"
+
+
+def test_constructing_a_cache_does_not_prune(tmp_path):
+    DiskCache(tmp_path, namespace="extractor-v1").set("k1", b"old")
+    DiskCache(tmp_path, namespace="extractor-v2")
+    assert DiskCache(tmp_path, namespace="extractor-v1").get("k1") == b"old"
+
+
+def test_clear(tmp_path):
+    cache = DiskCache(tmp_path)
+    cache.set("k1", b"data")
+    cache.clear()
+    assert cache.get("k1") is None
+    assert cache.size_bytes() == 0
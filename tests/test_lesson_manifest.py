@@ -0,0 +1,182 @@
+import numpy as np
+import pytest
+
+from src.core.audio_buffer import PcmBuffer
+from src.core.disk_cache import DiskCache
+from src.core.lesson_manifest import LessonManifest
+
+SAMPLE_RATE = 24000
+
+
+def _tone(seconds, value=0.25):
+    return np.full(int(SAMPLE_RATE * seconds), value, dtype=np.float32)
+
+
+@pytest.fixture
+def pcm_buffer(tmp_path):
+    buffer = PcmBuffer(tmp_path / "pcm")
+    (tmp_path / "pcm").mkdir()
+    yield buffer
+    buffer.release()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(tmp_path / "sections", max_bytes=10 * 1024 * 1024)
+
+
+def test_store_then_load_in_a_new_manifest(cache, pcm_buffer):
+    manifest = LessonManifest("lesson-1", source="https://example.com/a.pdf", cache=cache)
+    manifest.store("k" * 64, pcm_buffer.add(_tone(0.5), SAMPLE_RATE), "Opening Hook")
+    assert manifest.stats() == {"sections_reused": 0, "sections_stored": 1}
+
+    reopened = LessonManifest("lesson-1", source="https://example.com/a.pdf", cache=cache)
+    assert "k" * 64 in reopened
+    assert reopened.entries["k" * 64]["title"] == "Opening Hook"
+    segment = reopened.load("k" * 64, pcm_buffer)
+    assert segment.sample_rate == SAMPLE_RATE
+    assert segment.frames == SAMPLE_RATE // 2
+    # FLAC stores 16-bit samples by default, so values come back within quantization error
+    np.testing.assert_allclose(segment.read(), _tone(0.5), atol=1e-4)
+    assert reopened.stats() == {"sections_reused": 1, "sections_stored": 0}
+    assert reopened.load("missing", pcm_buffer) is None
+
+
+def test_edit_reuses_unchanged_sections_and_forgets_removed_ones(cache, pcm_buffer):
+    manifest = LessonManifest("lesson-1", cache=cache)
+    for key in ("hook", "content", "recap"):
+        manifest.store(key, pcm_buffer.add(_tone(0.1), SAMPLE_RATE), key)
+
+    # The edited lesson keeps hook and recap, and replaces content
+    edited = LessonManifest("lesson-1", cache=cache)
+    assert [key in edited for key in ("hook", "content-v2", "recap")] == [True, False, True]
+    edited.store("content-v2", pcm_buffer.add(_tone(0.1), SAMPLE_RATE), "content")
+    assert edited.retain(["hook", "content-v2", "recap"]) == 1
+    assert set(LessonManifest("lesson-1", cache=cache).entries) == {"hook", "content-v2", "recap"}
+
+
+def test_sources_keep_separate_manifests_and_share_audio(cache, pcm_buffer):
+    first = LessonManifest("lesson-1", source="a.pdf", cache=cache)
+    second = LessonManifest("lesson-1", source="b.pdf", cache=cache)
+    first.store("hook", pcm_buffer.add(_tone(0.1), SAMPLE_RATE), "hook")
+    second.store("recap", pcm_buffer.add(_tone(0.1), SAMPLE_RATE), "recap")
+    second.retain(["recap"])
+    assert set(LessonManifest("lesson-1", source="a.pdf", cache=cache).entries) == {"hook"}
+    assert set(LessonManifest("lesson-1", source="b.pdf", cache=cache).entries) == {"recap"}
+    # Identical sections are stored once, whichever lesson synthesized them
+    assert "hook" in second
+
+
+def test_store_is_bounded_by_lru_eviction(tmp_path, pcm_buffer):
+    cache = DiskCache(tmp_path / "sections", max_bytes=40 * 1024)
+    manifest = LessonManifest("lesson-1", cache=cache)
+    noise = np.random.default_rng(0).uniform(-0.5, 0.5, SAMPLE_RATE).astype(np.float32)
+    for i in range(10):
+        manifest.store(f"section-{i}", pcm_buffer.add(noise, SAMPLE_RATE), str(i))
+    assert cache.size_bytes() <= 40 * 1024
+    assert "section-0" not in manifest
+    assert manifest.load("section-0", pcm_buffer) is None
+
+
+def test_unreadable_or_outdated_manifest_starts_empty(cache, pcm_buffer):
+    manifest = LessonManifest("lesson-1", cache=cache)
+    manifest.store("hook", pcm_buffer.add(_tone(0.1), SAMPLE_RATE), "hook")
+    cache.set(manifest.manifest_key, b'{"version": 0, "sections": {"hook": {}}}')
+    assert LessonManifest("lesson-1", cache=cache).entries == {}
+    cache.set(manifest.manifest_key, b"not json")
+    assert LessonManifest("lesson-1", cache=cache).entries == {}
+
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    """Speech generator that synthesizes a constant tone instead of calling the TTS API."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TTS_CACHE_ENABLED", "false")
+    monkeypatch.setenv("LESSON_SECTIONS_DIR", str(tmp_path / "sections"))
+    monkeypatch.setattr("src.core.lesson_manifest._section_audio_cache", None)
+    monkeypatch.setenv("GAP_SECONDS", "1")
+    monkeypatch.setenv("GAP_SECONDS_OBJECTIVES", "0")
+    from src.core.speech_generator import EnhancedTimedSpeechGenerator
+
+    generator = EnhancedTimedSpeechGenerator("sk-test")
+    generator.synthesized = []
+
+    def synthesize_text_pcm(text, chunk_pool=None):
+        generator.synthesized.append(text)
+        return _tone(0.2), SAMPLE_RATE
+
+    generator.synthesize_text_pcm = synthesize_text_pcm
+    return generator
+
+
+SCRIPT = """## Opening Hook
+Hello there.
+
+## Learning Objectives
+We learn fractions.
+
+## Practice Activity
+Try three problems.
+
+## Recap
+That is all for today.
+"""
+
+
+def _synthesize(generator, script, source):
+    sections = generator.split_script_into_natural_sections(script)
+    manifest = generator._lesson_manifest("lesson-1", source)
+    buffer = PcmBuffer(generator.temp_dir)
+    try:
+        segments = generator._synthesize_sections(sections, buffer, manifest)
+    finally:
+        buffer.release()
+    return segments, manifest
+
+
+def test_regeneration_only_synthesizes_edited_sections(generator):
+    segments, manifest = _synthesize(generator, SCRIPT, "a.pdf")
+    # Objectives has no gap after it, so it is synthesized together with practice
+    assert [segment is not None for segment in segments] == [True, False, True, True]
+    assert len(generator.synthesized) == 3
+    assert manifest.stats()["sections_stored"] == 3
+
+    generator.synthesized.clear()
+    segments, manifest = _synthesize(generator, SCRIPT.replace("three", "four"), "a.pdf")
+    assert generator.synthesized == ["We learn fractions.\n\nTry four problems."]
+    assert manifest.stats() == {"sections_reused": 2, "sections_stored": 1}
+    assert len(manifest.entries) == 3
+
+    # Another source of the lesson has its own manifest but reuses identical sections
+    generator.synthesized.clear()
+    segments, manifest = _synthesize(generator, SCRIPT, "b.pdf")
+    assert generator.synthesized == []
+    assert manifest.stats() == {"sections_reused": 3, "sections_stored": 0}
+
+
+def test_streamed_and_blocking_generation_share_sections(generator, monkeypatch):
+    monkeypatch.setattr(generator, "_assemble_lesson_audio",
+                        lambda sections, segments, *args: {"success": True, "segments": segments})
+    result = generator.generate_lesson_audio_from_stream(
+        (SCRIPT[i:i + 7] for i in range(0, len(SCRIPT), 7)), "lesson-1", source="a.pdf")
+    assert result["script_text"] == SCRIPT
+    assert result["sections_stored"] == 3
+
+    generator.synthesized.clear()
+    result = generator.generate_lesson_audio_with_30s_gaps(SCRIPT, "lesson-1", source="a.pdf")
+    assert generator.synthesized == []
+    assert result["sections_reused"] == 3
+
+
+def test_failed_generation_removes_the_lesson_temp_dir(generator, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("encoder crashed")
+
+    monkeypatch.setattr(generator, "_assemble_lesson_audio", fail)
+    result = generator.generate_lesson_audio_with_30s_gaps(SCRIPT, "lesson-1", source="a.pdf")
+    assert result == {"success": False, "error": "encoder crashed"}
+
+    result = generator.generate_lesson_audio_from_stream(iter([SCRIPT]), "lesson-1", source="a.pdf")
+    assert result["script_text"] == SCRIPT
+    assert not result["success"]
+    assert not list(generator.temp_dir.glob("lesson_lesson-1_*"))
@@ -0,0 +1,43 @@
+import gc
+
+from src.core.pdf_prefetcher import PDFPrefetcher, SpooledPDFs
+
+
+class FakeProcessor:
+    def __init__(self, pdfs):
+        self.pdfs = pdfs
+        self.downloads = []
+
+    def download_pdf_from_url(self, pdf_url):
+        self.downloads.append(pdf_url)
+        if pdf_url not in self.pdfs:
+            raise Exception("404 Not Found")
+        return self.pdfs[pdf_url]
+
+
+def test_prefetch_spools_pdfs_to_disk(tmp_path, monkeypatch):
+    monkeypatch.setenv("PDF_PREFETCH_DIR", str(tmp_path))
+    cp = FakeProcessor({"https://x/a.pdf": b"%PDF-a", "https://x/b.pdf": b"%PDF-bb"})
+    report = PDFPrefetcher(cp, max_workers=2).prefetch(
+        ["https://x/a.pdf", " https://x/a.pdf ", "https://x/b.pdf", "https://x/missing.pdf"])
+
+    assert (report["requested"], report["unique"], report["total_bytes"]) == (4, 3, 13)
+    assert [f["pdf_url"] for f in report["failures"]] == ["https://x/missing.pdf"]
+    pdfs = report["pdfs"]
+    assert len(pdfs) == 2 and "https://x/a.pdf" in pdfs
+    assert sorted(p.read_bytes() for p in pdfs.dir.iterdir()) == [b"%PDF-a", b"%PDF-bb"]
+    assert pdfs.get("https://x/b.pdf") == b"%PDF-bb"
+    assert pdfs.get("https://x/missing.pdf") is None
+
+    pdfs.close()
+    assert not pdfs.dir.exists()
+    assert pdfs.get("https://x/a.pdf") is None
+
+
+def test_spooled_files_are_deleted_with_the_report(tmp_path):
+    pdfs = SpooledPDFs(str(tmp_path))
+    pdfs.add("https://x/a.pdf", b"%PDF-a")
+    spool_dir = pdfs.dir
+    del pdfs
+    gc.collect()
+    assert not spool_dir.exists()
@@ -0,0 +1,23 @@
+import asyncio
+import gc
+
+from src.core import rate_limit
+from src.core.rate_limit import get_async_semaphore
+
+
+async def _semaphores():
+    return get_async_semaphore("openai"), get_async_semaphore("openai"), get_async_semaphore("elevenlabs")
+
+
+def test_async_semaphore_is_shared_per_loop_and_name():
+    openai, openai_again, elevenlabs = asyncio.run(_semaphores())
+    assert openai is openai_again
+    assert openai is not elevenlabs
+    assert asyncio.run(_semaphores())[0] is not openai
+
+
+def test_async_semaphores_are_dropped_with_their_loop():
+    for _ in range(5):
+        asyncio.run(_semaphores())
+    gc.collect()
+    assert len(rate_limit._async_semaphores) == 0
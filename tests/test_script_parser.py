@@ -0,0 +1,111 @@
+from src.core.script_parser import ScriptDocument, ScriptParser, parse_script, section_type_for
+
+SCRIPT = """Lecture Script: Photosynthesis
+Generated for: Grade 7 Science
+---
+
+# Photosynthesis
+
+## Opening Hook (2 minutes) [0:00]
+Have you ever wondered how a leaf eats?
+[Note: hold up a leaf]
+
+## Learning Objectives
+- Name the inputs of photosynthesis.
+- **Explain** where the energy comes from.
+
+[Main Content: 5-10 minutes]
+Plants turn light into sugar. [2:30] Chlorophyll absorbs the light.
+Teaching tip: draw the chloroplast on the board.
+
+Recap
+That is how plants make their food.
+"""
+
+
+def test_text_script_sections_in_order():
+    doc = parse_script(SCRIPT)
+    assert doc.title == "Photosynthesis"
+    assert [(s.order, s.type) for s in doc.sections] == [
+        (0, "hook"), (1, "objectives"), (2, "content"), (3, "recap")]
+    hook, objectives, content, recap = doc.sections
+    assert hook.title == "Opening Hook"
+    assert (hook.duration_min, hook.duration_max, hook.start_minute) == (2, 2, 0)
+    assert content.title == "Main Content"
+    assert (content.duration_min, content.duration_max) == (5, 10)
+    assert recap.speech == "That is how plants make their food."
+
+
+def test_metadata_is_skipped():
+    doc = parse_script(SCRIPT)
+    assert all("Generated for" not in s.speech and "Lecture Script" not in s.speech for s in doc.sections)
+
+
+def test_notes_and_markers_are_not_spoken():
+    hook, objectives, content, _ = parse_script(SCRIPT).sections
+    assert hook.speech == "Have you ever wondered how a leaf eats?"
+    assert hook.notes == ["hold up a leaf"]
+    assert objectives.speech == "Name the inputs of photosynthesis.\nExplain where the energy comes from."
+    assert content.speech == "Plants turn light into sugar. Chlorophyll absorbs the light."
+    assert content.timing_markers == [150]
+    assert content.notes == ["draw the chloroplast on the board."]
+
+
+def test_sentences_with_keywords_are_not_headers():
+    doc = parse_script("## Main Content\nIn summary, this lesson covers practice problems.\n")
+    assert len(doc.sections) == 1
+    assert doc.sections[0].speech == "In summary, this lesson covers practice problems."
+
+
+def test_incremental_feed_matches_whole_parse():
+    parser = ScriptParser()
+    sections = []
+    for line in SCRIPT.split("\n"):
+        section = parser.feed(line)
+        if section is not None:
+            sections.append(section)
+            # A section is only returned once it is complete
+            assert section.speech or section.notes
+    sections.append(parser.close())
+    assert sections == parse_script(SCRIPT).sections
+
+
+def test_structured_document_maps_to_same_ir():
+    doc = ScriptDocument.from_document({
+        "title": "Photosynthesis",
+        "sections": [
+            {"title": "Opening Hook", "type": "hook", "speech": " Have you ever wondered how a leaf eats? ",
+             "notes": ["hold up a leaf"], "minutes": 2, "start_minute": 0},
+            {"title": "Light reactions", "type": "content", "speech": "Plants turn light into sugar."},
+            {"title": "Board work", "type": "practice", "speech": "", "notes": ["draw a chloroplast"]},
+        ],
+    })
+    assert [(s.order, s.type, s.title) for s in doc.sections] == [
+        (0, "hook", "Opening Hook"), (1, "content", "Light reactions"), (2, "practice", "Board work")]
+    assert doc.sections[0].speech == "Have you ever wondered how a leaf eats?"
+    assert doc.sections[0].minutes == 2
+    assert [s.title for s in doc.speakable()] == ["Opening Hook", "Light reactions"]
+    assert doc.speech_text() == "Have you ever wondered how a leaf eats?\n\nPlants turn light into sugar."
+
+
+def test_rendered_text_parses_back_to_same_sections():
+    doc = ScriptDocument.from_document({
+        "title": "Photosynthesis",
+        "sections": [
+            {"title": "Opening Hook", "type": "hook", "speech": "How does a leaf eat?",
+             "notes": ["hold up a leaf"], "minutes": 2, "start_minute": 0},
+            {"title": "Light reactions", "type": "content", "speech": "Plants turn light into sugar.",
+             "minutes": 9, "start_minute": 2},
+            {"title": "Recap & Takeaways", "type": "recap", "speech": "Light becomes sugar."},
+        ],
+    })
+    reparsed = parse_script(doc.render_text())
+    assert reparsed.title == doc.title
+    assert [(s.type, s.title, s.speech, s.notes, s.minutes, s.start_minute) for s in reparsed.sections] == [
+        (s.type, s.title, s.speech, s.notes, s.minutes, s.start_minute) for s in doc.sections]
+
+
+def test_section_type_for_keywords():
+    assert section_type_for("Wrap-up and Summary") == "recap"
+    assert section_type_for("Group Activity") == "practice"
+    assert section_type_for("Photosynthesis") == "content"
@@ -0,0 +1,10 @@
+from src.core.content_processor import ContentProcessor
+
+
+def test_script_pdf_renders_without_an_instance(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    record = {"meta": {"lesson_title": "Leaves", "teacher_name": "Ada"},
+              "script_doc": {"title": "Leaves", "sections": [
+                  {"type": "hook", "title": "Opening Hook", "speech": "How does a leaf eat?"}]}}
+    assert ContentProcessor.render_script_pdf(record).startswith(b"%PDF-")
+    assert ContentProcessor.render_script_pdf({"meta": {}, "script_text": "Hello."}).startswith(b"%PDF-")
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.delenv("SUMMARY_MODEL", raising=False)
+    monkeypatch.delenv("ROUTE_ECONOMY_CHAT_MODEL", raising=False)
+    from src.core.content_processor import ContentProcessor
+    from src.core.llm_cache import LLMResponseCache
+
+    processor = ContentProcessor()
+    processor.llm_cache = LLMResponseCache(path=str(tmp_path / "llm.sqlite3"))
+    requests = []
+
+    def create(**request):
+        requests.append(request)
+        message = SimpleNamespace(content=f"- summary {len(requests)}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=None)
+
+    processor.openai_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    processor.requests = requests
+    return processor
+
+
+def test_summaries_default_to_the_economy_model(processor, monkeypatch):
+    assert processor.summarizer.model == "gpt-4o-mini"
+    processor.summarizer.summarize_chunk("Photosynthesis converts light into sugar.")
+    assert processor.requests[0]["model"] == "gpt-4o-mini"
+
+    from src.core.source_summarizer import SourceSummarizer
+
+    monkeypatch.setenv("ROUTE_ECONOMY_CHAT_MODEL", "gpt-economy")
+    assert SourceSummarizer(processor._chat_completion).model == "gpt-economy"
+    monkeypatch.setenv("SUMMARY_MODEL", "gpt-summary")
+    assert SourceSummarizer(processor._chat_completion).model == "gpt-summary"
+
+
+def test_chunk_summaries_are_not_stored_in_the_llm_cache(processor):
+    summary, was_cached = processor.summarizer.summarize_chunk("Photosynthesis converts light into sugar.")
+    assert (summary, was_cached) == ("- summary 1", False)
+    assert processor.llm_cache._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+    # Kept in the summarizer's own chunk cache instead
+    assert processor.summarizer.summarize_chunk("Photosynthesis converts light into sugar.") == ("- summary 1", True)
+
+
+def test_uncached_completions_are_still_stored_by_default(processor):
+    processor._chat_completion("system", "user", use_cache=False)
+    assert processor.llm_cache._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 1
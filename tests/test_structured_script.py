@@ -0,0 +1,83 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+SECTIONS = [
+    {"type": "hook", "title": "Opening Hook", "minutes": 4, "speech": "How does a leaf eat?", "notes": []},
+    {"type": "content", "title": "Light reactions", "minutes": 20, "speech": "Plants turn light into sugar."},
+    {"type": "recap", "title": "Recap & Takeaways", "minutes": 4, "speech": "Light becomes sugar."},
+]
+TEXT_SCRIPT = """## Opening Hook
+How does a leaf eat?
+
+## Main Content: Light reactions
+Plants turn light into sugar. [Note: draw a chloroplast]
+"""
+
+
+class FakeCompletions:
+    """Chat completions returning queued (content, finish_reason) pairs and recording the requests."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def create(self, **request):
+        self.requests.append(request)
+        content, finish_reason = self.responses.pop(0)
+        choice = SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)
+        return SimpleNamespace(choices=[choice], usage=None)
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    monkeypatch.setenv("SCRIPT_SOURCE_SELECTION", "head")
+    from src.core.content_processor import ContentProcessor
+
+    return ContentProcessor()
+
+
+def _respond(processor, *responses):
+    completions = FakeCompletions(responses)
+    processor.openai_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return completions
+
+
+def test_max_tokens_is_sized_from_duration(processor):
+    from src.core.content_processor import DEFAULT_SCRIPT_MAX_TOKENS, STRUCTURED_SCRIPT_MAX_TOKENS
+
+    assert processor.structured_script_max_tokens((5, 6)) == DEFAULT_SCRIPT_MAX_TOKENS
+    assert processor.structured_script_max_tokens((35, 40)) == STRUCTURED_SCRIPT_MAX_TOKENS
+    completions = _respond(processor, (json.dumps({"title": "Leaves", "sections": SECTIONS}), "stop"))
+    script_doc = processor.create_structured_script("source", "Leaves")
+    assert completions.requests[0]["max_tokens"] == STRUCTURED_SCRIPT_MAX_TOKENS
+    assert [s["type"] for s in script_doc["sections"]] == ["hook", "content", "recap"]
+
+
+def test_cut_off_recap_keeps_complete_sections(processor):
+    raw = json.dumps({"title": "Leaves", "sections": SECTIONS + [{"type": "recap", "speech": "And"}]})
+    completions = _respond(processor, (raw[:raw.rindex("And")], "length"))
+    script_doc = processor.create_structured_script("source", "Leaves")
+    assert [s["title"] for s in script_doc["sections"]] == [s["title"] for s in SECTIONS]
+    assert len(completions.requests) == 1
+
+
+def test_cut_off_before_recap_falls_back_to_text_script(processor):
+    raw = json.dumps({"title": "Leaves", "sections": SECTIONS})
+    completions = _respond(processor, (raw[:raw.index("Recap")], "length"), (TEXT_SCRIPT, "stop"))
+    script_doc = processor.create_structured_script("source", "Leaves")
+    assert "response_format" not in completions.requests[1]
+    assert [(s["type"], s["title"]) for s in script_doc["sections"]] == [
+        ("hook", "Opening Hook"), ("content", "Light reactions")]
+    assert script_doc["sections"][1]["notes"] == ["draw a chloroplast"]
+
+
+def test_invalid_json_is_retried_then_falls_back(processor):
+    completions = _respond(processor, ("not json", "stop"), ('{"sections": []}', "stop"), (TEXT_SCRIPT, "stop"))
+    script_doc = processor.create_structured_script("source", "Leaves")
+    assert len(completions.requests) == 3
+    assert script_doc["sections"][0]["speech"] == "How does a leaf eat?"
@@ -0,0 +1,68 @@
+import re
+
+from src.core.text_chunker import iter_sentences, pack_chunks
+
+TEXT = (
+    "Fractions describe parts of a whole. The top number is the numerator! "
+    "Is the bottom one the denominator? Yes.\n\n"
+    "   Equivalent fractions   name the same amount.\n"
+    "One half equals two quarters.\n\n\n"
+    "Simplify by dividing both numbers by a common factor."
+)
+
+
+def _words(text):
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def test_iter_sentences_keeps_paragraph_breaks():
+    separators, sentences = zip(*iter_sentences(TEXT))
+    assert sentences[:4] == ("Fractions describe parts of a whole.", "The top number is the numerator!",
+                             "Is the bottom one the denominator?", "Yes.")
+    assert sentences[4] == "Equivalent fractions name the same amount."
+    assert separators == ("\n\n", " ", " ", " ", "\n\n", " ", "\n\n")
+
+
+def test_chunks_respect_limit_and_preserve_text():
+    for limit in (20, 45, 80, 200, 4096):
+        chunks = pack_chunks(TEXT, limit)
+        assert all(0 < len(chunk) <= limit for chunk in chunks)
+        assert _words(" ".join(chunks)) == _words(TEXT)
+
+
+def test_chunks_end_on_sentence_boundaries():
+    sentences = [sentence for _, sentence in iter_sentences(TEXT)]
+    longest = max(len(sentence) for sentence in sentences)
+    for chunk in pack_chunks(TEXT, longest + 10):
+        assert chunk.rstrip().endswith((".", "!", "?"))
+        assert not chunk.startswith((" ", "\n"))
+
+
+def test_packing_is_greedy_and_minimal():
+    sentences = [f"Sentence number {i:02d} is here." for i in range(10)]
+    text = " ".join(sentences)
+    # Three sentences plus two separators fit exactly, a fourth does not
+    limit = 3 * len(sentences[0]) + 2
+    chunks = pack_chunks(text, limit)
+    assert chunks == [" ".join(sentences[i:i + 3]) for i in range(0, 10, 3)]
+
+
+def test_chunks_span_paragraphs_with_paragraph_separator():
+    assert pack_chunks("First part.\n\nSecond part.", 100) == ["First part.\n\nSecond part."]
+
+
+def test_overlong_sentence_is_split_at_word_boundaries():
+    sentence = " ".join(["word"] * 30) + "."
+    chunks = pack_chunks(f"Short intro. {sentence} Short outro.", 40)
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert all(not re.search(r"\bwor\b|\bord\b", chunk) for chunk in chunks)
+    assert _words(" ".join(chunks)) == _words(f"Short intro. {sentence} Short outro.")
+
+
+def test_unbreakable_word_is_cut_at_limit():
+    assert pack_chunks("x" * 25, 10) == ["x" * 10, "x" * 10, "x" * 5]
+
+
+def test_empty_text_has_no_chunks():
+    assert pack_chunks("", 100) == []
+    assert pack_chunks(" \n\n ", 100) == []